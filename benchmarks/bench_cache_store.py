@@ -0,0 +1,71 @@
+# Compares the cache stores: populate time, lookup latency (p50/p99) and disk footprint
+# for the file-per-URL layout and the SQLite store, over synthetic pages.
+#
+# Usage: python -m benchmarks.bench_cache_store [--entries 100000 1000000] [--lookups N]
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from bit_scrapper.utils.cache import CacheEntry, cache_key, make_store
+
+
+def synthetic_page(n: int) -> str:
+    rows = "".join(f'<li class="item"><a href="/item/{n}-{i}">Item {i}</a></li>' for i in range(40))
+    return f"<html><body><h1>Page {n}</h1><ul>{rows}</ul></body></html>"
+
+
+def disk_usage(directory: str) -> int:
+    # Allocated blocks, which is what small files actually cost on disk
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            total += os.stat(os.path.join(root, name)).st_blocks * 512
+    return total
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def measure(backend: str, entries: int, lookups: int) -> tuple:
+    directory = tempfile.mkdtemp(prefix=f"bitscrapper-{backend}-")
+    try:
+        store = make_store(backend, directory)
+        started = time.perf_counter()
+        for n in range(entries):
+            url = f"https://example.com/list?page={n}"
+            store.save(cache_key(url), CacheEntry(url, synthetic_page(n)))
+        populate = time.perf_counter() - started
+
+        latencies = []
+        for n in random.sample(range(entries), min(lookups, entries)):
+            key = cache_key(f"https://example.com/list?page={n}")
+            started = time.perf_counter()
+            store.load(key)
+            latencies.append(time.perf_counter() - started)
+        store.close()
+        return populate, percentile(latencies, 0.5), percentile(latencies, 0.99), disk_usage(directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache store benchmark")
+    parser.add_argument("--entries", type=int, nargs="+", default=[100000])
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--backends", nargs="+", default=["files", "sqlite"])
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'entries':>10}{'populate s':>12}{'p50 us':>10}{'p99 us':>10}{'disk MB':>10}")
+    for entries in args.entries:
+        for backend in args.backends:
+            populate, p50, p99, footprint = measure(backend, entries, args.lookups)
+            print(f"{backend:<10}{entries:>10}{populate:>12.2f}{p50 * 1e6:>10.1f}{p99 * 1e6:>10.1f}{footprint / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Counts the TCP connections opened against a local keep-alive server when fetching
+# the same pages with the module-level `requests.get` (the old behaviour) and with the
+# pooled session owned by Middleware.
+#
+# Usage: python -m benchmarks.bench_connections [--pages N]
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from bit_scrapper.core.middleware import Middleware
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b"<html><body><h1>bench</h1></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(fetch, base_url, server, pages):
+    server.connections = 0
+    started = time.perf_counter()
+    for page in range(pages):
+        fetch(f"{base_url}/list?page={page}")
+    return server.connections, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection reuse benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    server = CountingServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    before = measure(lambda url: requests.get(url).text, base_url, server, args.pages)
+    middleware = Middleware({})
+    after = measure(lambda url: middleware.fetch_with_retries(url, {}), base_url, server, args.pages)
+    middleware.close()
+    server.shutdown()
+
+    print(f"{'mode':<16}{'pages':>8}{'connections':>14}{'seconds':>10}")
+    print(f"{'requests.get':<16}{args.pages:>8}{before[0]:>14}{before[1]:>10.3f}")
+    print(f"{'pooled session':<16}{args.pages:>8}{after[0]:>14}{after[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Throughput of a distributed crawl as local worker processes are added. Every worker
+# leases listing pages of the local fixture server (with per-page latency) from one
+# SQLite queue; the ideal is pages/s growing linearly with the number of workers.
+#
+# Usage: python -m benchmarks.bench_distributed [--pages N] [--latency S] [--workers 1 2 4]
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_suite import scraper_config
+from benchmarks.fixture_server import FixtureServer
+from bit_scrapper.core.distributed import Coordinator, SQLiteQueue
+
+
+def crawl(base_url: str, pages: int, workers: int, directory: str) -> float:
+    """
+    Crawl every listing page with `workers` local processes.
+
+    Returns:
+        float: Pages per second, from seeding to the last completion.
+    """
+    config = scraper_config(base_url, pages, workdir=directory)
+    config["pagination"] = {"enabled": False}
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, 'w', encoding='utf-8') as file:
+        json.dump(config, file)
+    queue_path = os.path.join(directory, f"queue-{workers}.sqlite3")
+    queue = SQLiteQueue(queue_path)
+    coordinator = Coordinator(queue)
+    started = time.perf_counter()
+    coordinator.seed(f"{base_url}/list?page={page}" for page in range(1, pages + 1))
+    coordinator.spawn_workers(workers, ["--config", config_path, "--queue", queue_path])
+    stats = coordinator.wait(poll=0.05)
+    elapsed = time.perf_counter() - started
+    queue.close()
+    if stats["done"] != pages:
+        raise RuntimeError(f"Only {stats['done']} of {pages} pages completed")
+    return pages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed crawl scaling benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bitscrapper-distributed-")
+    results = []
+    try:
+        with FixtureServer(pages=args.pages, latency=args.latency) as server:
+            for workers in args.workers:
+                results.append((workers, crawl(server.base_url, args.pages, workers, directory)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    single = results[0][1] / results[0][0]
+    print(f"{'workers':>8}{'pages/s':>10}{'speedup':>10}{'efficiency':>12}")
+    for workers, rate in results:
+        print(f"{workers:>8}{rate:>10.1f}{rate / single:>10.2f}{rate / single / workers:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Parse + extract throughput for every installed parser backend over a corpus of saved
+# pages. Without --corpus a synthetic listing corpus is generated in memory.
+#
+# Usage: python -m benchmarks.bench_parsers [--corpus DIR] [--config FILE] [--pages N]
+import argparse
+import glob
+import json
+import os
+import time
+
+from bs4.builder import builder_registry
+
+from bit_scrapper.core.parser import PARSER_BACKENDS
+from bit_scrapper.core.scraper import BitScrapper
+
+DEFAULT_CONFIG = {
+    "selectors": {
+        "title": {"type": "css", "value": "h1"},
+        "first_price": {"type": "css", "value": "li.item span.price"},
+    },
+    "pagination": {"enabled": False},
+}
+
+
+def synthetic_page(page: int, items: int = 50) -> str:
+    rows = "".join(
+        f'<li class="item"><a href="/item/{page}-{i}">Item {i}</a><span class="price">{i}.99</span></li>'
+        for i in range(items)
+    )
+    return f"<html><head><title>Page {page}</title></head><body><h1>Listing {page}</h1><ul>{rows}</ul></body></html>"
+
+
+def load_corpus(corpus_dir: str, pages: int) -> list:
+    if not corpus_dir:
+        return [synthetic_page(page) for page in range(pages)]
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html")))[:pages]:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            corpus.append(file.read())
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend benchmark")
+    parser.add_argument("--corpus", type=str, help="Directory of saved .html pages")
+    parser.add_argument("--config", type=str, help="Config whose selectors are extracted")
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as file:
+            config = json.load(file)
+    corpus = load_corpus(args.corpus, args.pages)
+
+    print(f"{'backend':<14}{'pages':>8}{'pages/s':>12}")
+    for backend in PARSER_BACKENDS:
+        if builder_registry.lookup(backend) is None:
+            print(f"{backend:<14}{'not installed':>20}")
+            continue
+        scraper = BitScrapper(dict(config, parser=backend))
+        started = time.perf_counter()
+        for html in corpus:
+            scraper.extract_data(scraper.parse(html))
+        elapsed = time.perf_counter() - started
+        print(f"{backend:<14}{len(corpus):>8}{len(corpus) / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
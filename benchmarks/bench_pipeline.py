@@ -0,0 +1,42 @@
+# Extraction throughput of the process-pool pipeline for 1..N workers over a saved-page
+# corpus (or a synthetic one), to show scaling with cores.
+#
+# Usage: python -m benchmarks.bench_pipeline [--corpus DIR] [--config FILE] [--pages N] [--workers 1 2 4 8]
+import argparse
+import json
+import os
+import time
+
+from benchmarks.bench_parsers import DEFAULT_CONFIG, load_corpus
+from bit_scrapper.core.pipeline import ExtractionPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction pipeline scaling benchmark")
+    parser.add_argument("--corpus", type=str, help="Directory of saved .html pages")
+    parser.add_argument("--config", type=str, help="Config whose selectors are extracted")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+")
+    args = parser.parse_args()
+
+    config = DEFAULT_CONFIG
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as file:
+            config = json.load(file)
+    corpus = load_corpus(args.corpus, args.pages)
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, cores // 2 or 1, cores})
+
+    print(f"{'workers':<10}{'pages':>8}{'pages/s':>12}{'speedup':>10}")
+    baseline = None
+    for workers in worker_counts:
+        pipeline = ExtractionPipeline(config, workers=workers)
+        started = time.perf_counter()
+        count = sum(1 for _ in pipeline.map(iter(corpus)))
+        rate = count / (time.perf_counter() - started)
+        baseline = baseline or rate
+        print(f"{workers:<10}{count:>8}{rate:>12.1f}{rate / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
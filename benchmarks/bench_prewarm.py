@@ -0,0 +1,88 @@
+# Multi-host crawl against local fixture servers, with the system resolver on every new
+# connection, with the DNS cache, and with the DNS cache plus pre-warming of the hosts
+# queued next. Each server is its own host (host-N.bench), resolved through a simulated
+# resolver that answers after --dns-latency seconds; the per-phase timings (DNS, connect,
+# time to first byte) and pages/s show where the time goes.
+#
+# Usage: python -m benchmarks.bench_prewarm [--hosts N] [--pages N] [--dns-latency S] [--latency S] [--concurrency N]
+#        [--pool-connections N]
+import argparse
+import contextlib
+import socket
+import tempfile
+import time
+from unittest.mock import patch
+
+from benchmarks.bench_suite import scraper_config
+from benchmarks.fixture_server import FixtureServer
+from bit_scrapper.core.frontier import Crawler
+from bit_scrapper.core.scraper import BitScrapper
+
+MODES = [
+    ("system resolver", {"ttl": 0}, 0),
+    ("dns cache", {}, 0),
+    ("dns cache + prewarm", {}, None),
+]
+
+
+def slow_resolver(latency: float):
+    getaddrinfo = socket.getaddrinfo
+
+    def resolve(host, *args, **kwargs):
+        if isinstance(host, str) and host.endswith(".bench"):
+            time.sleep(latency)
+            host = "127.0.0.1"
+        return getaddrinfo(host, *args, **kwargs)
+    return resolve
+
+
+def crawl(urls: list, dns: dict, prewarm: int, concurrency: int, pool_connections: int, workdir: str) -> dict:
+    """
+    Crawl `urls` (one listing page each) and collect the connection phase timings.
+
+    Returns:
+        dict: pages_per_s and the p50 of each phase in milliseconds.
+    """
+    config = scraper_config("http://unused", 1, workdir=workdir)
+    config.update(pagination={"enabled": False}, dns=dns, respect_robots=True, metrics={}, http={"pool_connections": pool_connections})
+    with BitScrapper(config) as scraper:
+        crawler = Crawler(scraper, {"concurrency": concurrency, "prewarm": prewarm})
+        crawler.add_seeds(urls)
+        started = time.perf_counter()
+        pages = sum(1 for _ in crawler.iter_records())
+        elapsed = time.perf_counter() - started
+        histograms = scraper.metrics.summary()["histograms"]
+    result = {"pages_per_s": pages / elapsed}
+    for phase in ("dns", "connect", "ttfb"):
+        histogram = histograms.get(f"{phase}_seconds", {})
+        result[phase] = (histogram.get("count", 0), (histogram.get("p50") or 0) * 1000)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DNS cache and connection pre-warming benchmark")
+    parser.add_argument("--hosts", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=2, help="Listing pages per host")
+    parser.add_argument("--dns-latency", type=float, default=0.02)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pool-connections", type=int, default=10, help="Per-host pools kept (http.pool_connections)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bitscrapper-prewarm-")
+    with contextlib.ExitStack() as stack:
+        servers = [stack.enter_context(FixtureServer(pages=args.pages, latency=args.latency)) for _ in range(args.hosts)]
+        stack.enter_context(patch("socket.getaddrinfo", slow_resolver(args.dns_latency)))
+        urls = [f"http://host-{n}.bench:{server.server_address[1]}/list?page={page}"
+                for page in range(1, args.pages + 1) for n, server in enumerate(servers)]
+        results = [(name, crawl(urls, dns, args.concurrency if prewarm is None else prewarm, args.concurrency, args.pool_connections, workdir))
+                   for name, dns, prewarm in MODES]
+
+    print(f"{'mode':<22}{'pages/s':>9}{'dns n':>7}{'dns p50 ms':>12}{'conn n':>8}{'ttfb p50 ms':>13}")
+    for name, result in results:
+        print(f"{name:<22}{result['pages_per_s']:>9.1f}{result['dns'][0]:>7}{result['dns'][1]:>12.2f}"
+              f"{result['connect'][0]:>8}{result['ttfb'][1]:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
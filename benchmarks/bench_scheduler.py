@@ -0,0 +1,56 @@
+# Per-job overhead of a small job (one page from the local fixture server) run as a CLI
+# subprocess, as scripts/schedule_scraper.py used to, and as a warm in-process Job.
+#
+# Usage: python -m benchmarks.bench_scheduler [--runs N]
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_suite import scraper_config
+from benchmarks.fixture_server import FixtureServer
+from bit_scrapper.core.scheduler import Job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler per-job overhead benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bitscrapper-scheduler-")
+    try:
+        with FixtureServer(pages=1) as server:
+            url = f"{server.base_url}/list?page=1"
+            config = scraper_config(server.base_url, 1, workdir=directory)
+            config_path = os.path.join(directory, "config.json")
+            with open(config_path, 'w', encoding='utf-8') as file:
+                json.dump(config, file)
+            output = os.path.join(directory, "output")
+
+            started = time.perf_counter()
+            for _ in range(args.runs):
+                subprocess.run([sys.executable, "-m", "bit_scrapper.cli.main", "--config", config_path, "--url", url,
+                                "--format", "jsonl", "--output", output], check=True, capture_output=True)
+            subprocess_time = (time.perf_counter() - started) / args.runs
+
+            job = Job({"name": "bench", "config": config, "url": url, "format": "jsonl", "output": output, "every": 60})
+            job.run()  # The first run opens the connection and fetches robots.txt
+            started = time.perf_counter()
+            for _ in range(args.runs):
+                job.run()
+            warm_time = (time.perf_counter() - started) / args.runs
+            job.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{'mode':<22}{'runs':>6}{'ms/job':>10}")
+    print(f"{'CLI subprocess':<22}{args.runs:>6}{subprocess_time * 1000:>10.1f}")
+    print(f"{'warm in-process job':<22}{args.runs:>6}{warm_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Cold-start cost of the CLI: import time of bit_scrapper.cli.main (from `python -X importtime`),
+# wall time of `--help` over a bare interpreter, and time to a ready scraper with and
+# without the cached config validation. Exits 1 when a target is missed.
+#
+# Usage: python -m benchmarks.bench_startup [--runs N]
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CONFIG = os.path.join(ROOT, "examples", "sample_config.json")
+# Modules the CLI must not import before it knows it needs them
+HEAVY_MODULES = ("requests", "bs4", "jsonschema", "lxml", "asyncio", "multiprocessing", "sqlite3")
+# Cold-start targets in milliseconds
+TARGETS = {
+    "import_ms": 20.0,
+    "help_overhead_ms": 30.0,
+    "ready_cached_ms": 90.0,
+}
+
+READY = f"""
+import time
+started = time.perf_counter()
+from bit_scrapper.config.loader import load_config
+from bit_scrapper.core.scraper import BitScrapper
+BitScrapper(load_config({SAMPLE_CONFIG!r}, {{cache}})).close()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _env() -> dict:
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+
+
+def _wall(args: list, cwd: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=_env(), check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def import_profile(module: str, cwd: str) -> tuple:
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+
+    Returns:
+        tuple: The module's cumulative import time in milliseconds and the set of
+            top-level packages imported with it.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, env=_env(),
+                            check=True, capture_output=True, text=True)
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if not total.strip().isdigit():
+            continue  # The header line
+        imported.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            cumulative = int(total) / 1000
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bitscrapper-startup-")
+    try:
+        profiles = [import_profile("bit_scrapper.cli.main", directory) for _ in range(args.runs)]
+        import_ms = statistics.median(cumulative for cumulative, _ in profiles)
+        heavy = sorted(set(HEAVY_MODULES) & profiles[0][1])
+
+        bare = statistics.median(_wall(["-c", "pass"], directory) for _ in range(args.runs))
+        help_ms = statistics.median(_wall(["-m", "bit_scrapper.cli.main", "--help"], directory) for _ in range(args.runs))
+
+        def ready(cache: str) -> float:
+            result = subprocess.run([sys.executable, "-c", READY.format(cache=cache)], cwd=directory, env=_env(),
+                                    check=True, capture_output=True, text=True)
+            return float(result.stdout)
+
+        ready(repr(os.path.join(directory, "configs.json")))  # Records the validation
+        ready_cached = statistics.median(ready(repr(os.path.join(directory, "configs.json"))) for _ in range(args.runs))
+        ready_uncached = statistics.median(ready("None") for _ in range(args.runs))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    results = {
+        "import_ms": import_ms,
+        "help_overhead_ms": help_ms - bare,
+        "ready_cached_ms": ready_cached,
+    }
+    print(f"{'measure':<28}{'ms':>10}{'target':>10}")
+    print(f"{'bare interpreter':<28}{bare:>10.1f}")
+    print(f"{'--help':<28}{help_ms:>10.1f}")
+    print(f"{'ready, validation uncached':<28}{ready_uncached:>10.1f}")
+    missed = []
+    for name, value in results.items():
+        print(f"{name:<28}{value:>10.1f}{TARGETS[name]:>10.1f}")
+        if value > TARGETS[name]:
+            missed.append(name)
+    if heavy:
+        print(f"bit_scrapper.cli.main imports heavy modules: {', '.join(heavy)}")
+        missed.append("heavy imports")
+    if missed:
+        print(f"Missed targets: {', '.join(missed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# End-to-end benchmark suite against the local fixture server, compared with a stored baseline.
+# Each scenario runs in its own process, so peak RSS and CPU time are its own; the fixture
+# server runs in the parent and stays out of both. No network access is needed.
+#
+# Usage: python -m benchmarks.bench_suite [--scenarios run-offset cli-jsonl ...] [--scale 0.1]
+#                                         [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.3]
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_writers import SELECTORS as WRITER_SELECTORS, records
+from benchmarks.fixture_server import FixtureServer
+from bit_scrapper.cli import main as cli
+from bit_scrapper.core.async_scraper import AsyncBitScrapper
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.core.selectors import compile_selectors
+from bit_scrapper.utils.writer import open_writer
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SELECTORS = {
+    "title": {"type": "css", "value": "h1"},
+    "items": {"type": "css", "value": "li.item a", "multiple": True},
+    "prices": {"type": "css", "value": "span.price", "multiple": True, "post": ["float"]},
+}
+
+# kind: "run" (BitScrapper.run), "cli" (bit_scrapper.cli.main) or "writer" (open_writer alone)
+SCENARIOS = {
+    "run-offset": {"kind": "run", "server": {"pages": 200, "latency": 0.002}},
+    "run-link": {"kind": "run", "server": {"pages": 200, "latency": 0.002}, "strategy": "link"},
+    "run-errors": {"kind": "run", "server": {"pages": 200, "latency": 0.002, "error_rate": 0.1}},
+    "run-large-pages": {"kind": "run", "server": {"pages": 40, "page_size": 256 * 1024}},
+    "run-concurrent": {"kind": "run", "server": {"pages": 200, "latency": 0.02}, "concurrency": 8},
+    "cli-jsonl": {"kind": "cli", "server": {"pages": 200, "latency": 0.002}, "format": "jsonl"},
+    "writer-json": {"kind": "writer", "format": "json", "records": 50000},
+    "writer-jsonl": {"kind": "writer", "format": "jsonl", "records": 50000},
+    "writer-csv": {"kind": "writer", "format": "csv", "records": 50000},
+    "writer-parquet": {"kind": "writer", "format": "parquet", "records": 50000},
+    "writer-arrow": {"kind": "writer", "format": "arrow", "records": 50000},
+}
+
+# Default relative change beyond which a metric counts as a regression, and the absolute
+# change below which it is treated as noise. p99 is reported but not gated: on short runs it is
+# the slowest one or two samples.
+TOLERANCE = 0.3
+NOISE = {"p50_ms": 0.5, "peak_rss_mb": 5.0, "cpu_seconds": 0.05}
+
+
+def scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def scraper_config(base_url: str, pages: int, strategy: str = "offset", workdir: str = None) -> dict:
+    pagination = {"enabled": True, "strategy": strategy, "max_pages": pages}
+    if strategy == "offset":
+        pagination.update(base_url=f"{base_url}/list", param="page")
+    else:
+        pagination["next_selector"] = "a.next"
+    return {
+        "selectors": SELECTORS,
+        "pagination": pagination,
+        "user_agents": ["BitScrapperBench/1.0"],
+        "retry": {"max_attempts": 5, "backoff_factor": 0},
+        "cache": {"enabled": False, "dir": os.path.join(workdir or tempfile.gettempdir(), "cache")},
+        "robots": {"path": None},
+    }
+
+
+def _timed(fetch, latencies: list):
+    def fetch_url(url):
+        started = time.perf_counter()
+        try:
+            return fetch(url)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return fetch_url
+
+
+def _run_scenario(spec: dict, base_url: str, scale: float, workdir: str, latencies: list) -> int:
+    pages = scaled(spec["server"]["pages"], scale)
+    config = scraper_config(base_url, pages, spec.get("strategy", "offset"), workdir)
+    if spec.get("concurrency"):
+        scraper = AsyncBitScrapper(config, concurrency=spec["concurrency"])
+    else:
+        scraper = BitScrapper(config)
+    scraper.fetch_url = _timed(scraper.fetch_url, latencies)
+    with scraper:
+        records = scraper.run(f"{base_url}/list?page=1")
+    if len(records) != pages:
+        raise RuntimeError(f"Expected {pages} records, got {len(records)}")
+    return pages
+
+
+def _cli_scenario(spec: dict, base_url: str, scale: float, workdir: str, latencies: list) -> int:
+    pages = scaled(spec["server"]["pages"], scale)
+    config_path = os.path.join(workdir, "config.json")
+    with open(config_path, 'w', encoding='utf-8') as file:
+        json.dump(scraper_config(base_url, pages, workdir=workdir), file)
+    # The CLI builds its own scraper, so time fetches at the class level
+    BitScrapper.fetch_url = _class_timed(BitScrapper.fetch_url, latencies)
+    output = os.path.join(workdir, "output")
+    sys.argv = ["bitscrapper", "--config", config_path, "--url", f"{base_url}/list?page=1",
+                "--format", spec["format"], "--output", output]
+    cli.main()
+    with open(f"{output}.{spec['format']}", 'r', encoding='utf-8') as file:
+        written = sum(1 for _ in file)
+    if written != pages:
+        raise RuntimeError(f"Expected {pages} records, got {written}")
+    return pages
+
+
+def _class_timed(fetch, latencies: list):
+    def fetch_url(self, url):
+        started = time.perf_counter()
+        try:
+            return fetch(self, url)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return fetch_url
+
+
+def _writer_scenario(spec: dict, base_url: str, scale: float, workdir: str, latencies: list) -> int:
+    count = scaled(spec["records"], scale)
+    types = compile_selectors(WRITER_SELECTORS).column_types()
+    filename = os.path.join(workdir, f"output.{spec['format']}")
+    with open_writer(spec["format"], filename, fieldnames=list(WRITER_SELECTORS), types=types) as writer:
+        for record in records(count):
+            started = time.perf_counter()
+            writer.write(record)
+            latencies.append(time.perf_counter() - started)
+    return count
+
+
+RUNNERS = {"run": _run_scenario, "cli": _cli_scenario, "writer": _writer_scenario}
+
+
+def percentile(values: list, q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_child(name: str, base_url: str, scale: float) -> dict:
+    """
+    Run one scenario in this process and measure it.
+    """
+    spec = SCENARIOS[name]
+    workdir = tempfile.mkdtemp(prefix="bitscrapper-bench-")
+    latencies = []
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    try:
+        units = RUNNERS[spec["kind"]](spec, base_url, scale, workdir, latencies)
+    except ImportError as e:
+        return {"skipped": str(e)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = after.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "units": units,
+        "seconds": elapsed,
+        "rate": units / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": rss,
+        "cpu_seconds": (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime),
+    }
+
+
+def run_scenario(name: str, scale: float) -> dict:
+    """
+    Start the scenario's fixture server and run the scenario in a fresh process.
+    """
+    spec = SCENARIOS[name]
+    server = None
+    base_url = ""
+    if "server" in spec:
+        options = dict(spec["server"], pages=scaled(spec["server"]["pages"], scale))
+        server = FixtureServer(**options).start()
+        base_url = server.base_url
+    try:
+        command = [sys.executable, "-m", "benchmarks.bench_suite", "--child", name, "--base-url", base_url, "--scale", str(scale)]
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    finally:
+        if server is not None:
+            server.stop()
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(result: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """
+    List the metrics of `result` that regressed beyond `tolerance` against `baseline`.
+    """
+    regressions = []
+    if result["rate"] < baseline["rate"] * (1 - tolerance):
+        regressions.append("rate")
+    for key, noise in NOISE.items():
+        if result[key] > baseline[key] * (1 + tolerance) and result[key] - baseline[key] > noise:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite against a local fixture server")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every page and record count")
+    parser.add_argument("--baseline", type=str, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative change counted as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--child", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.base_url, args.scale)))
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            stored = json.load(file)
+        if stored.get("scale") == args.scale:
+            baseline = stored["results"]
+        elif not args.save_baseline:
+            print(f"Baseline was recorded at scale {stored.get('scale')}, not comparing")
+
+    results = {}
+    regressed = False
+    print(f"{'scenario':<18}{'units':>8}{'units/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'CPU s':>8}  vs baseline")
+    for name in args.scenarios:
+        result = run_scenario(name, args.scale)
+        if "skipped" in result or "error" in result:
+            print(f"{name:<18}  {result.get('skipped') or 'ERROR: ' + result['error']}")
+            regressed = regressed or "error" in result
+            continue
+        results[name] = result
+        note = ""
+        if name in baseline:
+            regressions = compare(result, baseline[name], args.tolerance)
+            change = result["rate"] / baseline[name]["rate"] - 1
+            note = f"{change:+.0%} rate" + (f"  REGRESSION: {', '.join(regressions)}" if regressions else "")
+            regressed = regressed or bool(regressions)
+        print(f"{name:<18}{result['units']:>8}{result['rate']:>10.1f}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['peak_rss_mb']:>9.1f}{result['cpu_seconds']:>8.2f}  {note}")
+
+    if args.save_baseline:
+        # Scenarios that were not run keep their stored results
+        results = dict(baseline, **results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({"scale": args.scale, "python": sys.version.split()[0], "results": results}, file, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Write time and file size of every output format for synthetic listing records.
+#
+# Usage: python -m benchmarks.bench_writers [--records 1000000]
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from bit_scrapper.core.selectors import compile_selectors
+from bit_scrapper.utils.writer import STREAM_WRITERS, open_writer
+
+SELECTORS = {
+    "title": {"type": "css", "value": "h1"},
+    "url": {"type": "css", "value": "a", "attr": "href"},
+    "price": {"type": "css", "value": "span.price", "post": ["float"]},
+    "stock": {"type": "css", "value": "b.stock", "dtype": "int"},
+    "in_sale": {"type": "css", "value": "i.sale", "dtype": "bool"},
+}
+
+
+def records(count: int):
+    for n in range(count):
+        yield {
+            "title": f"Item number {n}",
+            "url": f"https://example.com/item/{n}",
+            "price": n * 0.25,
+            "stock": n % 97,
+            "in_sale": n % 3 == 0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output writer benchmark")
+    parser.add_argument("--records", type=int, default=1000000)
+    args = parser.parse_args()
+
+    types = compile_selectors(SELECTORS).column_types()
+    directory = tempfile.mkdtemp(prefix="bitscrapper-writers-")
+    print(f"{'format':<10}{'records':>10}{'seconds':>10}{'MB':>10}")
+    try:
+        for format in STREAM_WRITERS:
+            filename = os.path.join(directory, f"output.{format}")
+            started = time.perf_counter()
+            try:
+                with open_writer(format, filename, fieldnames=list(SELECTORS), types=types) as writer:
+                    for record in records(args.records):
+                        writer.write(record)
+            except ImportError as e:
+                print(f"{format:<10}{str(e):>30}")
+                continue
+            elapsed = time.perf_counter() - started
+            print(f"{format:<10}{args.records:>10}{elapsed:>10.2f}{os.path.getsize(filename) / 1e6:>10.1f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
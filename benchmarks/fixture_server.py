@@ -0,0 +1,147 @@
+# Local HTTP server serving synthetic paginated listings for the benchmarks
+# Latency, error rate, page size and robots.txt are configurable; errors are drawn from
+# a seeded generator so every run sees the same sequence of failures.
+#
+# Usage: python -m benchmarks.fixture_server [--pages N] [--latency S] [--error-rate P] [--page-size BYTES]
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_ROBOTS = "User-agent: *\nDisallow: /private\n"
+ITEM = '<li class="item"><a href="/item/{page}-{n}">Item {page}-{n}</a> <span class="price">{price}</span></li>\n'
+
+
+def render_page(page: int, pages: int, page_size: int) -> bytes:
+    """
+    Render listing page `page` of `pages`, padded with items to about `page_size` bytes.
+    """
+    head = f"<html><head><title>Listing {page}</title></head><body><h1>Page {page}</h1><ul>\n"
+    tail = "</ul>"
+    if page < pages:
+        tail += f'<a class="next" href="/list?page={page + 1}">Next</a>'
+    tail += "</body></html>"
+    items = []
+    size = len(head) + len(tail)
+    n = 0
+    while size < page_size or n == 0:
+        item = ITEM.format(page=page, n=n, price=f"{(page * 31 + n) % 1000 / 10:.2f}")
+        items.append(item)
+        size += len(item)
+        n += 1
+    return (head + "".join(items) + tail).encode("utf-8")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves /list?page=N for 1 <= N <= pages (404 beyond) and /robots.txt, from a background thread.
+
+    Args:
+        pages (int): Number of listing pages.
+        latency (float): Seconds slept before each listing response.
+        error_rate (float): Share of listing requests answered with 503.
+        page_size (int): Approximate size of each listing page in bytes.
+        robots (str): robots.txt content, None to answer 404.
+        seed (int): Seed of the error generator.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages: int = 100, latency: float = 0.0, error_rate: float = 0.0, page_size: int = 4096,
+                 robots: str = DEFAULT_ROBOTS, seed: int = 0):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.pages = pages
+        self.latency = latency
+        self.error_rate = error_rate
+        self.robots = robots
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        # Rendered once, so the server's own CPU stays out of the measurements
+        self.bodies = {page: render_page(page, pages, page_size) for page in range(1, pages + 1)}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def fail_next(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/robots.txt":
+            if self.server.robots is None:
+                self._send(404, b"")
+            else:
+                self._send(200, self.server.robots.encode("utf-8"), "text/plain")
+            return
+        if parsed.path != "/list":
+            self._send(404, b"")
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_next():
+            self._send(503, b"")
+            return
+        page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+        body = self.server.bodies.get(page)
+        if body is None:
+            self._send(404, b"")
+        else:
+            self._send(200, body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic listing server")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    server = FixtureServer(args.pages, args.latency, args.error_rate, args.page_size)
+    print(f"Serving {args.pages} pages at {server.base_url}/list?page=1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import signal
+from bit_scrapper.core.scheduler import Scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="BitScrapper daemon - runs scheduled jobs in one process")
+    parser.add_argument("--jobs", type=str, required=True, help="Path to the JSON jobs file")
+    parser.add_argument("--workers", type=int, help="Maximum number of jobs running at once")
+    parser.add_argument("--status-port", type=int, help="Serve the job status as JSON at http://127.0.0.1:PORT/status")
+    parser.add_argument("--run-now", action="store_true", help="Run every job once at startup")
+    parser.add_argument("--once", action="store_true", help="Run every job once and exit")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.jobs):
+        print(f"Error: Jobs file {args.jobs} not found.")
+        return
+
+    scheduler = Scheduler.from_file(args.jobs, args.workers)
+    if args.once:
+        scheduler.run_all()
+        scheduler.stop()
+        for name, status in scheduler.status().items():
+            print(f"{name}: {status['last_records']} records, {status['last_error'] or 'ok'}")
+        return
+
+    if args.status_port is not None:
+        port = scheduler.serve_status(args.status_port)
+        print(f"Job status at http://127.0.0.1:{port}/status")
+    # Shut down on SIGTERM the same way as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    if args.run_now:
+        for name in scheduler.jobs:
+            scheduler.submit(name)
+    print(f"BitScrapper daemon started with {len(scheduler.jobs)} jobs and {scheduler.workers} workers.")
+    try:
+        scheduler.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
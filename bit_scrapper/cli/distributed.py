@@ -0,0 +1,102 @@
+import argparse
+import os
+# Scrapers and the queue backends are imported once the arguments are known, as in cli.main
+from bit_scrapper.utils.writer import STREAM_WRITERS, open_writer
+
+def _crawl_config(config: dict, args) -> dict:
+    crawl_config = dict(config.get("crawl", {}))
+    if args.depth is not None:
+        crawl_config["max_depth"] = args.depth
+    if args.follow:
+        crawl_config["follow"] = args.follow
+    if args.concurrency:
+        crawl_config["concurrency"] = args.concurrency
+    return crawl_config
+
+def worker(args, config: dict) -> None:
+    from bit_scrapper.core.distributed import Worker, open_queue
+    from bit_scrapper.core.scraper import BitScrapper
+    queue = open_queue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    scraper = BitScrapper(config)
+    try:
+        stats = Worker(scraper, queue, _crawl_config(config, args), args.name).run(idle_timeout=args.idle_timeout)
+    finally:
+        scraper.close()
+        queue.close()
+    print(f"Worker done: {stats['completed']} pages, {stats['failed']} failed, {stats['duplicates']} duplicates")
+
+def coordinator(args, config: dict) -> None:
+    from bit_scrapper.core.distributed import Coordinator, open_queue
+    from bit_scrapper.core.frontier import read_seeds
+    from bit_scrapper.core.selectors import compile_selectors
+    queue = open_queue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    coordinator = Coordinator(queue)
+    try:
+        seeded = coordinator.seed(read_seeds(args.input_file) if args.input_file else [args.url])
+        print(f"Queued {seeded} seed URLs on {args.queue}")
+        if args.local_workers:
+            worker_args = ["--config", args.config, "--queue", args.queue, "--visibility-timeout", str(args.visibility_timeout),
+                           "--max-attempts", str(args.max_attempts)]
+            for flag, value in (("--depth", args.depth), ("--follow", args.follow), ("--concurrency", args.concurrency)):
+                if value is not None:
+                    worker_args += [flag, str(value)]
+            coordinator.spawn_workers(args.local_workers, worker_args)
+        stats = coordinator.wait()
+
+        url_field = _crawl_config(config, args).get("url_field")
+        fieldnames = list(config["selectors"])
+        types = compile_selectors(config["selectors"]).column_types()
+        if url_field:
+            fieldnames.append(url_field)
+            types[url_field] = "string"
+        filename = f"{args.output}.{args.format}"
+        # Workers store one record per URL; equal records found at different URLs are dropped here
+        from bit_scrapper.core.dedup import make_deduplicator
+        dedup = make_deduplicator(config.get("dedup"))
+        records = coordinator.iter_results()
+        with open_writer(args.format, filename, fieldnames=fieldnames, types=types) as writer:
+            for record in dedup.filter(records) if dedup is not None else records:
+                writer.write(record)
+        if dedup is not None:
+            dedup.close()
+    finally:
+        queue.close()
+    print(f"Crawl finished: {stats['done']} done, {stats['failed']} failed, {stats['queued'] + stats['leased']} left. "
+          f"Output saved to {filename}")
+
+def main():
+    parser = argparse.ArgumentParser(description="BitScrapper distributed crawl - coordinator and workers sharing one queue")
+    parser.add_argument("role", choices=["coordinator", "worker"], help="Seed the queue and collect results, or work on it")
+    parser.add_argument("--config", type=str, required=True, help="Path to JSON config file")
+    parser.add_argument("--queue", type=str, required=True, help="SQLite queue file, or a redis:// URL")
+    parser.add_argument("--url", type=str, help="Seed URL (coordinator)")
+    parser.add_argument("--input-file", type=str, help="File of seed URLs, one per line ('-' for stdin) (coordinator)")
+    parser.add_argument("--format", type=str, choices=list(STREAM_WRITERS), default="json", help="Output format (coordinator)")
+    parser.add_argument("--output", type=str, default="output", help="Output filename without extension (coordinator)")
+    parser.add_argument("--local-workers", type=int, default=0, help="Worker processes to start on this machine (coordinator)")
+    parser.add_argument("--name", type=str, help="Worker name shown on its leases (worker)")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="Seconds to wait on a drained queue before exiting (worker)")
+    parser.add_argument("--visibility-timeout", type=float, default=60, help="Seconds a leased URL stays hidden from other workers")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Leases per URL before it is marked failed")
+    parser.add_argument("--depth", type=int, help="Follow links up to N levels from the seeds")
+    parser.add_argument("--follow", type=str, help="CSS selector of the links to follow")
+    parser.add_argument("--concurrency", type=int, help="Pages fetched at once by each worker")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.config):
+        print(f"Error: Config file {args.config} not found.")
+        return
+    if args.role == "coordinator" and not (args.url or args.input_file):
+        print("Error: the coordinator needs --url or --input-file.")
+        return
+
+    from bit_scrapper.config.loader import load_config
+    config = load_config(args.config)
+    if args.role == "worker":
+        worker(args, config)
+    else:
+        coordinator(args, config)
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
 import argparse
 import os
-from bit_scrapper.core.scraper import BitScrapper
-from bit_scrapper.config.loader import load_config
-from bit_scrapper.utils.writer import write_csv, write_json
+# Only what building the argument parser needs is imported up front; the scrapers,
+# crawler and config validation are imported on the paths that use them
+from bit_scrapper.utils.writer import STREAM_WRITERS, open_writer
 
 def main():
     parser = argparse.ArgumentParser(description="BitScrapper CLI - Web Scraping Utility")
     parser.add_argument("--config", type=str, required=True, help="Path to JSON config file")
-    parser.add_argument("--url", type=str, required=True, help="Start URL for scraping")
-    parser.add_argument("--format", type=str, choices=["json", "csv"], default="json", help="Output format")
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--url", type=str, help="Start URL for scraping")
+    sources.add_argument("--input-file", type=str, help="File of seed URLs, one per line ('-' for stdin)")
+    parser.add_argument("--format", type=str, choices=list(STREAM_WRITERS), default="json", help="Output format")
     parser.add_argument("--output", type=str, default="output", help="Output filename without extension")
     parser.add_argument("--max-pages", type=int, help="Override max_pages in config")
+    parser.add_argument("--concurrency", type=int, help="Fetch pages concurrently with up to N requests in flight")
+    parser.add_argument("--workers", type=int, help="Extract offset-paginated pages in a pool of N processes")
+    parser.add_argument("--depth", type=int, help="Follow links up to N levels from the seeds")
+    parser.add_argument("--follow", type=str, help="CSS selector of the links to follow")
+    parser.add_argument("--checkpoint", nargs="?", const="", metavar="PATH",
+                        help="Checkpoint the run so it can be resumed (default PATH: the output file with a .checkpoint suffix)")
+    parser.add_argument("--metrics", type=str, help="Write a JSON summary of the run's metrics to this file")
+    parser.add_argument("--prometheus", type=str, help="Write the run's metrics in the Prometheus text format to this file")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its last checkpoint")
+    parser.add_argument("--incremental", action="store_true", help="Write only the records added, changed or deleted since the last run")
+    parser.add_argument("--dedup", nargs="?", const="", metavar="FIELDS",
+                        help="Drop duplicate records, keyed by these comma-separated fields (default: the whole record)")
 
     args = parser.parse_args()
 
@@ -18,19 +32,114 @@ def main():
         print(f"Error: Config file {args.config} not found.")
         return
 
+    from bit_scrapper.config.loader import load_config
     config = load_config(args.config)
     if args.max_pages:
         config["pagination"]["max_pages"] = args.max_pages
-
-    scraper = BitScrapper(config)
-    results = scraper.run(args.url)
+    if args.workers:
+        config["pipeline"] = dict(config.get("pipeline", {}), workers=args.workers)
+    if args.metrics or args.prometheus:
+        config["metrics"] = dict(config.get("metrics", {}), enabled=True)
+        if args.metrics:
+            config["metrics"]["summary"] = args.metrics
+        if args.prometheus:
+            config["metrics"]["prometheus"] = args.prometheus
+    if args.dedup is not None:
+        config["dedup"] = dict(config.get("dedup", {}), enabled=True)
+        if args.dedup:
+            config["dedup"]["fields"] = args.dedup.split(",")
 
     filename = f"{args.output}.{args.format}"
-    if args.format == "json":
-        write_json(results, filename)
+    crawl = args.input_file or args.depth is not None or args.follow or "crawl" in config
+    incremental = args.incremental or "incremental" in config
+    if incremental and (crawl or args.resume):
+        print("Error: --incremental re-scrapes a single listing and cannot crawl or resume.")
+        return
+
+    # Checkpoints are opt-in. Columnar outputs are written in row groups and cannot be resumed
+    # at a byte offset. Incremental runs commit their state only when they finish, so they
+    # are not checkpointed
+    checkpoint = None
+    if args.format in ("parquet", "arrow"):
+        if args.resume:
+            print(f"Error: --resume is not supported for the {args.format} format.")
+            return
+    elif not incremental and (args.checkpoint is not None or args.resume):
+        from bit_scrapper.core.checkpoint import Checkpoint
+        checkpoint = Checkpoint(args.checkpoint or f"{filename}.checkpoint", resume=args.resume)
+    if checkpoint is not None and checkpoint.complete:
+        print(f"Nothing to resume: {filename} is already complete.")
+        return
+    resuming = checkpoint is not None and checkpoint.resumed
+
+    start_url, start_page = args.url, 1
+    if resuming and checkpoint.cursor:
+        start_url, start_page = checkpoint.cursor["url"], checkpoint.cursor["page"]
+
+    if crawl:
+        crawl_config = dict(config.get("crawl", {}))
+        if args.depth is not None:
+            crawl_config["max_depth"] = args.depth
+        if args.follow:
+            crawl_config["follow"] = args.follow
+        if args.concurrency:
+            crawl_config["concurrency"] = args.concurrency
+        from bit_scrapper.core.frontier import Crawler, read_seeds
+        from bit_scrapper.core.scraper import BitScrapper
+        scraper = BitScrapper(config)
+        crawler = Crawler(scraper, crawl_config, checkpoint)
+        crawler.add_seeds(read_seeds(args.input_file) if args.input_file else [args.url])
+        records = crawler.iter_records()
+    elif incremental:
+        from bit_scrapper.core.incremental import ChangeDetector
+        from bit_scrapper.core.scraper import BitScrapper
+        scraper = BitScrapper(config)
+        incremental_config = dict({"index": f"{args.output}.changes.sqlite3"}, **config.get("incremental", {}))
+        detector = ChangeDetector(scraper, incremental_config)
+        records = detector.iter_changes(args.url)
+    elif args.concurrency:
+        from bit_scrapper.core.async_scraper import AsyncBitScrapper
+        scraper = AsyncBitScrapper(config, concurrency=args.concurrency)
+        records = scraper.iter_records(start_url, start_page) if start_url else iter(())
     else:
-        write_csv(results, filename)
+        from bit_scrapper.core.scraper import BitScrapper
+        scraper = BitScrapper(config)
+        records = scraper.iter_records(start_url, start_page) if start_url else iter(())
+
+    fieldnames = list(config["selectors"])
+    types = scraper.plan.column_types()
+    if crawl and crawler.url_field:
+        fieldnames.append(crawler.url_field)
+        types[crawler.url_field] = "string"
+    if incremental:
+        fieldnames = [detector.change_field, detector.url_field] + fieldnames
+        types = dict({detector.change_field: "string", detector.url_field: "string"}, **types)
+    from bit_scrapper.core.dedup import make_deduplicator
+    dedup = make_deduplicator(config.get("dedup"), scraper.metrics)
+    if dedup is not None:
+        records = dedup.filter(records)
+    resume_at = {"offset": checkpoint.offset, "count": checkpoint.count} if resuming else {}
+    try:
+        # Records are written as they are scraped, so memory stays flat on long crawls
+        with open_writer(args.format, filename, fieldnames=fieldnames, types=types, metrics=scraper.metrics,
+                         **resume_at) as writer:
+            if checkpoint is not None:
+                from bit_scrapper.core.checkpoint import write_checkpointed
+                write_checkpointed(records, writer, checkpoint, cursor=lambda: None if crawl else scraper.cursor)
+            else:
+                for record in records:
+                    writer.write(record)
+    finally:
+        if crawl:
+            crawler.close()
+        if incremental:
+            detector.close()
+        if dedup is not None:
+            dedup.close()
+        scraper.close()
 
+    if dedup is not None:
+        print(f"Dropped {dedup.stats['duplicates']} duplicate records.")
     print(f"Scraping completed. Output saved to {filename}")
 
 if __name__ == "__main__":
@@ -1,14 +1,34 @@
 #  Functionality to load and validate the scraper's configuration
+# Config files that already passed validation are remembered by path, mtime and content
+# hash, so unchanged configs of short scheduled runs skip jsonschema entirely
+import functools
+import hashlib
 import json
 import os
-from jsonschema import validate, ValidationError
+
+from bit_scrapper.utils.cache import CACHE_DIR
+
+VALIDATED_CACHE = os.path.join(CACHE_DIR, "configs.json")
 
 CONFIG_SCHEMA = {
     "type": "object",
     "properties": {
         "selectors": {
             "type": "object",
-            "minProperties": 1
+            "minProperties": 1,
+            "additionalProperties": {
+                "type": "object",
+                "properties": {
+                    "type": {"enum": ["css", "xpath", "regex"]},
+                    "value": {"type": "string"},
+                    "attr": {"type": "string"},
+                    "multiple": {"type": "boolean"},
+                    "post": {"type": ["string", "array"], "items": {"type": "string"}},
+                    "flags": {"type": "string"},
+                    "dtype": {"enum": ["string", "int", "float", "bool"]}
+                },
+                "required": ["type", "value"]
+            }
         },
         "pagination": {
             "type": "object",
@@ -23,12 +43,14 @@ CONFIG_SCHEMA = {
     "required": ["selectors", "pagination"]
 }
 
-def load_config(config_path: str) -> dict:
+def load_config(config_path: str, cache_path: str = VALIDATED_CACHE) -> dict:
     """
     Load and return the configuration from a JSON file.
 
     Args:
         config_path (str): Path to the configuration file.
+        cache_path (str): File remembering the configs that passed validation, None to
+            always validate.
     
     Returns:
         dict: Parsed configuration data.
@@ -36,14 +58,84 @@ def load_config(config_path: str) -> dict:
     Raises:
         FileNotFoundError: If the configuration file does not exist.
         json.JSONDecodeError: If the file content is not a valid JSON.
+        ValueError: If the configuration or one of its selectors is invalid.
     """
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Configuration file not found at: {config_path}")
     
-    with open(config_path, 'r', encoding='utf-8') as file:
-        config = json.load(file)
+    with open(config_path, 'rb') as file:
+        content = file.read()
+        mtime = os.fstat(file.fileno()).st_mtime_ns
+    config = json.loads(content)
+    if cache_path is None:
+        return validate_config(config)
+
+    path = os.path.abspath(config_path)
+    entry = {"mtime_ns": mtime, "hash": hashlib.blake2b(content, digest_size=16).hexdigest(), "schema": _schema_hash()}
+    validated = _read_validated(cache_path)
+    if validated.get(path) == entry:
+        return config
+    validate_config(config)
+    validated[path] = entry
+    _write_validated(cache_path, validated)
+    return config
+
+def validate_config(config: dict) -> dict:
+    """
+    Validate a configuration dictionary, e.g. one embedded in a jobs file.
+
+    Args:
+        config (dict): Configuration data.
+
+    Returns:
+        dict: The same configuration.
+
+    Raises:
+        ValueError: If the configuration or one of its selectors is invalid.
+    """
+    from jsonschema.exceptions import best_match
+
+    error = best_match(_validator().iter_errors(config))
+    if error is not None:
+        raise ValueError(f"Invalid config: {error.message}")
+    # Compile the selectors now so a broken rule fails here rather than on every page
+    from bit_scrapper.core.selectors import compile_selectors
+    compile_selectors(config["selectors"])
+    return config
+
+@functools.lru_cache(maxsize=None)
+def _validator():
+    # Built once per process instead of on every validation
+    from jsonschema.validators import validator_for
+
+    return validator_for(CONFIG_SCHEMA)(CONFIG_SCHEMA)
+
+@functools.lru_cache(maxsize=None)
+def _schema_hash() -> str:
+    # A schema change invalidates every remembered config
+    return hashlib.blake2b(json.dumps(CONFIG_SCHEMA, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+# Remembered validations, read from disk once per process
+_validated = {}
+
+def _read_validated(cache_path: str) -> dict:
+    if cache_path not in _validated:
         try:
-            validate(instance=config, schema=CONFIG_SCHEMA)
-        except ValidationError as e:
-            raise ValueError(f"Invalid config: {e.message}")
-    return config
\ No newline at end of file
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                _validated[cache_path] = json.load(file)
+        except (OSError, ValueError):
+            _validated[cache_path] = {}
+    return _validated[cache_path]
+
+def _write_validated(cache_path: str, validated: dict) -> None:
+    # Best effort: a read-only cache directory only means validating on every load
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(validated, file)
+        os.replace(temporary, cache_path)
+    except OSError:
+        pass
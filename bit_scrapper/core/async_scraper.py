@@ -0,0 +1,254 @@
+# Asyncio crawl engine built on top of BitScrapper
+# Fetches are dispatched concurrently under a global and a per-host limit, while each
+# individual fetch still goes through BitScrapper.fetch_url and therefore the Middleware
+# (headers, user-agent rotation, retry-on-status and backoff)
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bit_scrapper.core.scraper import BitScrapper
+
+
+class AsyncBitScrapper(BitScrapper):
+    """
+    Concurrent variant of BitScrapper.
+
+    Args:
+        config (dict): Configuration dictionary object, as for BitScrapper. An optional
+            "concurrency" section may set "max_requests" and "per_host".
+        concurrency (int): Global limit of in-flight requests, overrides the config.
+        per_host (int): Limit of in-flight requests per host, overrides the config.
+    """
+
+    DEFAULT_CONCURRENCY = 8
+    DEFAULT_PER_HOST = 4
+
+    def __init__(self, config: dict, concurrency: int = None, per_host: int = None):
+        super().__init__(config)
+        concurrency_config = config.get("concurrency", {})
+        self.concurrency = concurrency or concurrency_config.get("max_requests", self.DEFAULT_CONCURRENCY)
+        self.per_host = per_host or concurrency_config.get("per_host", self.DEFAULT_PER_HOST)
+        self._executor = None
+        self._global_limit = None
+        self._host_limits = {}
+
+    @property
+    def middleware(self):
+        # Still built on first use; its pools are sized to the per-host limit once built
+        built = self._middleware is not None
+        middleware = super().middleware
+        if not built and middleware.pool_maxsize < self.per_host:
+            middleware.configure_pool(pool_maxsize=self.per_host)
+        return middleware
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def afetch_url(self, url: str) -> str:
+        """
+        Fetch a URL without blocking the event loop.
+
+        Args:
+            url (str): URL to fetch.
+
+        Returns:
+            str: HTML content of the web page, or empty string on failure.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._global_limit:
+            async with self._host_limit(url):
+                return await loop.run_in_executor(self._executor, self.fetch_url, url)
+
+    async def fetch_many(self, urls: list) -> list:
+        """
+        Fetch several URLs concurrently.
+
+        Args:
+            urls (list): URLs to fetch.
+
+        Returns:
+            list: HTML contents, in the same order as `urls`.
+        """
+        return await asyncio.gather(*(self.afetch_url(url) for url in urls))
+
+    async def _start(self, start_url: str) -> None:
+        self.config["start_url"] = start_url
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._global_limit = asyncio.Semaphore(self.concurrency)
+        self._host_limits = {}
+        # Load robots.txt once, before fetches race to initialise it
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._is_allowed, start_url)
+
+    def _stop(self) -> None:
+        # Cancelling a task does not stop the thread running its fetch_url: wait for those
+        # threads, so close() never pulls the session or the cache store from under them
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    async def _aiter_offset_pages(self, start_url: str, start_page: int = 1):
+        # Page URLs are known up front: keep a window of them in flight, yield in page
+        # order and cancel the fetches beyond the end once an empty page is reached
+        window = self.pagination.get("window", self.concurrency)
+        urls = iter(self.page_urls(start_url, start_page))
+        in_flight = deque()
+
+        def refill():
+            while len(in_flight) < window:
+                url = next(urls, None)
+                if url is None:
+                    break
+                in_flight.append(asyncio.ensure_future(self.afetch_url(url)))
+
+        refill()
+        try:
+            while in_flight:
+                html = await in_flight.popleft()
+                if not html: break
+                refill()
+                yield html
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def aiter_pages(self, start_url: str, start_page: int = 1):
+        """
+        Asynchronous counterpart of BitScrapper.iter_pages, fetching pages concurrently.
+
+        Args:
+            start_url (str): URL to scrape.
+            start_page (int): First page to fetch, when resuming.
+
+        Yields:
+            str: HTML content of each page, in page order.
+        """
+        await self._start(start_url)
+        try:
+            async for html in self._aiter_offset_pages(start_url, start_page):
+                yield html
+        finally:
+            self._stop()
+
+    async def aiter_records(self, start_url: str, start_page: int = 1):
+        """
+        Asynchronous counterpart of BitScrapper.iter_records, yielding records in page order.
+
+        With the offset strategy every page URL is known up front, so a window of pages
+        ("pagination.window", default: the concurrency) is kept in flight. The output
+        stops at the first empty page (or record, with "stop_on_empty_record") and the
+        fetches beyond it are cancelled. Link pagination depends on the previous page
+        and is followed one page at a time.
+
+        Args:
+            start_url (str): URL to scrape, or the cursor URL when resuming.
+            start_page (int): Page number of `start_url`, when resuming.
+
+        Yields:
+            dict: Extracted data, one record per page.
+        """
+        await self._start(start_url)
+        page = start_page
+        try:
+            if self.pagination.get("strategy") == "offset":
+                pages = self._aiter_offset_pages(start_url, start_page)
+                try:
+                    async for html in pages:
+                        record = self.extract_data(html)
+                        if self._is_last_page(record): break
+                        self.cursor = {"url": self.get_next_page_url(None, page), "page": page + 1}
+                        page += 1
+                        yield record
+                finally:
+                    await pages.aclose()
+                return
+
+            max_pages = self.pagination.get("max_pages", 1)
+            url = start_url
+            while url and page <= max_pages:
+                html = await self.afetch_url(url)
+                if not html: break
+
+                document = self.parse(html)
+                record = self.extract_data(document)
+                if self._is_last_page(record): break
+                url = self.get_next_page_url(document.soup, page)
+                self.cursor = {"url": url, "page": page + 1}
+                page += 1
+                yield record
+        finally:
+            self._stop()
+
+    async def arun(self, start_url: str) -> list:
+        """
+        Asynchronous counterpart of BitScrapper.run, producing the same result list.
+
+        Args:
+            start_url (str): URL to scrape.
+
+        Returns:
+            list: Extracted data, one entry per page.
+        """
+        return [record async for record in self.aiter_records(start_url)]
+
+    def iter_pages(self, start_url: str, start_page: int = 1):
+        """
+        Drive `aiter_pages` from synchronous code.
+
+        Args:
+            start_url (str): URL to scrape.
+            start_page (int): First page to fetch, when resuming.
+
+        Yields:
+            str: HTML content of each page, in page order.
+        """
+        return _iterate_sync(self.aiter_pages(start_url, start_page))
+
+    def iter_records(self, start_url: str, start_page: int = 1):
+        """
+        Drive `aiter_records` from synchronous code, yielding records as they arrive.
+
+        When an extraction pipeline is configured, pages from `iter_pages` are handed
+        to the process pool instead.
+
+        Args:
+            start_url (str): URL to scrape, or the cursor URL when resuming.
+            start_page (int): Page number of `start_url`, when resuming.
+
+        Yields:
+            dict: Extracted data, one record per page.
+        """
+        if self._uses_pipeline():
+            return super().iter_records(start_url, start_page)
+        return _iterate_sync(self.aiter_records(start_url, start_page))
+
+    def run(self, start_url: str) -> list:
+        """
+        Run the asynchronous engine to completion from synchronous code.
+
+        Args:
+            start_url (str): URL to scrape.
+
+        Returns:
+            list: Extracted data, one entry per page.
+        """
+        if self._uses_pipeline():
+            return self.deduplicate(self.iter_records(start_url))
+        return self.deduplicate(asyncio.run(self.arun(start_url)))
+
+
+def _iterate_sync(async_iterator):
+    # Run an async generator on a private event loop, one item at a time
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.close()
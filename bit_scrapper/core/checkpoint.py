@@ -0,0 +1,115 @@
+# Checkpoints for resumable crawls
+# An append-only JSON Lines log: each line is one commit carrying the URLs completed and
+# queued since the previous commit, the pagination cursor and the output writer's offset.
+# Commits are written right after the writer flushes, so the log never gets ahead of the output
+import json
+import os
+
+
+class Checkpoint:
+    """
+    Append-only crawl checkpoint.
+
+    Args:
+        path (str): Checkpoint log file.
+        resume (bool): Replay an existing log instead of starting a new one.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.done = set()
+        self.queued = []
+        self.cursor = None
+        self.offset = 0
+        self.count = 0
+        self.complete = False
+        self._done = []
+        self._queued = []
+        if resume and os.path.exists(path):
+            self._replay()
+        else:
+            open(path, 'w', encoding='utf-8').close()
+
+    def _replay(self) -> None:
+        end = 0
+        with open(self.path, 'r+b') as file:
+            for line in iter(file.readline, b""):
+                # A torn last line from a crash, cut before its newline: everything
+                # before it is valid
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    commit = json.loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+                self.done.update(commit.get("done", []))
+                self.queued.extend(tuple(item) for item in commit.get("queued", []))
+                self.cursor = commit.get("cursor")
+                self.offset = commit["offset"]
+                self.count = commit["count"]
+                self.complete = commit.get("complete", False)
+            # Cut the torn line off, or the next commit would be appended onto it
+            file.truncate(end)
+
+    @property
+    def resumed(self) -> bool:
+        return self.count > 0 or bool(self.done) or self.cursor is not None
+
+    def mark_done(self, url: str) -> None:
+        self._done.append(url)
+        self.done.add(url)
+
+    def mark_queued(self, url: str, depth: int, page: int = 1) -> None:
+        # The page number is only kept for next-page links, so older logs replay unchanged
+        self._queued.append((url, depth) if page == 1 else (url, depth, page))
+
+    def commit(self, offset: int, count: int, cursor: dict = None, complete: bool = False) -> None:
+        """
+        Append one commit to the log.
+
+        Args:
+            offset (int): Byte offset of the output file after its last flush.
+            count (int): Number of records in the output.
+            cursor (dict): Pagination cursor ({"url", "page"}) to continue from.
+            complete (bool): Whether the crawl finished.
+        """
+        commit = {"offset": offset, "count": count}
+        if self._done:
+            commit["done"] = self._done
+        if self._queued:
+            commit["queued"] = self._queued
+        if cursor is not None:
+            commit["cursor"] = cursor
+        if complete:
+            commit["complete"] = True
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(commit) + "\n")
+        self._done = []
+        self._queued = []
+        self.offset, self.count, self.cursor, self.complete = offset, count, cursor, complete
+
+
+def write_checkpointed(records, writer, checkpoint: Checkpoint, cursor=None, every: int = 100) -> int:
+    """
+    Write records, committing the checkpoint every `every` records.
+
+    Args:
+        records (iterable): Records to write.
+        writer (StreamWriter): Output writer, opened at the checkpoint's offset when resuming.
+        checkpoint (Checkpoint): Checkpoint to commit to.
+        cursor (callable): Returns the current pagination cursor, if any.
+        every (int): Records between commits.
+
+    Returns:
+        int: Number of records in the output.
+    """
+    cursor = cursor or (lambda: None)
+    for record in records:
+        writer.write(record)
+        if writer.count % every == 0:
+            writer.flush()
+            checkpoint.commit(writer.offset, writer.count, cursor())
+    writer.flush()
+    checkpoint.commit(writer.offset, writer.count, cursor(), complete=True)
+    return writer.count
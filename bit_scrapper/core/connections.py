@@ -0,0 +1,270 @@
+# Connection setup for the pooled HTTP session
+# Host names are resolved through an in-process DNS cache (with a TTL and a hosts
+# override map) instead of the system resolver on every new connection. Each phase of a
+# request (DNS, connect, TLS, time to first byte) is timed into the metrics, and pools
+# can be warmed ahead of the fetches that will use them
+import ipaddress
+import socket
+import ssl
+import sys
+import threading
+import time
+from collections import OrderedDict
+from socket import timeout as SocketTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+from urllib3.util.wait import wait_for_read
+
+from bit_scrapper.utils.metrics import NULL_METRICS
+
+
+class DNSCache:
+    """
+    In-process cache of host name resolutions.
+
+    The system resolver does not report record TTLs, so answers are kept for a fixed
+    `ttl`. Hosts listed in `hosts` are never looked up.
+
+    Args:
+        config (dict): The "dns" section of the config: ttl (seconds an answer is kept,
+            default 300, 0 disables caching), hosts ({host: address or [addresses]})
+            and max_hosts (LRU size, default 4096).
+        metrics (Metrics): Receives dns_lookups_total by result (hit, miss, override).
+    """
+
+    def __init__(self, config: dict = None, metrics=None):
+        config = config or {}
+        self.ttl = config.get("ttl", 300)
+        self.max_hosts = config.get("max_hosts", 4096)
+        self.hosts = {host.lower(): [addresses] if isinstance(addresses, str) else list(addresses)
+                      for host, addresses in config.get("hosts", {}).items()}
+        self.metrics = metrics or NULL_METRICS
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._resolving = {}
+
+    def resolve(self, host: str) -> list:
+        """
+        Addresses of `host`, from the hosts map, the cache or the system resolver.
+
+        Concurrent lookups of the same host share a single resolver call.
+
+        Returns:
+            list: IP addresses, in resolver order.
+
+        Raises:
+            socket.gaierror: If the name does not resolve.
+        """
+        host = host.strip("[]").rstrip(".").lower()
+        if _is_address(host):
+            return [host]
+        if host in self.hosts:
+            self.metrics.inc("dns_lookups_total", result="override")
+            return self.hosts[host]
+        addresses = self._cached(host)
+        if addresses is not None:
+            return addresses
+        with self._lock:
+            lock = self._resolving.setdefault(host, threading.Lock())
+        with lock:
+            # Another thread may have resolved it while this one waited
+            addresses = self._cached(host)
+            if addresses is not None:
+                return addresses
+            try:
+                addresses = self._lookup(host)
+            finally:
+                with self._lock:
+                    self._resolving.pop(host, None)
+        self.metrics.inc("dns_lookups_total", result="miss")
+        if self.ttl > 0:
+            with self._lock:
+                self.entries[host] = (time.monotonic() + self.ttl, addresses)
+                self.entries.move_to_end(host)
+                while len(self.entries) > self.max_hosts:
+                    self.entries.popitem(last=False)
+        return addresses
+
+    def _cached(self, host: str) -> list | None:
+        with self._lock:
+            entry = self.entries.get(host)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[host]
+                return None
+            self.entries.move_to_end(host)
+        self.metrics.inc("dns_lookups_total", result="hit")
+        return entry[1]
+
+    @staticmethod
+    def _lookup(host: str) -> list:
+        addresses = []
+        for *_, address in socket.getaddrinfo(host, None, connection.allowed_gai_family(), socket.SOCK_STREAM):
+            if address[0] not in addresses:
+                addresses.append(address[0])
+        return addresses
+
+
+def _is_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class _TimedConnection:
+    """
+    Resolves through a DNSCache and times DNS, connect and time to first byte.
+    """
+
+    def __init__(self, *args, resolver: DNSCache = None, metrics=None, **kwargs):
+        self.resolver = resolver or DNSCache({"ttl": 0})
+        self.metrics = metrics or NULL_METRICS
+        self.socket_seconds = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        started = time.perf_counter()
+        try:
+            addresses = self.resolver.resolve(self._dns_host)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        self.metrics.observe("dns_seconds", resolved - started)
+        error = None
+        # Every address is tried in turn, as create_connection does with getaddrinfo
+        for address in addresses:
+            try:
+                sock = connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+                break
+            except SocketTimeout:
+                error = ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})")
+            except OSError as e:
+                error = NewConnectionError(self, f"Failed to establish a new connection: {e}")
+        else:
+            raise error or NewConnectionError(self, f"No addresses for {self.host}")
+        connected = time.perf_counter()
+        self.metrics.observe("connect_seconds", connected - resolved)
+        self.socket_seconds = connected - started
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+    def getresponse(self, *args, **kwargs):
+        # The request is sent; this blocks until the status line and headers are read
+        started = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        self.metrics.observe("ttfb_seconds", time.perf_counter() - started)
+        return response
+
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        # What connect spent past the socket is the TLS handshake (and proxy tunnel, if any)
+        self.metrics.observe("tls_seconds", time.perf_counter() - started - self.socket_seconds)
+
+    @property
+    def is_connected(self) -> bool:
+        if self.sock is None:
+            return False
+        if not wait_for_read(self.sock, timeout=0.0):
+            return True
+        # TLS 1.3 servers send session tickets after the handshake, which leaves a
+        # warmed connection that never carried a response readable. Reading processes
+        # them; only a close or unexpected data means the connection is gone
+        timeout = self.sock.gettimeout()
+        self.sock.settimeout(0.0)
+        try:
+            self.sock.recv(1)
+        except ssl.SSLWantReadError:
+            return True
+        except OSError:
+            pass
+        finally:
+            self.sock.settimeout(timeout)
+        return False
+
+
+TIMED_CONNECTIONS = {"http": TimedHTTPConnection, "https": TimedHTTPSConnection}
+
+
+class _TimedPoolManager(PoolManager):
+    def __init__(self, *args, resolver: DNSCache = None, metrics=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolver = resolver
+        self.metrics = metrics
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        # Connections are created lazily, so the pool can still be switched over here
+        pool.ConnectionCls = TIMED_CONNECTIONS[scheme]
+        pool.conn_kw.update(resolver=self.resolver, metrics=self.metrics)
+        return pool
+
+
+class TimedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose pooled connections resolve through a DNSCache and time each phase.
+
+    Args:
+        resolver (DNSCache): Resolves host names for new connections.
+        metrics (Metrics): Receives the dns_seconds, connect_seconds, tls_seconds and
+            ttfb_seconds histograms.
+        **kwargs: HTTPAdapter arguments (pool_connections, pool_maxsize, ...).
+    """
+
+    def __init__(self, resolver: DNSCache = None, metrics=None, **kwargs):
+        self.resolver = resolver or DNSCache()
+        self.metrics = metrics or NULL_METRICS
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TimedPoolManager(num_pools=connections, maxsize=maxsize, block=block,
+                                             resolver=self.resolver, metrics=self.metrics, **pool_kwargs)
+
+    def warm(self, url: str, timeout: float = None, verify=True, cert=None, proxies: dict = None) -> bool:
+        """
+        Resolve the host of `url` and leave an open connection to it in its pool.
+
+        `verify`, `cert` and `proxies` must be the ones the request will be sent with
+        (see `Session.merge_environment_settings`), as they select the pool.
+
+        Returns:
+            bool: True if a connection was opened, False if the pool already had an
+                idle one.
+        """
+        request = requests.Request("GET", url).prepare()
+        pool = self.get_connection_with_tls_context(request, verify, proxies, cert)
+        conn = pool._get_conn()
+        try:
+            if conn.is_connected:
+                return False
+            if timeout is not None:
+                conn.timeout = timeout
+            conn.connect()
+            return True
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            pool._put_conn(conn)
@@ -0,0 +1,159 @@
+# Record deduplication between extraction and the writers
+# Each record is reduced to a 64-bit fingerprint of its key fields (or of the whole
+# record). Fingerprints are kept in an in-memory set up to a memory budget, then spilled
+# to SQLite, so memory stays bounded however many records a crawl produces
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+
+from bit_scrapper.utils.metrics import NULL_METRICS
+
+# Approximate cost of one fingerprint in a Python set: the int object plus its hash slot
+ENTRY_BYTES = 72
+
+
+def record_key(record: dict, fields: list = None) -> int:
+    """
+    64-bit fingerprint of a record, from the given fields or from the whole record.
+
+    Returns:
+        int: Signed 64-bit integer, as stored by SQLite.
+    """
+    value = [record.get(field) for field in fields] if fields else record
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+class FingerprintIndex:
+    """
+    Set of fingerprints that spills to a SQLite table when it outgrows its memory budget.
+
+    Args:
+        memory_mb (float): Memory budget of the in-memory set, in megabytes.
+        path (str): Database the spilled fingerprints go to. A given path is kept, so
+            later runs skip what earlier runs wrote; by default a temporary file is
+            used and removed on close.
+    """
+
+    def __init__(self, memory_mb: float = 64, path: str = None):
+        self.max_entries = max(1, int(memory_mb * 1024 * 1024 / ENTRY_BYTES))
+        self.memory = set()
+        self.temporary = path is None
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="bitscrapper-dedup-", suffix=".sqlite3")
+            os.close(handle)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # A temporary index dies with its run, so it skips the journal and syncing
+        self.connection.execute("PRAGMA journal_mode=OFF" if self.temporary else "PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF" if self.temporary else "PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS fingerprints (key INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self.on_disk = self.connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        self.spills = 0
+
+    def add(self, key: int) -> bool:
+        """
+        Add a fingerprint.
+
+        Returns:
+            bool: True if it had not been seen before.
+        """
+        if key in self.memory:
+            return False
+        if self.on_disk and self.connection.execute("SELECT 1 FROM fingerprints WHERE key = ?", (key,)).fetchone():
+            return False
+        self.memory.add(key)
+        if len(self.memory) >= self.max_entries:
+            self.spill()
+        return True
+
+    def spill(self) -> None:
+        """
+        Move the in-memory fingerprints to disk.
+        """
+        if not self.memory:
+            return
+        self.connection.executemany("INSERT OR IGNORE INTO fingerprints (key) VALUES (?)", ((key,) for key in self.memory))
+        self.connection.commit()
+        self.on_disk += len(self.memory)
+        self.memory.clear()
+        self.spills += 1
+
+    def __len__(self) -> int:
+        return len(self.memory) + self.on_disk
+
+    def close(self) -> None:
+        if not self.temporary:
+            self.spill()
+        self.connection.close()
+        if self.temporary:
+            os.remove(self.path)
+
+
+class Deduplicator:
+    """
+    Drops records whose key was already seen in this run (or, with a path, in earlier ones).
+
+    Args:
+        config (dict): The "dedup" section of the config: fields (key fields, default
+            the whole record), memory_mb (in-memory budget, default 64) and path (keep
+            the spilled fingerprints in this file).
+        metrics (Metrics): Receives the records_deduplicated_total counter.
+    """
+
+    def __init__(self, config: dict = None, metrics=None):
+        config = config or {}
+        self.fields = config.get("fields")
+        self.metrics = metrics or NULL_METRICS
+        self.index = FingerprintIndex(config.get("memory_mb", 64), config.get("path"))
+        self.stats = {"unique": 0, "duplicates": 0}
+
+    def seen(self, record: dict) -> bool:
+        """
+        Record `record`'s key.
+
+        Returns:
+            bool: True if an equal record was seen before.
+        """
+        if self.index.add(record_key(record, self.fields)):
+            self.stats["unique"] += 1
+            return False
+        self.stats["duplicates"] += 1
+        self.metrics.inc("records_deduplicated_total")
+        return True
+
+    def filter(self, records):
+        """
+        Yields:
+            dict: Every record of `records` whose key is new.
+        """
+        for record in records:
+            if not self.seen(record):
+                yield record
+
+    def close(self) -> None:
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def make_deduplicator(config: dict = None, metrics=None) -> Deduplicator | None:
+    """
+    Build the dedup stage for a "dedup" config section.
+
+    Returns:
+        Deduplicator | None: None when the section is missing or {"enabled": false}.
+    """
+    if config is None or not config.get("enabled", True):
+        return None
+    return Deduplicator(config, metrics)
@@ -0,0 +1,547 @@
+# Distributed crawling over a shared work queue
+# A coordinator seeds the queue, and workers on one or many machines lease URLs from it,
+# scrape them and report back each page's record and newly found links. Leases expire
+# after a visibility timeout, so the URLs of a crashed worker go back to the queue, and
+# completions are idempotent, so every URL's record is stored once however often it ran
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from bit_scrapper.core.frontier import Crawler, normalize_url
+from bit_scrapper.utils.logger import setup_logger
+
+STATES = ("queued", "leased", "done", "failed")
+
+
+class Lease:
+    """
+    A URL handed to one worker until its visibility timeout.
+    """
+
+    __slots__ = ("url", "depth", "token", "attempts", "page")
+
+    def __init__(self, url: str, depth: int, token: str, attempts: int, page: int = 1):
+        self.url = url
+        self.depth = depth
+        self.token = token
+        self.attempts = attempts
+        self.page = page
+
+
+class WorkQueue:
+    """
+    Interface of the shared frontier and result sink.
+
+    URLs are deduplicated by their normalized form. A lease hides a URL from other
+    workers for `visibility_timeout` seconds; a URL leased `max_attempts` times without
+    completing is marked failed.
+
+    Args:
+        visibility_timeout (float): Seconds a lease lasts.
+        max_attempts (int): Leases per URL before it is given up.
+    """
+
+    def __init__(self, visibility_timeout: float = 60, max_attempts: int = 3):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+
+    def push(self, urls) -> int:
+        """
+        Queue (url, depth) or (url, depth, page) tuples that were never queued before.
+        `page` is the URL's position in its chain of next-page links, 1 by default.
+
+        Returns:
+            int: Number of new URLs queued.
+        """
+        raise NotImplementedError
+
+    def lease(self, worker: str, count: int = 1) -> list:
+        """
+        Lease up to `count` URLs, queued ones and ones whose lease expired.
+
+        Returns:
+            list: Lease objects, empty when nothing is available right now.
+        """
+        raise NotImplementedError
+
+    def complete(self, lease: Lease, record: dict | None, links=()) -> bool:
+        """
+        Store a URL's record and queue the links found on it, atomically.
+
+        Completing a URL twice (e.g. after its lease expired and another worker also
+        finished it) stores nothing the second time.
+
+        Returns:
+            bool: False if the URL was already complete.
+        """
+        raise NotImplementedError
+
+    def fail(self, lease: Lease) -> bool:
+        """
+        Give a lease back: the URL is queued again, or marked failed after max_attempts.
+
+        Returns:
+            bool: False if the lease had expired and moved on.
+        """
+        raise NotImplementedError
+
+    def pending(self) -> int:
+        """
+        Number of URLs queued or leased.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """
+        Number of URLs in each state.
+        """
+        raise NotImplementedError
+
+    def results(self):
+        """
+        Yields:
+            dict: Every stored record, in completion order.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteQueue(WorkQueue):
+    """
+    Work queue in one SQLite database, shared by processes on one machine (or on a
+    filesystem with working locks). Every operation is a short IMMEDIATE transaction.
+
+    Args:
+        path (str): Database file, created if missing.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float = 60, max_attempts: int = 3):
+        super().__init__(visibility_timeout, max_attempts)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Transactions are managed explicitly, so writers take the lock up front
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, url TEXT NOT NULL, depth INTEGER NOT NULL, "
+            "state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, token TEXT, worker TEXT, expires REAL, "
+            "page INTEGER NOT NULL DEFAULT 1)"
+        )
+        # Queues created before next-page chains were counted
+        if "page" not in {row[1] for row in self.connection.execute("PRAGMA table_info(urls)")}:
+            self.connection.execute("ALTER TABLE urls ADD COLUMN page INTEGER NOT NULL DEFAULT 1")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS urls_state ON urls (state, id)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, record TEXT NOT NULL)"
+        )
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+    def _insert(self, urls) -> int:
+        cursor = self.connection.executemany(
+            "INSERT OR IGNORE INTO urls (key, url, depth, page, state) VALUES (?, ?, ?, ?, 'queued')",
+            [(normalize_url(url), url, depth, page[0] if page else 1) for url, depth, *page in urls],
+        )
+        return cursor.rowcount
+
+    def push(self, urls) -> int:
+        with self._transaction():
+            return self._insert(urls)
+
+    def lease(self, worker: str, count: int = 1) -> list:
+        now = time.time()
+        leases = []
+        with self._transaction():
+            # URLs whose lease ran out after their last attempt are given up
+            self.connection.execute(
+                "UPDATE urls SET state = 'failed', token = NULL WHERE state = 'leased' AND expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            rows = self.connection.execute(
+                "SELECT id, url, depth, page, attempts FROM urls WHERE state = 'queued' "
+                "OR (state = 'leased' AND expires < ?) ORDER BY id LIMIT ?",
+                (now, count),
+            ).fetchall()
+            for row_id, url, depth, page, attempts in rows:
+                token = uuid.uuid4().hex
+                self.connection.execute(
+                    "UPDATE urls SET state = 'leased', token = ?, worker = ?, expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (token, worker, now + self.visibility_timeout, row_id),
+                )
+                leases.append(Lease(url, depth, token, attempts + 1, page))
+        return leases
+
+    def complete(self, lease: Lease, record: dict | None, links=()) -> bool:
+        key = normalize_url(lease.url)
+        with self._transaction():
+            updated = self.connection.execute(
+                "UPDATE urls SET state = 'done', token = NULL, expires = NULL WHERE key = ? AND state != 'done'", (key,)
+            ).rowcount
+            if not updated:
+                return False
+            if record is not None:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO results (key, record) VALUES (?, ?)",
+                    (key, json.dumps(record, ensure_ascii=False, default=str)),
+                )
+            self._insert(links)
+        return True
+
+    def fail(self, lease: Lease) -> bool:
+        with self._transaction():
+            return self.connection.execute(
+                "UPDATE urls SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, token = NULL, expires = NULL "
+                "WHERE key = ? AND state = 'leased' AND token = ?",
+                (self.max_attempts, normalize_url(lease.url), lease.token),
+            ).rowcount == 1
+
+    def pending(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM urls WHERE state IN ('queued', 'leased')").fetchone()[0]
+
+    def stats(self) -> dict:
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.connection.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+        return counts
+
+    def results(self):
+        last = 0
+        while True:
+            rows = self.connection.execute(
+                "SELECT id, record FROM results WHERE id > ? ORDER BY id LIMIT 1000", (last,)
+            ).fetchall()
+            if not rows:
+                return
+            for last, record in rows:
+                yield json.loads(record)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class _Transaction:
+    __slots__ = ("connection",)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+
+class RedisQueue(WorkQueue):
+    """
+    Work queue in Redis, for workers on several machines.
+
+    Keys are prefixed with `name`: a set of seen URL keys, a sorted set of the URLs not
+    yet done scored by when they can next be leased (queued URLs by when they were
+    queued, leased ones by their expiry), and the done and failed sets. An expired lease
+    is simply leasable again, so no step ever holds a URL outside the sorted set.
+
+    Each operation is one WATCH/MULTI/EXEC transaction: its reads are retried if another
+    client changes the watched keys, and its writes apply all together or not at all, so
+    a worker dying mid-operation loses nothing. Completion is decided against the done
+    set inside the transaction, so exactly one completion of a URL stores its record.
+
+    Args:
+        client: A redis.Redis client, or any client with the same commands.
+        name (str): Key prefix, one per crawl.
+    """
+
+    def __init__(self, client, name: str = "bitscrapper", visibility_timeout: float = 60, max_attempts: int = 3):
+        super().__init__(visibility_timeout, max_attempts)
+        self.client = client
+        self.name = name
+
+    @classmethod
+    def from_url(cls, url: str, **options) -> "RedisQueue":
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(f"{cls.__name__} requires redis to be installed")
+        name = options.pop("name", "bitscrapper")
+        return cls(redis.Redis.from_url(url), name, **options)
+
+    def _key(self, suffix: str) -> str:
+        return f"{self.name}:{suffix}"
+
+    def _transaction(self, func, *keys: str):
+        # func reads through the pipeline, calls multi() and queues its writes; redis-py
+        # runs EXEC and calls func again whenever a watched key changed in between
+        return self.client.transaction(func, *(self._key(key) for key in keys), value_from_callable=True)
+
+    @staticmethod
+    def _unique(urls) -> dict:
+        items = {}
+        for url, depth, *page in urls:
+            items.setdefault(normalize_url(url), (url, depth, page[0] if page else 1))
+        return items
+
+    def _unseen(self, pipe, items: dict) -> list:
+        return [key for key in items if not pipe.sismember(self._key("seen"), key)]
+
+    def _queue(self, pipe, items: dict, keys: list, now: float) -> None:
+        for key in keys:
+            pipe.sadd(self._key("seen"), key)
+            pipe.hset(self._key("items"), key, json.dumps(list(items[key])))
+            pipe.zadd(self._key("ready"), {key: now})
+
+    def push(self, urls) -> int:
+        items = self._unique(urls)
+        if not items:
+            return 0
+
+        def queue(pipe):
+            keys = self._unseen(pipe, items)
+            pipe.multi()
+            self._queue(pipe, items, keys, time.time())
+            return len(keys)
+        return self._transaction(queue, "seen")
+
+    def lease(self, worker: str, count: int = 1) -> list:
+        def claim(pipe):
+            now = time.time()
+            keys = pipe.zrangebyscore(self._key("ready"), "-inf", now, start=0, num=count)
+            claimed = [(key, int(pipe.hget(self._key("attempts"), key) or 0), pipe.hget(self._key("items"), key))
+                       for key in keys]
+            pipe.multi()
+            leases = []
+            for key, attempts, item in claimed:
+                # Only an expired lease can be leasable after max_attempts
+                if attempts >= self.max_attempts:
+                    pipe.zrem(self._key("ready"), key)
+                    pipe.sadd(self._key("failed"), key)
+                    continue
+                token = uuid.uuid4().hex
+                pipe.zadd(self._key("ready"), {key: now + self.visibility_timeout})
+                pipe.hset(self._key("tokens"), key, token)
+                pipe.hincrby(self._key("attempts"), key, 1)
+                url, depth, *page = json.loads(item)
+                leases.append(Lease(url, depth, token, attempts + 1, page[0] if page else 1))
+            return leases
+        return self._transaction(claim, "ready")
+
+    def complete(self, lease: Lease, record: dict | None, links=()) -> bool:
+        key = normalize_url(lease.url)
+        items = self._unique(links)
+
+        def finish(pipe):
+            if pipe.sismember(self._key("done"), key):
+                pipe.multi()
+                return False
+            keys = self._unseen(pipe, items)
+            pipe.multi()
+            pipe.sadd(self._key("done"), key)
+            pipe.zrem(self._key("ready"), key)
+            pipe.hdel(self._key("tokens"), key)
+            pipe.srem(self._key("failed"), key)
+            if record is not None:
+                pipe.rpush(self._key("results"), json.dumps(record, ensure_ascii=False, default=str))
+            self._queue(pipe, items, keys, time.time())
+            return True
+        return self._transaction(finish, "done", "seen")
+
+    def fail(self, lease: Lease) -> bool:
+        key = normalize_url(lease.url)
+
+        def give_back(pipe):
+            owned = _text(pipe.hget(self._key("tokens"), key)) == lease.token
+            leased = pipe.zscore(self._key("ready"), key) is not None
+            pipe.multi()
+            if not (owned and leased):
+                return False
+            pipe.hdel(self._key("tokens"), key)
+            if lease.attempts >= self.max_attempts:
+                pipe.zrem(self._key("ready"), key)
+                pipe.sadd(self._key("failed"), key)
+            else:
+                pipe.zadd(self._key("ready"), {key: time.time()})
+            return True
+        return self._transaction(give_back, "tokens", "ready")
+
+    def pending(self) -> int:
+        return self.client.zcard(self._key("ready"))
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "queued": self.client.zcount(self._key("ready"), "-inf", now),
+            "leased": self.client.zcount(self._key("ready"), f"({now}", "+inf"),
+            "done": self.client.scard(self._key("done")),
+            "failed": self.client.scard(self._key("failed")),
+        }
+
+    def results(self):
+        start = 0
+        while True:
+            batch = self.client.lrange(self._key("results"), start, start + 999)
+            if not batch:
+                return
+            for record in batch:
+                yield json.loads(record)
+            start += len(batch)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def _text(value) -> str | None:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def open_queue(spec: str, **options) -> WorkQueue:
+    """
+    Open the queue named by `spec`: a redis:// URL or the path of a SQLite database.
+
+    Args:
+        spec (str): Queue location.
+        **options: visibility_timeout, max_attempts (and name, for Redis).
+    """
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisQueue.from_url(spec, **options)
+    options.pop("name", None)
+    return SQLiteQueue(spec, **options)
+
+
+class Worker:
+    """
+    Leases URLs from a shared queue, scrapes them and reports each page's record and links.
+
+    Args:
+        scraper (BitScrapper): Scraper used to fetch, parse and extract each page.
+        queue (WorkQueue): The shared queue.
+        config (dict): The "crawl" section of the config (max_depth, follow, same_host,
+            concurrency, url_field), as for the single-process Crawler.
+        name (str): Worker name recorded on its leases, defaults to host and pid.
+    """
+
+    def __init__(self, scraper, queue: WorkQueue, config: dict = None, name: str = None):
+        config = dict(config or {}, index=None)
+        self.scraper = scraper
+        self.queue = queue
+        # Only its link extraction is used; the frontier lives in the queue
+        self.crawler = Crawler(scraper, config)
+        self.concurrency = self.crawler.concurrency
+        self.url_field = self.crawler.url_field
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.logger = setup_logger()
+        self.stats = {"completed": 0, "duplicates": 0, "failed": 0}
+
+    def process(self, lease: Lease, html: str) -> None:
+        if not html:
+            self.stats["failed"] += 1
+            self.queue.fail(lease)
+            return
+        try:
+            document = self.scraper.parse(html)
+            record = self.scraper.extract_data(document)
+            if self.url_field:
+                record[self.url_field] = lease.url
+            links = self.crawler.links(lease.url, document, lease.depth, lease.page)
+        except Exception as e:
+            self.logger.error(f"Worker {self.name} failed on {lease.url}: {e}")
+            self.stats["failed"] += 1
+            self.queue.fail(lease)
+            return
+        if self.queue.complete(lease, record, links):
+            self.stats["completed"] += 1
+        else:
+            self.stats["duplicates"] += 1
+
+    def run(self, idle_timeout: float = 0, poll: float = 0.2) -> dict:
+        """
+        Work until the queue is drained (nothing queued or leased) for `idle_timeout` seconds.
+
+        While other workers hold leases, this one waits for them to complete (and queue
+        links) or to expire.
+
+        Returns:
+            dict: Completed, duplicate and failed counts.
+        """
+        idle_since = None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                leases = self.queue.lease(self.name, self.concurrency)
+                if not leases:
+                    if self.queue.pending() == 0:
+                        idle_since = idle_since or time.monotonic()
+                        if time.monotonic() - idle_since >= idle_timeout:
+                            return self.stats
+                    time.sleep(poll)
+                    continue
+                idle_since = None
+                pages = executor.map(self.scraper.fetch_url, [lease.url for lease in leases])
+                for lease, html in zip(leases, pages):
+                    self.process(lease, html)
+
+
+class Coordinator:
+    """
+    Seeds a shared queue, optionally runs local worker processes on it, and waits for
+    the crawl to finish.
+
+    Args:
+        queue (WorkQueue): The shared queue.
+    """
+
+    def __init__(self, queue: WorkQueue):
+        self.queue = queue
+        self.workers = []
+
+    def seed(self, urls) -> int:
+        """
+        Queue seed URLs at depth 0.
+
+        Returns:
+            int: Number of new URLs queued.
+        """
+        return self.queue.push((url, 0) for url in urls)
+
+    def spawn_workers(self, count: int, args: list) -> list:
+        """
+        Start `count` worker processes on this machine.
+
+        Args:
+            count (int): Number of processes.
+            args (list): Arguments of `python -m bit_scrapper.cli.distributed worker`.
+
+        Returns:
+            list: The subprocess.Popen objects.
+        """
+        for n in range(count):
+            command = [sys.executable, "-m", "bit_scrapper.cli.distributed", "worker", *args, "--name", f"local-{n}"]
+            self.workers.append(subprocess.Popen(command))
+        return self.workers
+
+    def wait(self, poll: float = 0.5) -> dict:
+        """
+        Wait until no URL is queued or leased, or until every local worker has exited.
+
+        Returns:
+            dict: Number of URLs in each state.
+        """
+        while self.queue.pending():
+            if self.workers and all(worker.poll() is not None for worker in self.workers):
+                break
+            time.sleep(poll)
+        for worker in self.workers:
+            worker.wait()
+        return self.queue.stats()
+
+    def iter_results(self):
+        return self.queue.results()
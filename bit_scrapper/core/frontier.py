@@ -0,0 +1,320 @@
+# Crawl frontier: many seed URLs, link following and URL deduplication around BitScrapper
+# Seen URLs are kept as 64-bit hashes of their normalized form, and pending URLs are
+# scheduled round-robin across hosts, highest host priority first
+import hashlib
+import heapq
+import itertools
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+import soupsieve
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings deduplicate to the same key.
+
+    Lowercases the scheme and host, drops default ports and the fragment, sorts the
+    query parameters and defaults the path to "/".
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, parsed.path or "/", parsed.params, query, ""))
+
+
+class URLIndex:
+    """
+    Set of seen URLs, stored as 64-bit hashes of their normalized form.
+
+    Args:
+        path (str): File the index is loaded from and saved to, None to keep it in memory.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.seen = set()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                data = file.read()
+            self.seen.update(int.from_bytes(data[i:i + 8], "big") for i in range(0, len(data) - 7, 8))
+
+    @staticmethod
+    def _hash(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest(), "big")
+
+    def add(self, url: str) -> bool:
+        """
+        Add a URL to the index.
+
+        Returns:
+            bool: True if the URL had not been seen before.
+        """
+        key = self._hash(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return self._hash(url) in self.seen
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(b"".join(key.to_bytes(8, "big") for key in self.seen))
+        os.replace(temporary, self.path)
+
+
+class Frontier:
+    """
+    Pending URLs, deduplicated and scheduled by host priority.
+
+    Hosts with a higher priority are served first; hosts of equal priority take turns,
+    one URL at a time.
+
+    Args:
+        index (URLIndex): Index of seen URLs.
+        host_priority (dict): Priority by host name, default 0.
+    """
+
+    def __init__(self, index: URLIndex = None, host_priority: dict = None):
+        self.index = index if index is not None else URLIndex()
+        self.host_priority = host_priority or {}
+        self.queues = {}
+        self.schedule = []
+        self.counter = itertools.count()
+        self.size = 0
+
+    def push(self, url: str, depth: int = 0, page: int = 1) -> bool:
+        """
+        Queue a URL unless it was seen before.
+
+        Args:
+            url (str): URL to queue.
+            depth (int): Link depth from the seeds.
+            page (int): Position of the URL in its chain of next-page links.
+
+        Returns:
+            bool: True if the URL was queued.
+        """
+        if not self.index.add(url):
+            return False
+        self._enqueue(url, depth, page)
+        return True
+
+    def restore(self, url: str, depth: int = 0, page: int = 1) -> None:
+        """
+        Queue a URL from a checkpoint, even if the index has already seen it.
+        """
+        self.index.add(url)
+        self._enqueue(url, depth, page)
+
+    def _enqueue(self, url: str, depth: int, page: int) -> None:
+        host = urlparse(url).netloc.lower()
+        if host not in self.queues:
+            self.queues[host] = deque()
+        if not self.queues[host]:
+            heapq.heappush(self.schedule, (-self.host_priority.get(host, 0), next(self.counter), host))
+        self.queues[host].append((url, depth, page))
+        self.size += 1
+
+    def pop(self) -> tuple | None:
+        """
+        Take the next URL to fetch.
+
+        Returns:
+            tuple | None: (url, depth, page), or None when the frontier is empty.
+        """
+        if not self.schedule:
+            return None
+        priority, _, host = heapq.heappop(self.schedule)
+        queue = self.queues[host]
+        item = queue.popleft()
+        if queue:
+            heapq.heappush(self.schedule, (priority, next(self.counter), host))
+        self.size -= 1
+        return item
+
+    def peek(self, hosts: int) -> list:
+        """
+        The URLs that `pop` will return next, one per host, for up to `hosts` hosts.
+        """
+        return [self.queues[host][0][0] for _, _, host in heapq.nsmallest(hosts, self.schedule)]
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def read_seeds(path: str):
+    """
+    Read seed URLs from a file, or from stdin when `path` is "-".
+
+    Blank lines and lines starting with "#" are skipped; for CSV input the first column
+    is used.
+    """
+    file = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    try:
+        for line in file:
+            url = line.split(",")[0].strip()
+            if url and not url.startswith("#"):
+                yield url
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+class Crawler:
+    """
+    Crawls many seed URLs with a BitScrapper, following links up to a depth limit.
+
+    Args:
+        scraper (BitScrapper): Scraper used to fetch, parse and extract each page.
+        config (dict): The "crawl" section of the config: max_depth (default 0, seeds
+            only), follow (CSS selector of links to follow), same_host (only follow links
+            on the page's host, default true), host_priority ({host: priority}),
+            concurrency (pages fetched at once), prewarm (number of upcoming hosts to
+            resolve and connect to while a batch is fetched, default 0), url_field
+            (record field for the page URL) and index (path the seen-URL index persists to).
+        checkpoint (Checkpoint): Records queued and completed URLs. When it was
+            resumed, its completed URLs are skipped and its pending URLs re-queued.
+    """
+
+    def __init__(self, scraper, config: dict = None, checkpoint=None):
+        config = config or {}
+        self.scraper = scraper
+        self.max_depth = config.get("max_depth", 0)
+        follow = config.get("follow")
+        self.follow = soupsieve.compile(follow) if follow else None
+        self.same_host = config.get("same_host", True)
+        self.concurrency = config.get("concurrency", 1)
+        self.prewarm = config.get("prewarm", 0)
+        self.url_field = config.get("url_field")
+        self.index = URLIndex(config.get("index"))
+        self.frontier = Frontier(self.index, config.get("host_priority"))
+        # Link pagination continues at the same depth, like a single `run` chain, and
+        # stops after max_pages pages of each chain
+        self.follow_next_page = scraper.pagination.get("strategy") == "link"
+        self.max_pages = scraper.pagination.get("max_pages", 1)
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            for url in checkpoint.done:
+                self.index.add(url)
+            for url, depth, *page in checkpoint.queued:
+                if url not in checkpoint.done:
+                    self.frontier.restore(url, depth, *page)
+
+    def _push(self, url: str, depth: int, page: int = 1) -> bool:
+        if not self.frontier.push(url, depth, page):
+            return False
+        if self.checkpoint is not None:
+            self.checkpoint.mark_queued(url, depth, page)
+        return True
+
+    def add_seeds(self, urls) -> int:
+        """
+        Queue seed URLs at depth 0.
+
+        Returns:
+            int: Number of new URLs queued.
+        """
+        return sum(1 for url in urls if self._push(url, 0))
+
+    def _links(self, url: str, document, depth: int, page: int):
+        if depth < self.max_depth and self.follow is not None:
+            for element in self.follow.select(document.soup):
+                yield element.get("href"), depth + 1, 1
+        if self.follow_next_page and self.scraper.next_selector is not None and page < self.max_pages:
+            element = self.scraper.next_selector.select_one(document.soup)
+            if element is not None:
+                yield element.get("href"), depth, page + 1
+
+    def links(self, url: str, document, depth: int, page: int = 1) -> list:
+        """
+        The links of a fetched page to crawl next.
+
+        Args:
+            url (str): URL of the page.
+            document (Document): The parsed page.
+            depth (int): Link depth of the page.
+            page (int): Position of the page in its chain of next-page links.
+
+        Returns:
+            list: (absolute url, depth, page) of every followed link and of the next
+                page, unless the chain already has max_pages pages.
+        """
+        host = urlparse(url).netloc
+        links = []
+        for href, link_depth, link_page in self._links(url, document, depth, page):
+            if not href:
+                continue
+            link = urljoin(url, href)
+            parsed = urlparse(link)
+            if parsed.scheme not in ("http", "https"):
+                continue
+            if self.same_host and parsed.netloc != host:
+                continue
+            links.append((link, link_depth, link_page))
+        return links
+
+    def _queue_links(self, url: str, document, depth: int, page: int) -> None:
+        for link, link_depth, link_page in self.links(url, document, depth, page):
+            self._push(link, link_depth, link_page)
+
+    def iter_records(self):
+        """
+        Crawl until the frontier is empty.
+
+        Yields:
+            dict: One extracted record per fetched page.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while len(self.frontier):
+                batch = [self.frontier.pop() for _ in range(min(self.concurrency, len(self.frontier)))]
+                pages = executor.map(self.scraper.fetch_url, [url for url, _, _ in batch])
+                if self.prewarm:
+                    # Hosts of the next batch get ready while this one is fetched; hosts
+                    # in this batch already have their connection
+                    busy = {urlparse(url).netloc.lower() for url, _, _ in batch}
+                    self.scraper.prewarm([url for url in self.frontier.peek(self.prewarm + len(busy))
+                                          if urlparse(url).netloc.lower() not in busy][:self.prewarm])
+                for (url, depth, page), html in zip(batch, pages):
+                    if not html:
+                        self._mark_done(url)
+                        continue
+                    document = self.scraper.parse(html)
+                    record = self.scraper.extract_data(document)
+                    if self.url_field:
+                        record[self.url_field] = url
+                    self._queue_links(url, document, depth, page)
+                    # Marked before the record is handed out, so a checkpoint committed
+                    # after it is written never re-emits it
+                    self._mark_done(url)
+                    yield record
+
+    def _mark_done(self, url: str) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(url)
+
+    def close(self) -> None:
+        """
+        Persist the seen-URL index.
+        """
+        self.index.save()
@@ -0,0 +1,223 @@
+# Incremental re-scrapes: only new, changed and deleted records are emitted
+# A fingerprint of each page body and of its extracted record is kept per URL. Unchanged
+# bodies (including 304 Not Modified answers served from the response cache) skip parsing
+# and extraction; pages that vanished from the listing are reported as deleted
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+CHANGES = ("added", "changed", "deleted")
+
+
+def fingerprint(text: str) -> bytes:
+    """
+    128-bit fingerprint of a page body or a serialized record.
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def record_fingerprint(record: dict) -> bytes:
+    return fingerprint(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str))
+
+
+class PageState:
+    """
+    What the previous run saw at one URL.
+    """
+
+    __slots__ = ("body_hash", "record_hash", "record", "next_url")
+
+    def __init__(self, body_hash: bytes, record_hash: bytes, record: str, next_url: str | None):
+        self.body_hash = body_hash
+        self.record_hash = record_hash
+        self.record = record
+        self.next_url = next_url
+
+
+class ChangeIndex:
+    """
+    Per-URL fingerprints, kept in SQLite between runs.
+
+    Pages are grouped by scope (the listing's start URL), so one index can serve several
+    listings without one run deleting another's pages. A run's updates are committed
+    together by `sweep` (or `commit`), so an interrupted run leaves the previous state
+    intact.
+
+    Args:
+        path (str): Database file, created if missing.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "scope TEXT NOT NULL, url TEXT NOT NULL, body_hash BLOB NOT NULL, record_hash BLOB NOT NULL, "
+            "record TEXT NOT NULL, next_url TEXT, run INTEGER NOT NULL, PRIMARY KEY (scope, url))"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, scope TEXT, started REAL)")
+        self.connection.commit()
+        self.scope = None
+        self.run = None
+
+    def begin(self, scope: str) -> int:
+        """
+        Start a run over the listing `scope`. Updates left by a run that failed on the
+        same connection are rolled back first, so this run's commit cannot save them.
+
+        Returns:
+            int: The run number.
+        """
+        self.connection.rollback()
+        self.scope = scope
+        self.run = self.connection.execute("INSERT INTO runs (scope, started) VALUES (?, ?)", (scope, time.time())).lastrowid
+        return self.run
+
+    def get(self, url: str) -> PageState | None:
+        row = self.connection.execute(
+            "SELECT body_hash, record_hash, record, next_url FROM pages WHERE scope = ? AND url = ?", (self.scope, url)
+        ).fetchone()
+        return PageState(*row) if row else None
+
+    def seen(self, url: str) -> None:
+        """
+        Mark an unchanged page as present in this run.
+        """
+        self.connection.execute("UPDATE pages SET run = ? WHERE scope = ? AND url = ?", (self.run, self.scope, url))
+
+    def update(self, url: str, body_hash: bytes, record_hash: bytes, record: dict, next_url: str | None) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages (scope, url, body_hash, record_hash, record, next_url, run) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.scope, url, body_hash, record_hash, json.dumps(record, ensure_ascii=False, default=str), next_url, self.run),
+        )
+
+    def commit(self) -> None:
+        """
+        Commit the run's updates without removing anything, for a walk that did not
+        reach the end of the listing.
+        """
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        """
+        Discard the run's uncommitted updates.
+        """
+        self.connection.rollback()
+
+    def sweep(self) -> list:
+        """
+        Remove the pages of this scope that the current run did not see, and commit the run.
+
+        Returns:
+            list: (url, record) of every removed page.
+        """
+        rows = self.connection.execute(
+            "SELECT url, record FROM pages WHERE scope = ? AND run < ? ORDER BY url", (self.scope, self.run)
+        ).fetchall()
+        self.connection.execute("DELETE FROM pages WHERE scope = ? AND run < ?", (self.scope, self.run))
+        self.connection.commit()
+        return [(url, json.loads(record)) for url, record in rows]
+
+    def close(self) -> None:
+        # Uncommitted updates of an unfinished run are rolled back
+        self.connection.close()
+
+
+class ChangeDetector:
+    """
+    Re-scrapes a paginated listing and yields only what changed since the previous run.
+
+    Args:
+        scraper (BitScrapper): Scraper used to fetch, parse and extract each page. Keep
+            its response cache enabled so unchanged pages are revalidated with
+            conditional GETs instead of downloaded.
+        config (dict): The "incremental" section of the config: index (path of the
+            fingerprint database), url_field (default "url") and change_field (default
+            "change"), the delta record fields holding the page URL and the change.
+    """
+
+    def __init__(self, scraper, config: dict = None):
+        config = config or {}
+        self.scraper = scraper
+        self.index = ChangeIndex(config.get("index", os.path.join(scraper.cache.directory, "changes.sqlite3")))
+        self.url_field = config.get("url_field", "url")
+        self.change_field = config.get("change_field", "change")
+        self.stats = {"unchanged": 0, "extracted": 0, "added": 0, "changed": 0, "deleted": 0}
+
+    def _delta(self, change: str, url: str, record: dict) -> dict:
+        self.stats[change] += 1
+        self.scraper.metrics.inc("changes_total", change=change)
+        return dict({self.change_field: change, self.url_field: url}, **record)
+
+    def iter_changes(self, start_url: str):
+        """
+        Walk the listing page by page, like `BitScrapper.iter_records`.
+
+        A page whose body fingerprint matches the previous run is neither parsed nor
+        extracted, and its stored next-page URL is followed. Otherwise the record is
+        extracted and compared by fingerprint. Pages of the previous run that were not
+        reached are reported as deleted once the walk ends. A walk cut short by a failed
+        fetch reports no deletions: the pages past the failure were not seen, not removed.
+
+        Args:
+            start_url (str): URL of the listing's first page.
+
+        Yields:
+            dict: Delta records: the change ("added", "changed" or "deleted"), the page
+                URL and the record fields (the last known ones for deletions).
+        """
+        self.index.begin(start_url)
+        try:
+            yield from self._walk(start_url)
+        except BaseException:
+            # Also on GeneratorExit: a run closed before its end commits nothing
+            self.index.rollback()
+            raise
+
+    def _walk(self, start_url: str):
+        scraper = self.scraper
+        url = start_url
+        page = 1
+        max_pages = scraper.pagination.get("max_pages", 1)
+        scraper.config["start_url"] = start_url
+
+        while url and page <= max_pages:
+            html = scraper.fetch_url(url)
+            if not html:
+                scraper.logger.warning(f"Incremental walk stopped at {url}: fetch failed, deletions are not reported")
+                # The changes emitted so far are kept; the pages past the failure keep their state
+                self.index.commit()
+                return
+
+            body_hash = fingerprint(html)
+            known = self.index.get(url)
+            if known is not None and known.body_hash == body_hash:
+                self.index.seen(url)
+                self.stats["unchanged"] += 1
+                next_url = known.next_url
+            else:
+                document = scraper.parse(html)
+                record = scraper.extract_data(document)
+                self.stats["extracted"] += 1
+                if scraper._is_last_page(record): break
+                next_url = scraper.get_next_page_url(document.soup, page)
+                record_hash = record_fingerprint(record)
+                self.index.update(url, body_hash, record_hash, record, next_url)
+                if known is None:
+                    yield self._delta("added", url, record)
+                elif known.record_hash != record_hash:
+                    yield self._delta("changed", url, record)
+            url = next_url
+            page += 1
+
+        for url, record in self.index.sweep():
+            yield self._delta("deleted", url, record)
+
+    def close(self) -> None:
+        self.index.close()
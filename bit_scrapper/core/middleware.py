@@ -1,17 +1,183 @@
+import asyncio
+import codecs
 import logging
 import random
+import re
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 from typing import Dict
+from urllib.parse import urlparse
 from requests.exceptions import RequestException, Timeout
+from urllib3.util.request import ACCEPT_ENCODING
+
+from bit_scrapper.core.connections import DNSCache, TimedAdapter
+from bit_scrapper.utils.logger import setup_logger
+from bit_scrapper.utils.metrics import NULL_METRICS
+
+# Content types worth parsing; anything else is dropped before its body is read
+DEFAULT_ALLOWED_TYPES = ("text/", "application/xhtml+xml", "application/xml", "application/json")
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    Tokens may go negative: each reservation returns how long its caller has to wait,
+    so the same bucket serves threads (time.sleep) and coroutines (asyncio.sleep).
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (float): Bucket capacity.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+def parse_retry_after(value: str) -> float | None:
+    """
+    Parse a Retry-After header (delay in seconds or HTTP date) into seconds from now.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+    """
+    Per-host request pacing with AIMD rate adaptation.
+
+    Each host gets a token bucket. Congestion signals (429/503 or Retry-After) cut the
+    host's rate multiplicatively and pause it for the Retry-After delay; fast successful
+    responses raise it additively, up to `max_rate`. Without a "throttle" config hosts are
+    unpaced unless they ask for it through robots.txt or Retry-After.
+
+    Args:
+        config (dict): The "throttle" section: rate (requests/s per host), burst,
+            min_rate, max_rate, increase (added per fast success), decrease (factor
+            on congestion) and latency_target (seconds).
+    """
+
+    CONGESTION_STATUS = (429, 503)
+
+    def __init__(self, config: dict = None):
+        self.enabled = config is not None
+        config = config or {}
+        self.rate = config.get("rate", 5.0)
+        self.burst = config.get("burst", self.rate)
+        self.min_rate = config.get("min_rate", 0.1)
+        self.max_rate = config.get("max_rate", 10 * self.rate)
+        self.increase = config.get("increase", 0.5)
+        self.decrease = config.get("decrease", 0.5)
+        self.latency_target = config.get("latency_target", 1.0)
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> dict:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            bucket = TokenBucket(self.rate, self.burst) if self.enabled else None
+            self.hosts[host] = {"bucket": bucket, "max_rate": self.max_rate, "blocked_until": 0.0}
+        return self.hosts[host]
+
+    def limit(self, url: str, max_rate: float) -> None:
+        """
+        Cap the rate of the host of `url`, e.g. from its robots.txt Crawl-delay.
+        """
+        with self._lock:
+            state = self._host(url)
+            state["max_rate"] = min(state["max_rate"], max_rate)
+            if state["bucket"] is None:
+                state["bucket"] = TokenBucket(max_rate, 1)
+            state["bucket"].rate = min(state["bucket"].rate, max_rate)
+            state["bucket"].burst = min(state["bucket"].burst, max(1, max_rate))
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserve a request slot for the host of `url`.
+
+        Returns:
+            float: Seconds the caller must wait before sending the request.
+        """
+        with self._lock:
+            state = self._host(url)
+            wait = max(0.0, state["blocked_until"] - time.monotonic())
+            if state["bucket"] is not None:
+                wait = max(wait, state["bucket"].reserve())
+            return wait
+
+    def acquire(self, url: str) -> None:
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, url: str) -> None:
+        wait = self.reserve(url)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record(self, url: str, status: int | None, latency: float, retry_after: str = None) -> None:
+        """
+        Feed the outcome of a request back into the host's rate.
+
+        Args:
+            url (str): The requested URL.
+            status (int | None): HTTP status, None on network errors.
+            latency (float): Seconds the request took.
+            retry_after (str): The Retry-After header, if any.
+        """
+        delay = parse_retry_after(retry_after)
+        with self._lock:
+            state = self._host(url)
+            bucket = state["bucket"]
+            if delay is not None:
+                state["blocked_until"] = max(state["blocked_until"], time.monotonic() + delay)
+            if not self.enabled or bucket is None:
+                return
+            if status in self.CONGESTION_STATUS or delay is not None:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            elif status is not None and status < 400 and latency < self.latency_target:
+                bucket.rate = min(state["max_rate"], bucket.rate + self.increase)
 
 
 class Middleware:
     """
     Basic request middleware for injecting headers, user-agent, delays, and retry handling.
 
+    Requests go through a pooled `requests.Session`, so connections to the same host are
+    kept alive and reused across pages and retries. New connections resolve their host
+    through a DNSCache, and `prewarm` opens them ahead of the fetches. Call `close()`
+    when done.
+
     Args:
-        config (dict): Configuration object containing headers, user_agents, delays, and retry settings.
+        config (dict): Configuration object containing headers, user_agents, delays, retry,
+            throttle, dns (see DNSCache) and http (pool_connections, pool_maxsize,
+            timeout, compression, max_body_size, read_limit, allowed_types, chunk_size,
+            prewarm_workers) settings.
+        metrics (Metrics): Receives request counts, bytes, retries, request latency and
+            the per-phase connection timings.
     """
 
     DEFAULT_USER_AGENTS = [
@@ -21,15 +187,112 @@ class Middleware:
         "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X)",
     ]
 
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict, metrics=None) -> None:
         self.config = config
+        self.metrics = metrics or NULL_METRICS
         self.headers = config.get("headers", {})
         self.user_agents = config.get("user_agents", self.DEFAULT_USER_AGENTS)
         self.delay_config = config.get("delay", None)
         self.retry_config = config.get("retry", {})
         self.max_attempts = self.retry_config.get("max_attempts", 3)
         self.backoff_factor = self.retry_config.get("backoff_factor", 0.1)
-        self.retry_on_status = self.retry_config.get("retry_on", [500, 502, 503, 504])
+        self.retry_on_status = self.retry_config.get("retry_on", [429, 500, 502, 503, 504])
+        self.throttle = HostThrottle(config.get("throttle"))
+        self.http_config = config.get("http", {})
+        self.timeout = self.http_config.get("timeout", 30)
+        self.pool_connections = self.http_config.get("pool_connections", 10)
+        self.pool_maxsize = self.http_config.get("pool_maxsize", 10)
+        self.compression = self.http_config.get("compression", True)
+        # Bodies are streamed: a response over max_body_size is dropped, one past
+        # read_limit is cut short (for pages whose fields all sit near the top)
+        self.max_body_size = self.http_config.get("max_body_size", DEFAULT_MAX_BODY_SIZE)
+        self.read_limit = self.http_config.get("read_limit")
+        allowed_types = self.http_config.get("allowed_types", DEFAULT_ALLOWED_TYPES)
+        self.allowed_types = tuple(allowed_types) if allowed_types is not None else None
+        self.chunk_size = self.http_config.get("chunk_size", 64 * 1024)
+        self.prewarm_workers = self.http_config.get("prewarm_workers", 4)
+        self.dns = DNSCache(config.get("dns"), self.metrics)
+        self.logger = setup_logger()
+        self.session = self._build_session()
+        self._prewarm_executor = None
+        self._warming = set()
+        self._warming_lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # Advertise every encoding urllib3 can decode here (gzip, deflate, plus br/zstd when installed)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING if self.compression else "identity"
+        adapter = TimedAdapter(self.dns, self.metrics, pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def configure_pool(self, pool_connections: int = None, pool_maxsize: int = None) -> None:
+        """
+        Resize the connection pools, e.g. to match the concurrency of the caller.
+
+        Args:
+            pool_connections (int): Number of per-host pools to keep.
+            pool_maxsize (int): Maximum number of kept-alive connections per host.
+        """
+        self.pool_connections = pool_connections or self.pool_connections
+        self.pool_maxsize = pool_maxsize or self.pool_maxsize
+        self.session.close()
+        self.session = self._build_session()
+
+    def prewarm(self, urls, hook=None) -> list:
+        """
+        Resolve the hosts of `urls` and open a pooled connection to each, in the background.
+
+        Meant for the hosts a crawl will fetch next, so their DNS lookups and handshakes
+        overlap with the fetches in flight. Failures are only logged: the fetch itself
+        will retry and report them.
+
+        Args:
+            urls (iterable): URLs about to be fetched; each origin is warmed once at a time.
+            hook (callable): Called with the origin's first URL before its connection
+                is opened, e.g. to load robots.txt through the same pool.
+
+        Returns:
+            list: Futures of the warm-ups started.
+        """
+        futures = []
+        for url in urls:
+            parsed = urlparse(url)
+            origin = f"{parsed.scheme}://{parsed.netloc}".lower()
+            with self._warming_lock:
+                if origin in self._warming:
+                    continue
+                self._warming.add(origin)
+                if self._prewarm_executor is None:
+                    self._prewarm_executor = ThreadPoolExecutor(max_workers=self.prewarm_workers, thread_name_prefix="prewarm")
+            futures.append(self._prewarm_executor.submit(self._warm, origin, url, hook))
+        return futures
+
+    def _warm(self, origin: str, url: str, hook=None) -> None:
+        try:
+            if hook is not None:
+                hook(url)
+            # The same verify/cert/proxies as the fetch, so the fetch finds the connection
+            settings = self.session.merge_environment_settings(url, {}, None, None, None)
+            adapter = self.session.get_adapter(url)
+            if adapter.warm(url, self.timeout, settings["verify"], settings["cert"], settings["proxies"]):
+                self.metrics.inc("connections_prewarmed_total")
+        except Exception as e:
+            self.logger.debug(f"Could not prewarm {origin}: {e}")
+            self.metrics.inc("prewarm_failures_total")
+        finally:
+            with self._warming_lock:
+                self._warming.discard(origin)
+
+    def close(self) -> None:
+        """
+        Stop the pending warm-ups, then close the session and every pooled connection.
+        """
+        if self._prewarm_executor is not None:
+            self._prewarm_executor.shutdown(wait=True, cancel_futures=True)
+            self._prewarm_executor = None
+        self.session.close()
 
     def _get_random_user_agent(self):
         if self.user_agents:
@@ -57,44 +320,163 @@ class Middleware:
         final_headers["User-Agent"] = self._get_random_user_agent()
         return final_headers
 
-    def fetch_with_retries(self, url: str, headers: Dict[str, str]) -> str:
+    def get(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        """
+        Issue a single GET through the pooled session, without retries.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict): Extra HTTP headers.
+
+        Returns:
+            requests.Response: The response object.
+        """
+        return self.session.get(url, headers=self.process_request(url, headers), timeout=self.timeout)
+
+    def fetch_response(self, url: str, headers: Dict[str, str]) -> requests.Response | None:
         """
         Attempt to fetch a URL with retries on timeout or server error.
 
+        A 304 Not Modified is returned as is, so callers sending conditional headers can
+        serve their cached copy.
+
         Args:
             url (str): The URL to fetch.
             headers (dict): HTTP headers to include in the request.
 
         Returns:
-            str: The response content, or empty string on failure.
+            requests.Response | None: The successful response, or None on failure.
         """
         attempt = 0
         while attempt < self.max_attempts:
+            response = None
             try:
                 final_headers = self.process_request(url, headers)
-                response = requests.get(url, headers=final_headers)
+                self.throttle.acquire(url)
+                self._apply_random_delay()
+                started = time.monotonic()
+                try:
+                    response = self.session.get(url, headers=final_headers, timeout=self.timeout, stream=True)
+                finally:
+                    latency = time.monotonic() - started
+                    self.throttle.record(
+                        url,
+                        response.status_code if response is not None else None,
+                        latency,
+                        response.headers.get("Retry-After") if response is not None else None,
+                    )
+                    self.metrics.observe("request_seconds", latency)
+                    self.metrics.inc("requests_total", status=response.status_code if response is not None else "error")
+                if response.status_code == 304:
+                    response.close()
+                    return response
                 if response.status_code in self.retry_on_status:
                     # Raise to trigger retry
                     response.raise_for_status()
                 elif 400 <= response.status_code < 500:
                     # Client errors: no retry
                     response.raise_for_status()
-                    return ""
+                    response.close()
+                    return None
                 else:
                     response.raise_for_status()
-                    return response.text
+                    # A rejected body is not retried: the same URL would serve it again
+                    if not self._read_body(url, response):
+                        return None
+                    if self.metrics.enabled:
+                        self.metrics.inc("bytes_fetched_total", len(response.content))
+                    return response
             except (requests.Timeout, requests.ConnectionError):
                 # Retry on network issues
-                pass
+                if response is not None:
+                    response.close()
             except requests.HTTPError as e:
+                # The error body is never read; closing hands the connection back
+                response.close()
                 # Retry only on retryable HTTP errors (above)
                 if response.status_code not in self.retry_on_status:
                     # Do not retry on non-retryable HTTP errors
-                    return ""
+                    return None
             attempt += 1
+            if attempt < self.max_attempts:
+                self.metrics.inc("retries_total")
             # Exponential backoff delay before retry
             time.sleep(self.backoff_factor * (2 ** (attempt - 1)))
-        return ""
+        return None
+
+    def _allowed(self, url: str, response: requests.Response) -> bool:
+        # Decided from the headers alone, before any of the body is downloaded
+        content_type = response.headers.get("Content-Type")
+        if content_type and self.allowed_types is not None:
+            media_type = content_type.split(";")[0].strip().lower()
+            if not media_type.startswith(self.allowed_types):
+                self.logger.warning(f"Skipping {url}: content type {media_type} is not allowed")
+                self.metrics.inc("responses_rejected_total", reason="content_type")
+                return False
+        length = response.headers.get("Content-Length")
+        if self.max_body_size and length and str(length).isdigit() and int(length) > self.max_body_size:
+            self.logger.warning(f"Skipping {url}: {length} bytes is over max_body_size")
+            self.metrics.inc("responses_rejected_total", reason="too_large")
+            return False
+        return True
+
+    def _read_body(self, url: str, response: requests.Response) -> bool:
+        """
+        Stream the body of a successful response into `response.content`.
+
+        The body is read in chunks, so an oversized or endless response is abandoned
+        once it crosses max_body_size (even without a Content-Length), and reading stops
+        at read_limit. A body cut short there is marked `response.truncated`, as it is not
+        the resource its validators describe. The encoding is settled from the headers or
+        the first chunk, so `response.text` never runs charset detection over the whole body.
+
+        Returns:
+            bool: False if the response was rejected; its connection is closed.
+        """
+        if not self._allowed(url, response):
+            response.close()
+            return False
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(self.chunk_size):
+            if not chunks and response.encoding is None:
+                response.encoding = _sniff_encoding(chunk)
+            chunks.append(chunk)
+            size += len(chunk)
+            if self.read_limit and size >= self.read_limit:
+                truncated = True
+                break
+            if self.max_body_size and size > self.max_body_size:
+                self.logger.warning(f"Skipping {url}: body is over max_body_size")
+                self.metrics.inc("responses_rejected_total", reason="too_large")
+                response.close()
+                return False
+        body = b"".join(chunks)
+        if truncated:
+            body = body[:self.read_limit]
+            self.metrics.inc("responses_truncated_total")
+            # The rest of the body is never read, so the connection cannot be reused
+            response.close()
+        response._content = body
+        response._content_consumed = True
+        response.truncated = truncated
+        return True
+
+    def fetch_with_retries(self, url: str, headers: Dict[str, str]) -> str:
+        """
+        Attempt to fetch a URL with retries on timeout or server error.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (dict): HTTP headers to include in the request.
+
+        Returns:
+            str: The response content, or empty string on failure.
+        """
+        with self.metrics.timer("fetch_seconds"):
+            response = self.fetch_response(url, headers)
+        return response.text if response is not None else ""
 
     def process_response(self, url: str, response: str) -> str:
         """
@@ -108,3 +490,14 @@ class Middleware:
             str: (Possibly modified) response text.
         """
         return response
+
+
+def _sniff_encoding(chunk: bytes) -> str:
+    # A <meta charset> in the first chunk, otherwise UTF-8
+    match = META_CHARSET.search(chunk[:1024])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return "utf-8"
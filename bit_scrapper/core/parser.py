@@ -0,0 +1,104 @@
+# Parses HTML once per page and hands the same document to extraction and pagination
+# The tree builder is pluggable: lxml, html5lib or the built-in html.parser
+# bs4 is imported on first parse, so importing this module stays cheap
+import time
+from typing import TYPE_CHECKING
+
+from bit_scrapper.utils.logger import setup_logger
+from bit_scrapper.utils.metrics import NULL_METRICS
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+DEFAULT_BACKEND = "html.parser"
+PARSER_BACKENDS = ("lxml", "html5lib", "html.parser")
+
+_UNPARSED = object()
+
+
+def resolve_backend(name: str = None) -> str:
+    """
+    Return a usable parser backend, falling back to html.parser.
+
+    Args:
+        name (str): Requested backend, one of PARSER_BACKENDS.
+
+    Returns:
+        str: The requested backend if it is installed, otherwise html.parser.
+    """
+    if not name or name == DEFAULT_BACKEND:
+        return DEFAULT_BACKEND
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name}")
+    from bs4.builder import builder_registry
+    if builder_registry.lookup(name) is None:
+        setup_logger().warning(f"Parser backend {name} is not installed, falling back to {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return name
+
+
+class Document:
+    """
+    A page parsed once, shared by every consumer of its tree.
+
+    Trees are built lazily: `soup` on first CSS access, `tree` (lxml, used by XPath
+    rules) on first XPath access. Regex rules only read `html`.
+
+    Args:
+        html (str): Raw HTML content.
+        backend (str): Parser backend used to build the tree.
+        metrics (Metrics): Receives the time spent building trees, as parse_seconds.
+    """
+
+    __slots__ = ("html", "backend", "metrics", "parse_seconds", "_soup", "_tree")
+
+    def __init__(self, html: str, backend: str = DEFAULT_BACKEND, metrics=NULL_METRICS):
+        self.html = html
+        self.backend = backend
+        self.metrics = metrics
+        # Total time spent building trees, so callers can tell parsing from extraction
+        self.parse_seconds = 0.0
+        self._soup = None
+        self._tree = _UNPARSED
+
+    def _timed(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.parse_seconds += elapsed
+        self.metrics.observe("parse_seconds", elapsed)
+
+    @property
+    def soup(self) -> "BeautifulSoup":
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            started = time.perf_counter()
+            self._soup = BeautifulSoup(self.html, self.backend)
+            self._timed(started)
+        return self._soup
+
+    @property
+    def tree(self):
+        if self._tree is _UNPARSED:
+            from lxml import etree, html as lxml_html
+            started = time.perf_counter()
+            try:
+                self._tree = lxml_html.fromstring(self.html)
+            except (etree.ParserError, ValueError):
+                # Empty or unparseable documents have no tree
+                self._tree = None
+            self._timed(started)
+        return self._tree
+
+
+def parse_html(html: str, backend: str = DEFAULT_BACKEND, metrics=NULL_METRICS) -> Document:
+    """
+    Parse HTML into a Document.
+
+    Args:
+        html (str): Raw HTML content.
+        backend (str): Parser backend, as returned by resolve_backend.
+        metrics (Metrics): Receives the parse time.
+
+    Returns:
+        Document: The parsed document.
+    """
+    return Document(html, backend, metrics)
@@ -0,0 +1,107 @@
+# Multi-core extraction pipeline
+# A fetch stage (a thread draining a page iterator) feeds raw HTML through a bounded queue
+# into a process pool where each worker parses and extracts with its own compiled plan
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from queue import Queue
+
+from bit_scrapper.core.parser import parse_html, resolve_backend
+from bit_scrapper.core.selectors import compile_selectors
+
+_DONE = object()
+_worker_plan = None
+_worker_backend = None
+
+
+def _init_worker(selectors: dict, backend: str) -> None:
+    # Compiled selectors are not picklable, so every worker compiles its own plan
+    global _worker_plan, _worker_backend
+    _worker_plan = compile_selectors(selectors)
+    _worker_backend = backend
+
+
+def _extract(html: str) -> dict:
+    return _worker_plan.apply(parse_html(html, _worker_backend))
+
+
+class ExtractionPipeline:
+    """
+    Extracts records from a stream of pages across a pool of worker processes.
+
+    Args:
+        config (dict): Scraper config; its selectors and parser are used by the workers.
+        workers (int): Number of extraction processes, defaults to the CPU count.
+        queue_size (int): Maximum number of pages buffered between stages, and of
+            pages in flight in the pool. Bounds memory use.
+        ordered (bool): Yield records in page order (default) or as soon as they are ready.
+    """
+
+    def __init__(self, config: dict, workers: int = None, queue_size: int = None, ordered: bool = True):
+        self.selectors = config.get("selectors", {})
+        self.backend = resolve_backend(config.get("parser"))
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.workers
+        self.ordered = ordered
+
+    def _feed(self, pages, queue: Queue, stop: threading.Event, errors: list) -> None:
+        try:
+            for html in pages:
+                if stop.is_set():
+                    break
+                queue.put(html)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            queue.put(_DONE)
+
+    def map(self, pages):
+        """
+        Extract a record from each page.
+
+        Args:
+            pages (iterable): HTML contents, typically a lazy fetch generator. It is
+                consumed in a background thread so fetching overlaps extraction.
+
+        Yields:
+            dict: Extracted records, in page order when `ordered` is set.
+        """
+        queue = Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        feeder = threading.Thread(target=self._feed, args=(pages, queue, stop, errors), daemon=True)
+        feeder.start()
+        pending = deque()
+
+        try:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.selectors, self.backend)) as pool:
+                while True:
+                    html = queue.get()
+                    if html is _DONE:
+                        break
+                    pending.append(pool.submit(_extract, html))
+                    if len(pending) >= self.queue_size:
+                        yield from self._collect(pending)
+                while pending:
+                    yield from self._collect(pending)
+        finally:
+            stop.set()
+            # Unblock the feeder if it is waiting on a full queue
+            while feeder.is_alive():
+                while not queue.empty():
+                    queue.get_nowait()
+                feeder.join(timeout=0.05)
+        if errors:
+            raise errors[0]
+
+    def _collect(self, pending: deque):
+        if self.ordered:
+            yield pending.popleft().result()
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield future.result()
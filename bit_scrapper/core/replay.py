@@ -0,0 +1,111 @@
+# Offline re-extraction over the response cache
+# Runs the current extraction plan over pages already in .bitscrapper_cache, so a change
+# of selectors needs no re-crawl. Nothing here opens a connection: pages come straight
+# from the cache store and are parsed in-process or across an ExtractionPipeline pool
+import os
+import re
+import time
+from collections import deque
+
+from bit_scrapper.core.parser import parse_html, resolve_backend
+from bit_scrapper.core.pipeline import ExtractionPipeline
+from bit_scrapper.core.selectors import compile_selectors
+from bit_scrapper.utils.cache import ResponseCache
+from bit_scrapper.utils.metrics import make_metrics
+
+
+class Replayer:
+    """
+    Extracts records from cached pages with the config's current selectors.
+
+    Args:
+        config (dict): Scraper config: its selectors, parser, cache (where the corpus
+            is) and metrics sections are used.
+        workers (int): Extraction processes; 1 extracts in-process. Defaults to the
+            CPU count.
+        url_field (str): Record field for the page URL, none by default.
+    """
+
+    def __init__(self, config: dict, workers: int = None, url_field: str = None):
+        self.config = config
+        self.cache = ResponseCache(dict(config.get("cache", {}), enabled=True))
+        self.metrics = make_metrics(config.get("metrics"))
+        self.plan = compile_selectors(config.get("selectors", {}))
+        self.parser_backend = resolve_backend(config.get("parser"))
+        self.pipeline_config = dict(config.get("pipeline") or {}, ordered=True)
+        self.pipeline_config["workers"] = workers or self.pipeline_config.get("workers") or os.cpu_count() or 1
+        self.url_field = url_field
+        self.stats = {"pages": 0, "bytes": 0, "seconds": 0.0}
+
+    def pages(self, urls=None, match: str = None, limit: int = None):
+        """
+        The cached pages to replay.
+
+        Args:
+            urls (iterable): Only these URLs, default the whole cache.
+            match (str): Only URLs matching this regular expression.
+            limit (int): At most this many pages.
+
+        Yields:
+            CacheEntry: Cached pages with a body.
+        """
+        pattern = re.compile(match) if match else None
+        count = 0
+        for entry in self.cache.iter_entries(urls):
+            if limit is not None and count >= limit:
+                return
+            if not entry.body or (pattern is not None and not pattern.search(entry.url)):
+                continue
+            count += 1
+            self.stats["pages"] += 1
+            self.stats["bytes"] += len(entry.body)
+            yield entry
+
+    def iter_records(self, urls=None, match: str = None, limit: int = None):
+        """
+        Extract one record per cached page, in store order.
+
+        Yields:
+            dict: Extracted records.
+        """
+        started = time.perf_counter()
+        entries = self.pages(urls, match, limit)
+        try:
+            if self.pipeline_config["workers"] == 1:
+                for entry in entries:
+                    yield self._record(entry.url, self._extract(entry.body))
+                return
+            # Records come back in page order, so the URLs line up with a FIFO
+            page_urls = deque()
+
+            def bodies():
+                for entry in entries:
+                    page_urls.append(entry.url)
+                    yield entry.body
+
+            for record in ExtractionPipeline(self.config, **self.pipeline_config).map(bodies()):
+                yield self._record(page_urls.popleft(), record)
+        finally:
+            self.stats["seconds"] += time.perf_counter() - started
+
+    def _extract(self, html: str) -> dict:
+        return self.plan.apply(parse_html(html, self.parser_backend, self.metrics))
+
+    def _record(self, url: str, record: dict) -> dict:
+        self.metrics.inc("pages_replayed_total")
+        if self.url_field:
+            record[self.url_field] = url
+        return record
+
+    def run(self, urls=None, match: str = None, limit: int = None) -> list:
+        return list(self.iter_records(urls, match, limit))
+
+    def close(self) -> None:
+        self.cache.close()
+        self.metrics.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,192 @@
+# Per-host robots.txt policies
+# Policies are fetched through the scraper's own HTTP session, kept in an LRU and
+# persisted with a TTL so scheduled runs reuse them instead of re-fetching
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from bit_scrapper.utils.cache import CACHE_DIR
+from bit_scrapper.utils.logger import setup_logger
+
+
+class RobotsPolicy:
+    """
+    The robots.txt policy of one host.
+
+    Args:
+        origin (str): scheme://host[:port] the policy applies to.
+        status (int): HTTP status of the robots.txt fetch, None if it failed.
+        text (str): robots.txt content.
+        fetched_at (float): When robots.txt was fetched.
+    """
+
+    def __init__(self, origin: str, status: int | None, text: str = "", fetched_at: float = None):
+        self.origin = origin
+        self.status = status
+        self.text = text
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.parser = RobotFileParser(f"{origin}/robots.txt")
+        # Same status handling as RobotFileParser.read
+        if status in (401, 403):
+            self.parser.disallow_all = True
+        elif status is not None and 400 <= status < 500:
+            self.parser.allow_all = True
+        elif status is not None and status < 400:
+            self.parser.parse(text.splitlines())
+        # Otherwise the parser stays unread and disallows everything, as before
+
+    @property
+    def unavailable(self) -> bool:
+        """
+        True when robots.txt could not be read (network error or 5xx), so the host is
+        disallowed only until the fetch is retried.
+        """
+        return self.status is None or self.status >= 500
+
+    def can_fetch(self, user_agent: str, url: str) -> bool:
+        return self.parser.can_fetch(user_agent, url)
+
+    def delay(self, user_agent: str) -> float | None:
+        """
+        Minimum seconds between requests asked by Crawl-delay or Request-rate, if any.
+        """
+        delays = []
+        crawl_delay = self.parser.crawl_delay(user_agent)
+        if crawl_delay:
+            delays.append(float(crawl_delay))
+        rate = self.parser.request_rate(user_agent)
+        if rate and rate.requests:
+            delays.append(rate.seconds / rate.requests)
+        return max(delays) if delays else None
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "text": self.text, "fetched_at": self.fetched_at}
+
+
+class RobotsCache:
+    """
+    LRU of per-host robots.txt policies, persisted to disk with a TTL.
+
+    Args:
+        middleware (Middleware): HTTP layer used to fetch robots.txt.
+        config (dict): The "robots" section of the scraper config: user_agent (default
+            "*"), ttl (seconds, default one day), retry_ttl (seconds an unavailable
+            robots.txt blocks its host before it is fetched again, default 60),
+            max_hosts (LRU size) and path (JSON file the policies persist to, None to
+            disable persistence). Unavailable policies are never persisted.
+    """
+
+    def __init__(self, middleware, config: dict = None):
+        config = config or {}
+        self.middleware = middleware
+        self.user_agent = config.get("user_agent", "*")
+        self.ttl = config.get("ttl", 86400)
+        self.retry_ttl = config.get("retry_ttl", 60)
+        self.max_hosts = config.get("max_hosts", 1024)
+        self.path = config.get("path", os.path.join(CACHE_DIR, "robots.json"))
+        self.logger = setup_logger()
+        self.policies = OrderedDict()
+        self._lock = threading.Lock()
+        self._fetching = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            self.logger.warning(f"Ignoring unreadable robots cache at {self.path}")
+            return
+        for origin, data in sorted(stored.items(), key=lambda item: item[1].get("fetched_at", 0)):
+            policy = RobotsPolicy(origin, data.get("status"), data.get("text", ""), data.get("fetched_at", 0))
+            if not policy.unavailable and time.time() - policy.fetched_at < self.ttl:
+                self.policies[origin] = policy
+
+    def save(self) -> None:
+        """
+        Persist the policies whose robots.txt was read, replacing the file atomically.
+        """
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            stored = {origin: policy.to_dict() for origin, policy in self.policies.items() if not policy.unavailable}
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Scheduled jobs save the same file from several threads; each writes its own
+        # temporary file, and the last replace wins
+        temporary = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(stored, file)
+        os.replace(temporary, self.path)
+
+    def _fetch(self, origin: str) -> RobotsPolicy:
+        robots_url = f"{origin}/robots.txt"
+        try:
+            response = self.middleware.get(robots_url)
+            self.logger.info(f"robots.txt loaded from {robots_url}")
+            return RobotsPolicy(origin, response.status_code, response.text)
+        except requests.RequestException:
+            self.logger.warning(f"Could not read robots.txt at {robots_url}")
+            return RobotsPolicy(origin, None)
+
+    def policy(self, url: str) -> RobotsPolicy:
+        """
+        Return the policy for the host of `url`, fetching robots.txt when missing or expired.
+
+        Args:
+            url (str): Any URL on the host.
+
+        Returns:
+            RobotsPolicy: The host's policy.
+        """
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        policy = self._cached(origin)
+        if policy is not None:
+            return policy
+        # Fetched under a per-host lock: concurrent callers do not fetch the same host
+        # twice, and a slow host does not hold up lookups on the others
+        with self._lock:
+            lock = self._fetching.setdefault(origin, threading.Lock())
+        with lock:
+            policy = self._cached(origin)
+            if policy is not None:
+                return policy
+            policy = self._fetch(origin)
+            with self._lock:
+                self._fetching.pop(origin, None)
+                self.policies[origin] = policy
+                self.policies.move_to_end(origin)
+                while len(self.policies) > self.max_hosts:
+                    self.policies.popitem(last=False)
+                self._dirty = True
+        return policy
+
+    def _cached(self, origin: str) -> RobotsPolicy | None:
+        with self._lock:
+            policy = self.policies.get(origin)
+            ttl = self.retry_ttl if policy is not None and policy.unavailable else self.ttl
+            if policy is not None and time.time() - policy.fetched_at < ttl:
+                self.policies.move_to_end(origin)
+                return policy
+        return None
+
+    def can_fetch(self, url: str) -> bool:
+        return self.policy(url).can_fetch(self.user_agent, url)
+
+    def delay_for(self, url: str) -> float | None:
+        """
+        Minimum seconds between requests to the host of `url`, from Crawl-delay or Request-rate.
+        """
+        return self.policy(url).delay(self.user_agent)
@@ -0,0 +1,271 @@
+# In-process job scheduler
+# Every job keeps one warm BitScrapper (pooled HTTP session, compiled selectors, robots
+# policies) across its runs; due jobs run in a bounded thread pool and report their status
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import schedule
+
+from bit_scrapper.config.loader import load_config, validate_config
+from bit_scrapper.core.dedup import make_deduplicator
+from bit_scrapper.core.incremental import ChangeDetector
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.utils.logger import setup_logger
+from bit_scrapper.utils.writer import open_writer
+
+
+class Job:
+    """
+    One scraping job, keeping its scraper warm between runs.
+
+    Args:
+        spec (dict): Job definition: name, config (path or inline config), url, format
+            (default "json"), output (filename without extension; "{time}" is replaced
+            by the run's start time), incremental (write deltas, see ChangeDetector),
+            and either every (seconds between runs) or at ("HH:MM", daily).
+    """
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        config = spec["config"]
+        # Validated and compiled once, not on every run
+        self.config = load_config(config) if isinstance(config, str) else validate_config(config)
+        self.url = spec["url"]
+        self.format = spec.get("format", "json")
+        self.output = spec.get("output", self.name)
+        self.every = spec.get("every")
+        self.at = spec.get("at")
+        if self.every is None and self.at is None:
+            raise ValueError(f"Job {self.name} needs either 'every' or 'at'")
+        self.scraper = BitScrapper(self.config)
+        self.detector = None
+        if spec.get("incremental"):
+            incremental_config = dict({"index": f"{self.output.replace('{time}', '')}.changes.sqlite3"}, **self.config.get("incremental", {}))
+            self.detector = ChangeDetector(self.scraper, incremental_config)
+        self.state = "idle"
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_records = None
+        self.last_output = None
+        self.last_error = None
+        self.scheduled = None
+        self.future = None
+
+    def plan(self, scheduler: schedule.Scheduler, submit) -> None:
+        """
+        Register the job's trigger with a `schedule` scheduler.
+        """
+        if self.every is not None:
+            self.scheduled = scheduler.every(self.every).seconds.do(submit, self.name)
+        else:
+            self.scheduled = scheduler.every().day.at(self.at).do(submit, self.name)
+
+    def _fieldnames(self) -> tuple:
+        fieldnames = list(self.config["selectors"])
+        types = self.scraper.plan.column_types()
+        if self.detector is not None:
+            fieldnames = [self.detector.change_field, self.detector.url_field] + fieldnames
+            types = dict({self.detector.change_field: "string", self.detector.url_field: "string"}, **types)
+        return fieldnames, types
+
+    def run(self) -> int:
+        """
+        Scrape once and write the output.
+
+        Returns:
+            int: Number of records written.
+        """
+        started = time.time()
+        self.last_started = started
+        filename = f"{self.output.replace('{time}', time.strftime('%Y%m%d-%H%M%S', time.localtime(started)))}.{self.format}"
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        source = self.detector.iter_changes(self.url) if self.detector else self.scraper.iter_records(self.url)
+        records = source
+        dedup = make_deduplicator(self.config.get("dedup"), self.scraper.metrics)
+        if dedup is not None:
+            records = dedup.filter(records)
+        fieldnames, types = self._fieldnames()
+        try:
+            with open_writer(self.format, filename, fieldnames=fieldnames, types=types, metrics=self.scraper.metrics) as writer:
+                for record in records:
+                    writer.write(record)
+        except BaseException:
+            # Closed now, not whenever it is collected: the detector rolls back the
+            # failed run before the next run starts on the same index
+            source.close()
+            raise
+        finally:
+            if dedup is not None:
+                dedup.close()
+        # Persisted after every run, while the in-memory copies stay warm
+        self.scraper.robots.save()
+        self.scraper.metrics.export()
+        self.last_output = filename
+        self.last_records = writer.count
+        return writer.count
+
+    def status(self) -> dict:
+        next_run = self.scheduled.next_run if self.scheduled is not None else None
+        return {
+            "state": self.state,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_duration": self.last_duration,
+            "last_records": self.last_records,
+            "last_output": self.last_output,
+            "last_error": self.last_error,
+            "next_run": next_run.isoformat(timespec="seconds") if next_run else None,
+        }
+
+    def close(self) -> None:
+        if self.detector is not None:
+            self.detector.close()
+        self.scraper.close()
+
+
+class Scheduler:
+    """
+    Runs many jobs from one process, at most `workers` at a time.
+
+    A job that is still queued or running when it comes due again is skipped rather
+    than run twice at once.
+
+    Args:
+        jobs (list): Job instances.
+        workers (int): Maximum number of jobs running at once.
+        status_file (str): JSON file rewritten with every job's status after each run.
+    """
+
+    def __init__(self, jobs: list, workers: int = 4, status_file: str = None):
+        self.jobs = {job.name: job for job in jobs}
+        self.workers = workers
+        self.status_file = status_file
+        self.logger = setup_logger()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bitscrapper-job")
+        self.schedule = schedule.Scheduler()
+        for job in jobs:
+            job.plan(self.schedule, self.submit)
+        self.server = None
+        self._stopped = threading.Event()
+        self._status_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, workers: int = None) -> "Scheduler":
+        """
+        Build a scheduler from a jobs file: {"workers": N, "status_file": path, "jobs": [...]}.
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        jobs = [Job(spec) for spec in data["jobs"]]
+        return cls(jobs, workers or data.get("workers", 4), data.get("status_file"))
+
+    def submit(self, name: str) -> bool:
+        """
+        Queue a run of the job `name` now.
+
+        Returns:
+            bool: False if the job was already queued or running.
+        """
+        job = self.jobs[name]
+        with job.lock:
+            if job.state != "idle":
+                self.logger.warning(f"Job {name} is still {job.state}, skipping this run")
+                return False
+            job.state = "queued"
+        job.future = self.executor.submit(self._run, job)
+        return True
+
+    def _run(self, job: Job) -> None:
+        job.state = "running"
+        started = time.monotonic()
+        try:
+            count = job.run()
+            job.last_error = None
+            self.logger.info(f"Job {job.name} wrote {count} records in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            self.logger.error(f"Job {job.name} failed: {job.last_error}")
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.state = "idle"
+            self._write_status()
+
+    def run_all(self) -> None:
+        """
+        Run every job once and wait for them to finish.
+        """
+        for name in self.jobs:
+            self.submit(name)
+        wait([job.future for job in self.jobs.values() if job.future is not None])
+
+    def status(self) -> dict:
+        return {name: job.status() for name, job in self.jobs.items()}
+
+    def _write_status(self) -> None:
+        if not self.status_file:
+            return
+        with self._status_lock:
+            temporary = f"{self.status_file}.{os.getpid()}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as file:
+                json.dump(self.status(), file, indent=4)
+            os.replace(temporary, self.status_file)
+
+    def serve_status(self, port: int = 0, host: str = "127.0.0.1") -> int:
+        """
+        Serve the job status as JSON at /status from a background thread.
+
+        Returns:
+            int: The port listened on.
+        """
+        scheduler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/status":
+                    self.send_error(404)
+                    return
+                body = json.dumps(scheduler.status()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def serve_forever(self, poll: float = 1.0) -> None:
+        """
+        Start due jobs every `poll` seconds until `stop` is called.
+        """
+        while not self._stopped.wait(poll):
+            self.schedule.run_pending()
+
+    def stop(self) -> None:
+        """
+        Stop scheduling, wait for running jobs and release every job's resources.
+        """
+        self._stopped.set()
+        self.executor.shutdown(wait=True)
+        for job in self.jobs.values():
+            job.close()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -1,14 +1,23 @@
 # Implements the core scraping functionality using the Requests library
 # BeautifulSoup is used for HTML parsing
 # Reads user-defined selectors from the configuration to extract the relevant data
-import requests
-from bs4 import BeautifulSoup
-from urllib.robotparser import RobotFileParser
-from urllib.parse import urlparse, urljoin
+# requests, bs4 and the extraction pipeline are imported on the paths that use them,
+# so short runs served from the cache do not pay for them at startup
+import os
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin
 
 from bit_scrapper.utils.logger import setup_logger
-from bit_scrapper.utils.cache import load_from_cache, save_to_cache
-from bit_scrapper.core.middleware import Middleware
+from bit_scrapper.utils.cache import ResponseCache
+from bit_scrapper.utils.metrics import make_metrics
+from bit_scrapper.core.parser import Document, parse_html, resolve_backend
+from bit_scrapper.core.selectors import compile_selectors
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from bit_scrapper.core.middleware import Middleware
+    from bit_scrapper.core.robots import RobotsCache
 
 class BitScrapper:
     def __init__(self, config: dict):
@@ -22,28 +31,82 @@ class BitScrapper:
         self.selectors = config.get("selectors", {})
         self.pagination = config.get("pagination", {})
         self.logger = setup_logger()
-        self.middleware = Middleware(config)
-        self.robot_parser = None
+        self.metrics = make_metrics(config.get("metrics"))
+        self.cache = ResponseCache(config.get("cache"))
         self.respect_robots = config.get("respect_robots", True)
+        self.parser_backend = resolve_backend(config.get("parser"))
+        # Compiled once; raises ValueError for invalid selectors
+        self.plan = compile_selectors(self.selectors)
+        next_selector = self.pagination.get("next_selector")
+        if next_selector:
+            import soupsieve
+            self.next_selector = soupsieve.compile(next_selector)
+        else:
+            self.next_selector = None
+        self.pipeline_config = config.get("pipeline")
+        self.cursor = None
+        self._middleware = None
+        self._robots = None
+
+    @property
+    def middleware(self) -> "Middleware":
+        # Built on first use: importing requests and opening the session is skipped
+        # entirely when every page comes from the cache
+        if self._middleware is None:
+            from bit_scrapper.core.middleware import Middleware
+            self._middleware = Middleware(self.config, self.metrics)
+        return self._middleware
+
+    @property
+    def robots(self) -> "RobotsCache":
+        if self._robots is None:
+            from bit_scrapper.core.robots import RobotsCache
+            robots_config = dict({"path": os.path.join(self.cache.directory, "robots.json")}, **self.config.get("robots", {}))
+            self._robots = RobotsCache(self.middleware, robots_config)
+        return self._robots
     
-    def _init_robots_txt(self, base_url: str):
-        parsed = urlparse(base_url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        self.robot_parser = RobotFileParser()
-        self.robot_parser.set_url(robots_url)
-        try:
-            self.robot_parser.read()
-            self.logger.info(f"robots.txt loaded from {robots_url}")
-        except:
-            self.logger.warning(f"Could not read robots.txt at {robots_url}")
-    
+    def close(self):
+        """
+        Release the HTTP connections held by the middleware and the cache store, persist
+        the robots.txt policies and export the metrics.
+        """
+        if self._robots is not None:
+            self._robots.save()
+        if self._middleware is not None:
+            self._middleware.close()
+        self.cache.close()
+        self.metrics.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _is_allowed(self, url: str) -> bool:
         if not self.respect_robots:
             return True
-        if not self.robot_parser:
-            self._init_robots_txt(url)
-        return self.robot_parser.can_fetch("*", url)
+        return self.robots.can_fetch(url)
+
+    def _respect_crawl_delay(self, url: str) -> None:
+        # Cap the host's request rate by its robots.txt Crawl-delay / Request-rate
+        delay = self.robots.delay_for(url) if self.respect_robots else None
+        if delay:
+            self.middleware.throttle.limit(url, 1 / delay)
     
+    def prewarm(self, urls) -> list:
+        """
+        Get the hosts of `urls` ready in the background: resolve them, load their
+        robots.txt when it is respected, and open a pooled connection to each.
+
+        Args:
+            urls (iterable): URLs about to be fetched.
+
+        Returns:
+            list: Futures of the warm-ups started.
+        """
+        return self.middleware.prewarm(urls, self.robots.policy if self.respect_robots else None)
+
     def fetch_url(self, url: str) -> str:
         """
         Fetches the HTML content from a given URL.
@@ -56,61 +119,79 @@ class BitScrapper:
         """
         if not self._is_allowed(url):
             self.logger.warning(f"Blocked by robots.txt: {url}")
+            self.metrics.inc("robots_blocked_total")
             return ""
         
-        cached = load_from_cache(url)
-        if cached:
+        entry = self.cache.lookup(url) if self.cache.enabled else None
+        if entry and self.cache.is_fresh(entry):
             self.logger.info(f"Loaded from cache: {url}")
-            return cached
+            self.metrics.inc("cache_hits_total")
+            return entry.body
+        if self.cache.enabled:
+            self.metrics.inc("cache_misses_total")
         
+        import requests
         try:
             headers = self.middleware.process_request(url)
+            if entry:
+                headers.update(self.cache.conditional_headers(entry))
+            self._respect_crawl_delay(url)
             self.logger.info(f"Fetching URL with retry: {url}")
-            content = self.middleware.fetch_with_retries(url, headers)
-            if content:
-                return content
-            return ""
+            with self.metrics.timer("fetch_seconds"):
+                response = self.middleware.fetch_response(url, headers)
+            if response is None:
+                self.metrics.inc("fetch_failures_total")
+                return ""
+            if response.status_code == 304 and entry:
+                self.logger.info(f"Not modified, loaded from cache: {url}")
+                self.metrics.inc("cache_revalidated_total")
+                return self.cache.revalidated(entry, response.headers).body
+            content = response.text
+            # A body cut at read_limit is not the page its ETag/Last-Modified describe, so
+            # caching it would serve, and later revalidate, the cut page as the whole one
+            if content and self.cache.enabled and not getattr(response, "truncated", False):
+                self.cache.put(url, content, response.headers)
+            return content
         except requests.RequestException as e:
             self.logger.error(f"Request failed: {url} -> {e}")
+            self.metrics.inc("fetch_failures_total")
             return ""
     
-    def extract_data(self, html: str) -> dict:
+    def parse(self, html: str) -> Document:
+        """
+        Parses HTML content once with the configured parser backend.
+
+        Args:
+            html (str): HTML content.
+
+        Returns:
+            Document: Parsed document, reusable for extraction and pagination.
+        """
+        return parse_html(html, self.parser_backend, self.metrics)
+
+    def extract_data(self, html) -> dict:
         """
         Extracts the data from the HTML content based on the configured selectors.
         
         Args:
-            html (str): HTML content.
+            html (str | Document): HTML content, or a document returned by `parse`.
         
         Returns:
             dict: Extracted data mapped by selector keys.
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        extract = {}
-
-        # Iterating through each selector defined in the configuration
-        for field, rule in self.selectors.items():
-            rule_type = rule.get("type")
-            rule_value = rule.get("value")
-            # Handling the CSS selectors
-            if rule_type == 'css' and rule_value:
-                element = soup.select_one(rule_value)
-                extract[field] = element.get_text(strip=True) if element else None
-            # Stub for XPath selectors
-            elif rule_type == 'xpath' and rule_value:
-                # placeholder for xpath support
-                extract[field] = None
-            # Stub for Regex extraction.
-            elif rule_type == "regex" and rule_value:
-                # For Regex extraction, use the `re` module.
-                extract[field] = None
-            else:
-                extract[field] = None
-        return extract
+        document = html if isinstance(html, Document) else self.parse(html)
+        if not self.metrics.enabled:
+            return self.plan.apply(document)
+        # Trees are built lazily during apply; their build time is reported as parse_seconds
+        parsed = document.parse_seconds
+        started = time.perf_counter()
+        record = self.plan.apply(document)
+        self.metrics.observe("extract_seconds", time.perf_counter() - started - (document.parse_seconds - parsed))
+        return record
     
-    def get_next_page_url(self, soup: BeautifulSoup, current_page: int) -> str:
+    def get_next_page_url(self, soup: "BeautifulSoup", current_page: int) -> str:
         if self.pagination.get("strategy") == "link":
-            selector = self.pagination.get("next_selector")
-            next_link = soup.select_one(selector)
+            next_link = self.next_selector.select_one(soup) if self.next_selector else None
             # return next_link['href'] if next_link and 'href' in next_link.attrs else None
             return urljoin(self.config["start_url"], next_link['href']) if next_link and 'href' in next_link.attrs else None
         elif self.pagination.get("strategy") == "offset":
@@ -120,19 +201,83 @@ class BitScrapper:
 
         return None
 
-    def run(self, start_url: str) -> list:
+    def page_urls(self, start_url: str, start_page: int = 1) -> list:
         """
-        The main method that fetches the URL, extracts data, and returns the structured result.
-        
+        Lists every page URL of an offset-paginated listing, up to max_pages.
+
         Args:
-            url (str): URL to scrape.
-        
+            start_url (str): URL of the first page.
+            start_page (int): First page to list, when resuming.
+
         Returns:
-            dict: Extracted data.
+            list: Page URLs, in page order.
         """
-        results = []
+        if self.pagination.get("strategy") != "offset":
+            raise ValueError("Page URLs are only known up front with the offset pagination strategy")
+        max_pages = self.pagination.get("max_pages", 1)
+        first = [start_url] if start_page <= 1 else []
+        return first + [self.get_next_page_url(None, page) for page in range(max(start_page - 1, 1), max_pages)]
+
+    def iter_pages(self, start_url: str, start_page: int = 1):
+        """
+        Fetches the pages of an offset-paginated listing, stopping at the first empty page.
+
+        Args:
+            start_url (str): URL to scrape.
+            start_page (int): First page to fetch, when resuming.
+
+        Yields:
+            str: HTML content of each page, in page order.
+        """
+        self.config["start_url"] = start_url
+        for url in self.page_urls(start_url, start_page):
+            html = self.fetch_url(url)
+            if not html: break
+            yield html
+
+    def _is_last_page(self, record: dict) -> bool:
+        # With "stop_on_empty_record", a page where every field came back empty ends the listing
+        if not self.pagination.get("stop_on_empty_record"):
+            return False
+        return all(value in (None, "", []) for value in record.values())
+
+    def _uses_pipeline(self) -> bool:
+        return bool(self.pipeline_config) and self.pagination.get("strategy") == "offset"
+
+    def iter_records(self, start_url: str, start_page: int = 1):
+        """
+        Fetches and extracts page by page, yielding each record as soon as it is extracted.
+
+        With a "pipeline" config section and offset pagination, extraction runs in a pool
+        of worker processes fed by the fetched pages. Link pagination needs each parsed
+        page to find the next one, so it is always extracted in-process.
+
+        Before each record is yielded, `self.cursor` is set to the page that follows it
+        ({"url", "page"}), so an interrupted run can resume from it.
+
+        Args:
+            start_url (str): URL to scrape, or the cursor URL when resuming.
+            start_page (int): Page number of `start_url`, when resuming.
+
+        Yields:
+            dict: Extracted data, one record per page.
+        """
+        if self._uses_pipeline():
+            from bit_scrapper.core.pipeline import ExtractionPipeline
+            records = ExtractionPipeline(self.config, **self.pipeline_config).map(self.iter_pages(start_url, start_page))
+            page = start_page
+            try:
+                for record in records:
+                    if self._is_last_page(record): break
+                    self.cursor = {"url": self.get_next_page_url(None, page), "page": page + 1}
+                    page += 1
+                    yield record
+            finally:
+                records.close()
+            return
+
         url = start_url
-        page = 1
+        page = start_page
         max_pages = self.pagination.get("max_pages", 1)
         self.config["start_url"] = start_url
 
@@ -140,14 +285,43 @@ class BitScrapper:
             html = self.fetch_url(url)
             if not html: break
         
-            soup = BeautifulSoup(html, 'html.parser')
-            data = self.extract_data(html)
-            results.append(data)
+            document = self.parse(html)
+            record = self.extract_data(document)
+            if self._is_last_page(record): break
 
             # Setup next iteration
-            url = self.get_next_page_url(soup, page)
+            next_url = self.get_next_page_url(document.soup, page)
+            self.cursor = {"url": next_url, "page": page + 1}
+            yield record
+            url = next_url
             page += 1
+
+    def run(self, start_url: str) -> list:
+        """
+        The main method that fetches the URL, extracts data, and returns the structured result.
+        
+        Args:
+            url (str): URL to scrape.
         
-        # Later, add retry logic or concurrency
+        Returns:
+            list: Extracted data, one record per page, without duplicates when the
+                config has a "dedup" section.
+        """
+        return self.deduplicate(self.iter_records(start_url))
+
+    def deduplicate(self, records) -> list:
+        """
+        Collects records, dropping duplicates when the config has a "dedup" section.
 
-        return results
\ No newline at end of file
+        Args:
+            records (iterable): Extracted records.
+
+        Returns:
+            list: The records to write.
+        """
+        from bit_scrapper.core.dedup import make_deduplicator
+        dedup = make_deduplicator(self.config.get("dedup"), self.metrics)
+        if dedup is None:
+            return list(records)
+        with dedup:
+            return list(dedup.filter(records))
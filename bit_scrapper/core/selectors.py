@@ -0,0 +1,199 @@
+# Compiles the `selectors` section of a config into an extraction plan
+# CSS rules are precompiled with soupsieve, XPath rules with lxml and regex rules with re,
+# once per scraper, so applying the plan to a page does no rule lookup or compilation
+import re
+
+import soupsieve
+
+POST_PROCESSORS = {
+    "strip": lambda value: value.strip(),
+    "lower": lambda value: value.lower(),
+    "upper": lambda value: value.upper(),
+    "collapse_whitespace": lambda value: " ".join(value.split()),
+    "int": lambda value: int(value.strip().replace(",", "")),
+    "float": lambda value: float(value.strip().replace(",", "")),
+    "bool": lambda value: value.strip().lower() in ("1", "true", "yes", "on"),
+}
+
+# Column types, and the post-processor that produces each of them
+DTYPES = {"string": None, "int": "int", "float": "float", "bool": "bool"}
+
+REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+
+class CompiledRule:
+    """
+    A single compiled field rule.
+
+    Args:
+        field (str): Output field name.
+        rule (dict): Selector rule from the config: type, value and optionally attr,
+            multiple, post (list of POST_PROCESSORS names), dtype (one of DTYPES) and
+            flags (regex only).
+
+    Raises:
+        ValueError: If the rule is malformed or its selector does not compile.
+    """
+
+    __slots__ = ("field", "type", "value", "attr", "multiple", "post", "dtype", "matcher")
+
+    def __init__(self, field: str, rule: dict):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Selector '{field}' must be an object with 'type' and 'value'")
+        self.field = field
+        self.type = rule.get("type")
+        self.value = rule.get("value")
+        self.attr = rule.get("attr")
+        self.multiple = rule.get("multiple", False)
+        post = rule.get("post", [])
+        post = [post] if isinstance(post, str) else post
+        unknown = [name for name in post if name not in POST_PROCESSORS]
+        if unknown:
+            raise ValueError(f"Selector '{field}' has unknown post-processors: {', '.join(unknown)}")
+        self.dtype = rule.get("dtype")
+        if self.dtype is None:
+            # Infer the column type from the last converting post-processor
+            converters = [name for name in post if name in DTYPES.values()]
+            self.dtype = converters[-1] if converters else "string"
+        elif self.dtype not in DTYPES:
+            raise ValueError(f"Selector '{field}' has unknown dtype: {self.dtype}")
+        elif DTYPES[self.dtype] and DTYPES[self.dtype] not in post:
+            post = post + [DTYPES[self.dtype]]
+        self.post = [POST_PROCESSORS[name] for name in post]
+        if not self.value:
+            raise ValueError(f"Selector '{field}' has no value")
+
+        try:
+            if self.type == "css":
+                self.matcher = soupsieve.compile(self.value)
+            elif self.type == "xpath":
+                self.matcher = _compile_xpath(self.value)
+            elif self.type == "regex":
+                flags = 0
+                for letter in rule.get("flags", ""):
+                    flags |= REGEX_FLAGS[letter]
+                self.matcher = re.compile(self.value, flags)
+            else:
+                raise ValueError(f"unknown selector type '{self.type}'")
+        except (soupsieve.SelectorSyntaxError, re.error, KeyError, ValueError) as e:
+            raise ValueError(f"Invalid selector '{field}': {e}")
+
+    def _finish(self, value):
+        if value is None:
+            return None
+        for process in self.post:
+            try:
+                value = process(value)
+            except (ValueError, TypeError, AttributeError):
+                return None
+        return value
+
+    def _from_element(self, element):
+        if self.attr:
+            return element.get(self.attr)
+        return element.get_text(strip=True)
+
+    def _from_lxml(self, node):
+        if isinstance(node, str):
+            return str(node).strip()
+        if not hasattr(node, "text_content"):
+            return node
+        if self.attr:
+            return node.get(self.attr)
+        return node.text_content().strip()
+
+    def _from_match(self, match):
+        return match.group(1) if match.re.groups else match.group(0)
+
+    def apply(self, document):
+        """
+        Apply the rule to a parsed document.
+
+        Args:
+            document (Document): Parsed page.
+
+        Returns:
+            The extracted value, a list of values when `multiple` is set, or None.
+        """
+        if self.type == "css":
+            if self.multiple:
+                values = [self._from_element(element) for element in self.matcher.select(document.soup)]
+            else:
+                element = self.matcher.select_one(document.soup)
+                return self._finish(self._from_element(element)) if element is not None else None
+        elif self.type == "xpath":
+            tree = document.tree
+            nodes = self.matcher(tree) if tree is not None else []
+            if not isinstance(nodes, list):
+                return self._finish(nodes)
+            if self.multiple:
+                values = [self._from_lxml(node) for node in nodes]
+            else:
+                return self._finish(self._from_lxml(nodes[0])) if nodes else None
+        else:
+            if self.multiple:
+                values = [self._from_match(match) for match in self.matcher.finditer(document.html)]
+            else:
+                match = self.matcher.search(document.html)
+                return self._finish(self._from_match(match)) if match else None
+        return [self._finish(value) for value in values]
+
+
+def _compile_xpath(expression: str):
+    try:
+        from lxml import etree
+    except ImportError:
+        raise ValueError("XPath selectors require lxml to be installed")
+    try:
+        return etree.XPath(expression)
+    except etree.XPathSyntaxError as e:
+        raise ValueError(str(e))
+
+
+class SelectorPlan:
+    """
+    The compiled form of a `selectors` config section.
+
+    Args:
+        selectors (dict): Mapping of field names to selector rules.
+
+    Raises:
+        ValueError: If any rule is invalid.
+    """
+
+    def __init__(self, selectors: dict):
+        self.rules = [CompiledRule(field, rule) for field, rule in selectors.items()]
+
+    def column_types(self) -> dict:
+        """
+        Return the type of each output field, e.g. "int", or "list<int>" for multi-value fields.
+        """
+        return {rule.field: f"list<{rule.dtype}>" if rule.multiple else rule.dtype for rule in self.rules}
+
+    def apply(self, document) -> dict:
+        """
+        Extract every field from a parsed document.
+
+        Args:
+            document (Document): Parsed page.
+
+        Returns:
+            dict: Extracted data mapped by field name.
+        """
+        return {rule.field: rule.apply(document) for rule in self.rules}
+
+
+def compile_selectors(selectors: dict) -> SelectorPlan:
+    """
+    Compile a `selectors` config section into a SelectorPlan.
+
+    Args:
+        selectors (dict): Mapping of field names to selector rules.
+
+    Returns:
+        SelectorPlan: The compiled plan.
+
+    Raises:
+        ValueError: If any rule is invalid.
+    """
+    return SelectorPlan(selectors)
@@ -1,21 +1,464 @@
-import hashlib, os
+# HTTP response cache: an in-memory front tier for hot entries over a disk store with
+# a byte budget and LRU eviction. Entries keep their validators (ETag, Last-Modified)
+# so stale entries can be revalidated with a conditional request
+# Two stores are available: one file per URL, or a single SQLite database with
+# compressed bodies for crawls of millions of pages
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from bit_scrapper.utils.logger import setup_logger
 
 CACHE_DIR = ".bitscrapper_cache"
+KEPT_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+CACHE_BACKENDS = ("files", "sqlite")
+
+
+def cache_key(url: str) -> str:
+    return hashlib.md5(url.encode('utf-8')).hexdigest()
+
+
+class CacheEntry:
+    """
+    A cached response.
+
+    Args:
+        url (str): The requested URL.
+        body (str): Response body.
+        headers (dict): Response headers worth keeping (validators, content type).
+        stored_at (float): When the entry was stored or last revalidated.
+    """
+
+    __slots__ = ("url", "body", "headers", "stored_at")
+
+    def __init__(self, url: str, body: str, headers: dict = None, stored_at: float = None):
+        self.url = url
+        self.body = body
+        self.headers = headers or {}
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    @property
+    def size(self) -> int:
+        return len(self.body.encode('utf-8'))
+
+    def to_meta(self) -> dict:
+        return {"url": self.url, "headers": self.headers, "stored_at": self.stored_at}
+
+
+class FileStore:
+    """
+    One `<md5>.html` body plus a `<md5>.json` metadata file per URL.
+
+    The LRU order and sizes are indexed in memory from a single directory scan, and the
+    metadata file's mtime records the last access across runs.
+
+    Args:
+        directory (str): Cache directory, created if missing.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index = OrderedDict()
+        self.total_size = 0
+        entries = []
+        for item in os.scandir(directory):
+            if item.name.endswith(".html"):
+                key = item.name[:-5]
+                meta_path = self._path(key, "json")
+                accessed = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0
+                entries.append((accessed, key, item.stat().st_size))
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total_size += size
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def load(self, key: str) -> CacheEntry | None:
+        if key not in self.index:
+            return None
+        try:
+            with open(self._path(key, "json"), 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(self._path(key, "html"), 'r', encoding='utf-8') as file:
+                body = file.read()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta.get("url"), body, meta.get("headers"), meta.get("stored_at", 0))
+
+    def iter_entries(self):
+        """
+        Yields:
+            CacheEntry: Every entry, least recently used first, without touching it.
+        """
+        for key in list(self.index):
+            entry = self.load(key)
+            if entry is not None:
+                yield entry
+
+    def save(self, key: str, entry: CacheEntry) -> None:
+        with open(self._path(key, "html"), 'w', encoding='utf-8') as file:
+            file.write(entry.body)
+        self.save_meta(key, entry)
+        self.total_size += entry.size - self.index.pop(key, 0)
+        self.index[key] = entry.size
+
+    def save_meta(self, key: str, entry: CacheEntry) -> None:
+        with open(self._path(key, "json"), 'w', encoding='utf-8') as file:
+            json.dump(entry.to_meta(), file)
+
+    def touch(self, key: str) -> None:
+        if key in self.index:
+            self.index.move_to_end(key)
+            try:
+                os.utime(self._path(key, "json"))
+            except OSError:
+                pass
+
+    def delete(self, key: str) -> None:
+        self.total_size -= self.index.pop(key, 0)
+        for extension in ("html", "json"):
+            try:
+                os.remove(self._path(key, extension))
+            except OSError:
+                pass
+
+    def evict(self, max_bytes: int) -> list:
+        """
+        Delete least recently used entries until the store fits in `max_bytes`.
+
+        Returns:
+            list: Keys of the evicted entries.
+        """
+        evicted = []
+        while self.total_size > max_bytes and self.index:
+            key = next(iter(self.index))
+            self.delete(key)
+            evicted.append(key)
+        return evicted
+
+    def close(self) -> None:
+        pass
+
+
+def _get_codec(name: str):
+    """
+    Return (name, compress, decompress) for a body compression codec.
+    """
+    if name == "zstd":
+        try:
+            import zstandard
+            return "zstd", zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+        except ImportError:
+            setup_logger().warning("zstandard is not installed, compressing the cache with gzip")
+            name = "gzip"
+    if name == "gzip":
+        return "gzip", zlib.compress, zlib.decompress
+    if name in (None, "none"):
+        return "none", bytes, bytes
+    raise ValueError(f"Unknown cache compression: {name}")
+
+
+class SQLiteStore:
+    """
+    Every entry packed into one SQLite database, bodies compressed.
+
+    The database runs in WAL mode so other processes can read while this one writes,
+    and least recently used entries are found through an index on the access time.
+
+    Args:
+        directory (str): Cache directory, created if missing.
+        compression (str): Body codec: "gzip", "zstd" or "none".
+    """
+
+    FILENAME = "cache.sqlite3"
+
+    def __init__(self, directory: str = CACHE_DIR, compression: str = "gzip"):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, self.FILENAME)
+        self.codec, self._compress, _ = _get_codec(compression)
+        self._decompressors = {}
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, meta TEXT NOT NULL, codec TEXT NOT NULL, "
+            "body BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.connection.commit()
+        self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _decompress(self, codec: str, body: bytes) -> bytes:
+        if codec not in self._decompressors:
+            self._decompressors[codec] = _get_codec(codec)[2]
+        return self._decompressors[codec](body)
+
+    def load(self, key: str) -> CacheEntry | None:
+        row = self.connection.execute("SELECT meta, codec, body FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        meta = json.loads(row[0])
+        body = self._decompress(row[1], row[2]).decode('utf-8')
+        return CacheEntry(meta.get("url"), body, meta.get("headers"), meta.get("stored_at", 0))
+
+    def iter_entries(self):
+        """
+        Yields:
+            CacheEntry: Every entry, least recently used first, without touching it.
+        """
+        # A cursor of its own, so rows stream in while the connection stays usable
+        cursor = self.connection.execute("SELECT meta, codec, body FROM entries ORDER BY accessed")
+        for meta, codec, body in cursor:
+            meta = json.loads(meta)
+            yield CacheEntry(meta.get("url"), self._decompress(codec, body).decode('utf-8'), meta.get("headers"),
+                             meta.get("stored_at", 0))
+
+    def save(self, key: str, entry: CacheEntry) -> None:
+        body = self._compress(entry.body.encode('utf-8'))
+        previous = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries (key, meta, codec, body, size, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, json.dumps(entry.to_meta()), self.codec, body, len(body), time.time()),
+        )
+        self.connection.commit()
+        self.total_size += len(body) - (previous[0] if previous else 0)
+
+    def save_meta(self, key: str, entry: CacheEntry) -> None:
+        self.connection.execute("UPDATE entries SET meta = ? WHERE key = ?", (json.dumps(entry.to_meta()), key))
+        self.connection.commit()
+
+    def touch(self, key: str) -> None:
+        self.connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+
+    def delete(self, key: str) -> None:
+        row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row:
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.connection.commit()
+            self.total_size -= row[0]
+
+    def evict(self, max_bytes: int) -> list:
+        """
+        Delete least recently used entries until the store fits in `max_bytes`.
+
+        Returns:
+            list: Keys of the evicted entries.
+        """
+        evicted = []
+        while self.total_size > max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_size <= max_bytes:
+                    break
+                self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.total_size -= size
+                evicted.append(key)
+            self.connection.commit()
+        return evicted
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def make_store(backend: str = "files", directory: str = CACHE_DIR, compression: str = "gzip"):
+    """
+    Create a cache store.
+
+    Args:
+        backend (str): One of CACHE_BACKENDS.
+        directory (str): Cache directory.
+        compression (str): Body codec for the sqlite backend.
+
+    Returns:
+        FileStore | SQLiteStore: The store.
+    """
+    if backend == "files":
+        return FileStore(directory)
+    if backend == "sqlite":
+        return SQLiteStore(directory, compression)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class ResponseCache:
+    """
+    Response cache with per-domain TTLs, conditional revalidation and a disk budget.
+
+    Args:
+        config (dict): The "cache" section of the scraper config: enabled, dir, backend
+            ("files" or "sqlite"), compression (sqlite only), ttl (seconds, 0 means always
+            revalidate), domain_ttls ({domain: seconds}), max_bytes (disk budget) and
+            memory_entries (size of the in-memory tier).
+    """
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.directory = config.get("dir", CACHE_DIR)
+        self.backend = config.get("backend", "files")
+        self.compression = config.get("compression", "gzip")
+        if self.backend not in CACHE_BACKENDS:
+            raise ValueError(f"Unknown cache backend: {self.backend}")
+        self.ttl = config.get("ttl", 0)
+        self.domain_ttls = config.get("domain_ttls", {})
+        self.max_bytes = config.get("max_bytes", 1024 ** 3)
+        self.memory_entries = config.get("memory_entries", 256)
+        self.memory = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        self._store = None
+
+    @property
+    def store(self):
+        # Created on first use so a disabled or unused cache never touches the disk
+        if self._store is None:
+            self._store = make_store(self.backend, self.directory, self.compression)
+        return self._store
+
+    def ttl_for(self, url: str) -> float:
+        host = urlparse(url).hostname or ""
+        for domain, ttl in self.domain_ttls.items():
+            if host == domain or host.endswith("." + domain):
+                return ttl
+        return self.ttl
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl_for(entry.url)
+
+    def get(self, url: str) -> CacheEntry | None:
+        """
+        Look up a URL in the memory tier, then on disk.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            CacheEntry | None: The entry, fresh or stale, or None if not cached.
+        """
+        key = cache_key(url)
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+            else:
+                entry = self.store.load(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is not None:
+                self.store.touch(key)
+            return entry
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """
+        Look up a URL, counting a hit when the entry is fresh and a miss otherwise.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            CacheEntry | None: The entry, fresh or stale (check `is_fresh`), or None.
+        """
+        entry = self.get(url)
+        with self._lock:
+            if entry is not None and self.is_fresh(entry):
+                self.stats["hits"] += 1
+                self.stats["bytes_saved"] += entry.size
+            else:
+                self.stats["misses"] += 1
+        return entry
+
+    def iter_entries(self, urls=None):
+        """
+        Read cached entries straight from the store, as stored (fresh or stale), without
+        updating their access times or the hit counters.
+
+        Args:
+            urls (iterable): Only these URLs (uncached ones are skipped), default every entry.
+
+        Yields:
+            CacheEntry: The entries.
+        """
+        if urls is None:
+            yield from self.store.iter_entries()
+            return
+        for url in urls:
+            entry = self.store.load(cache_key(url))
+            if entry is not None:
+                yield entry
+
+    def conditional_headers(self, entry: CacheEntry) -> dict:
+        """
+        Build the conditional request headers that revalidate `entry`.
+        """
+        headers = {}
+        if entry.headers.get("ETag"):
+            headers["If-None-Match"] = entry.headers["ETag"]
+        if entry.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = entry.headers["Last-Modified"]
+        return headers
+
+    def put(self, url: str, body: str, headers=None) -> CacheEntry:
+        """
+        Store a response, evicting least recently used entries beyond the disk budget.
+
+        Args:
+            url (str): Requested URL.
+            body (str): Response body.
+            headers (Mapping): Response headers.
+
+        Returns:
+            CacheEntry: The stored entry.
+        """
+        headers = headers or {}
+        entry = CacheEntry(url, body, {name: headers[name] for name in KEPT_HEADERS if headers.get(name)})
+        key = cache_key(url)
+        with self._lock:
+            self.store.save(key, entry)
+            self._remember(key, entry)
+            for evicted in self.store.evict(self.max_bytes):
+                self.memory.pop(evicted, None)
+                self.stats["evictions"] += 1
+        return entry
+
+    def revalidated(self, entry: CacheEntry, headers=None) -> CacheEntry:
+        """
+        Record a 304 Not Modified for `entry`: restart its TTL and count it as a hit.
+
+        Args:
+            entry (CacheEntry): The stale entry that was revalidated.
+            headers (Mapping): Headers of the 304 response, which may carry new validators.
+
+        Returns:
+            CacheEntry: The refreshed entry.
+        """
+        headers = headers or {}
+        entry.stored_at = time.time()
+        entry.headers.update({name: headers[name] for name in KEPT_HEADERS if headers.get(name)})
+        with self._lock:
+            self.store.save_meta(cache_key(entry.url), entry)
+            self.stats["hits"] += 1
+            self.stats["misses"] -= 1
+            self.stats["revalidated"] += 1
+            self.stats["bytes_saved"] += entry.size
+        return entry
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
 
-def get_cache_path(url: str) -> str:
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
-    filename = hashlib.md5(url.encode('utf-8')).hexdigest()
-    return os.path.join(CACHE_DIR, f"{filename}.html")
-
-def load_from_cache(url: str) -> str | None:
-    path = get_cache_path(url)
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as file:
-            return file.read()
-    return None
-
-def save_to_cache(url: str, content: str) -> None:
-    path = get_cache_path(url)
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
\ No newline at end of file
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
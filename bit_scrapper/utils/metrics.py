@@ -0,0 +1,281 @@
+# Run metrics: counters and latency histograms for the fetch, parse, extract and write stages
+# Exported as a JSON summary and in the Prometheus text format (file or /metrics endpoint).
+# When disabled, every call goes to NullMetrics, whose methods do nothing
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Upper bounds in seconds, as in the Prometheus client defaults plus finer sub-millisecond steps
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "bitscrapper_"
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds.
+
+    Args:
+        buckets (tuple): Sorted bucket upper bounds.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in (capped by the maximum).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and histograms for one run.
+
+    Args:
+        config (dict): The "metrics" section of the scraper config: summary (JSON file
+            written on `export`), prometheus (text file written on `export`) and port
+            (serve /metrics over HTTP while the run lasts).
+    """
+
+    enabled = True
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.summary_path = config.get("summary")
+        self.prometheus_path = config.get("prometheus")
+        self.port = config.get("port")
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.monotonic()
+        self.server = None
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Add `value` to a counter.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Record one duration in a histogram.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str):
+        """
+        Context manager recording the duration of its block in a histogram.
+        """
+        return _Timer(self, name)
+
+    def summary(self) -> dict:
+        """
+        Snapshot of every metric, as written to the JSON summary.
+        """
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                if labels:
+                    counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = value
+                else:
+                    counters[name] = value
+            return {
+                "elapsed_seconds": time.monotonic() - self.started,
+                "counters": counters,
+                "histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {PREFIX}{name} counter")
+                    typed.add(name)
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{PREFIX}{name}_bucket{{le="{le}"}} {cumulative}')
+                lines.append(f"{PREFIX}{name}_sum {histogram.sum}")
+                lines.append(f"{PREFIX}{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = None, host: str = "127.0.0.1") -> int:
+        """
+        Serve the Prometheus text format at /metrics from a background thread.
+
+        Returns:
+            int: The port listened on (useful with port 0).
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, self.port if port is None else port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def export(self) -> None:
+        """
+        Write the configured summary and Prometheus files.
+        """
+        if self.summary_path:
+            _write_atomic(self.summary_path, json.dumps(self.summary(), indent=4))
+        if self.prometheus_path:
+            _write_atomic(self.prometheus_path, self.to_prometheus())
+
+    def close(self) -> None:
+        """
+        Export the configured files and stop the /metrics endpoint.
+        """
+        self.export()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class NullMetrics(Metrics):
+    """
+    Metrics that records nothing, used when metrics are disabled.
+    """
+
+    enabled = False
+    _timer = nullcontext()
+
+    def __init__(self, config: dict = None):
+        super().__init__()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float) -> None:
+        pass
+
+    def timer(self, name: str):
+        return self._timer
+
+    def export(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def make_metrics(config: dict = None) -> Metrics:
+    """
+    Build the metrics registry for a "metrics" config section.
+
+    Args:
+        config (dict): The "metrics" section, None or {"enabled": false} to disable.
+
+    Returns:
+        Metrics: A live registry (serving /metrics when a port is set), or NULL_METRICS.
+    """
+    if config is None or not config.get("enabled", True):
+        return NULL_METRICS
+    metrics = Metrics(config)
+    if metrics.port is not None:
+        metrics.serve()
+    return metrics
+
+
+def _write_atomic(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(temporary, path)
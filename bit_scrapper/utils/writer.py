@@ -1,5 +1,9 @@
 import json
 import csv
+import io
+import textwrap
+
+from bit_scrapper.utils.metrics import NULL_METRICS
 
 def write_json(data: list, filename: str):
     with open(filename, 'w', encoding='utf-8') as f:
@@ -12,3 +16,294 @@ def write_csv(data: list, filename: str):
         writer = csv.DictWriter(f, fieldnames=data[0].keys())
         writer.writeheader()
         writer.writerows(data)
+
+
+class StreamWriter:
+    """
+    Base class for incremental writers.
+
+    Records are serialized as they arrive and flushed to disk every `buffer_size`
+    records, so memory stays constant and the output written so far survives a crash.
+
+    Args:
+        filename (str): Output file path.
+        buffer_size (int): Number of records held in memory between flushes.
+        offset (int): Resume an interrupted output: truncate the file to this byte
+            offset (from a checkpoint) and append after it.
+        count (int): Number of records already in the file when resuming.
+        metrics (Metrics): Receives write_seconds and records_written_total.
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 100, offset: int = None, count: int = 0, metrics=None):
+        self.filename = filename
+        self.metrics = metrics or NULL_METRICS
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.resumed = offset is not None
+        self.count = count if self.resumed else 0
+        if self.resumed:
+            self.file = open(filename, 'r+', newline='', encoding='utf-8')
+            self.file.truncate(offset)
+            self.file.seek(offset)
+        else:
+            self.file = open(filename, 'w', newline='', encoding='utf-8')
+
+    @property
+    def offset(self) -> int:
+        """
+        Byte offset of the data flushed so far.
+        """
+        return self.file.tell()
+
+    def _serialize(self, record: dict) -> str:
+        raise NotImplementedError
+
+    def write(self, record: dict) -> None:
+        with self.metrics.timer("write_seconds"):
+            self.buffer.append(self._serialize(record))
+            self.count += 1
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+        self.metrics.inc("records_written_total")
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer = []
+        self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonLinesWriter(StreamWriter):
+    """
+    Writes one JSON object per line.
+    """
+
+    def _serialize(self, record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class JsonArrayWriter(StreamWriter):
+    """
+    Writes a JSON array incrementally, in the same layout as `write_json`.
+
+    The closing bracket is written on `close`.
+    """
+
+    def __init__(self, filename: str, buffer_size: int = 100, offset: int = None, count: int = 0, metrics=None):
+        super().__init__(filename, buffer_size, offset, count, metrics)
+        if not self.resumed:
+            self.file.write("[")
+
+    def _serialize(self, record: dict) -> str:
+        separator = "\n" if self.count == 0 else ",\n"
+        return separator + textwrap.indent(json.dumps(record, indent=4, ensure_ascii=False), "    ")
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.buffer.append("\n]" if self.count else "]")
+        super().close()
+
+
+class CsvWriter(StreamWriter):
+    """
+    Writes CSV rows incrementally against a declared schema.
+
+    Args:
+        filename (str): Output file path.
+        fieldnames (list): Column names. When omitted they are taken from the first record.
+        buffer_size (int): Number of records held in memory between flushes.
+    """
+
+    def __init__(self, filename: str, fieldnames: list = None, buffer_size: int = 100, offset: int = None, count: int = 0,
+                 metrics=None):
+        super().__init__(filename, buffer_size, offset, count, metrics)
+        self.row = io.StringIO()
+        self.writer = None
+        if fieldnames:
+            self._start(fieldnames)
+
+    def _start(self, fieldnames) -> None:
+        self.fieldnames = list(fieldnames)
+        self.writer = csv.DictWriter(self.row, fieldnames=self.fieldnames, extrasaction="ignore")
+        if not self.resumed:
+            self.writer.writeheader()
+            self.buffer.append(self._take_row())
+
+    def _take_row(self) -> str:
+        value = self.row.getvalue()
+        self.row.seek(0)
+        self.row.truncate()
+        return value
+
+    def _serialize(self, record: dict) -> str:
+        if self.writer is None:
+            self._start(record.keys())
+        self.writer.writerow(record)
+        return self._take_row()
+
+
+def _arrow_type(pa, dtype: str):
+    if dtype.startswith("list<"):
+        return pa.list_(_arrow_type(pa, dtype[5:-1]))
+    return {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}.get(dtype, pa.string())
+
+
+class ColumnarWriter:
+    """
+    Base class for Arrow-based writers that emit records in row-group batches.
+
+    Rows are buffered column by column and converted into one Arrow record batch every
+    `buffer_size` records, so memory is bounded by the batch size. Requires pyarrow.
+
+    Args:
+        filename (str): Output file path.
+        types (dict): Column types by field ("string", "int", "float", "bool" or
+            "list<...>"), as returned by SelectorPlan.column_types. When omitted the
+            schema is inferred from the first batch.
+        buffer_size (int): Number of records per batch.
+        metrics (Metrics): Receives write_seconds and records_written_total.
+    """
+
+    def __init__(self, filename: str, types: dict = None, buffer_size: int = 10000, metrics=None):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(f"{type(self).__name__} requires pyarrow to be installed")
+        self.pa = pyarrow
+        self.filename = filename
+        self.metrics = metrics or NULL_METRICS
+        self.buffer_size = buffer_size
+        self.schema = None
+        if types:
+            self.schema = pyarrow.schema([(field, _arrow_type(pyarrow, dtype)) for field, dtype in types.items()])
+        self.columns = {}
+        self.rows = 0
+        self.count = 0
+        self.sink = None
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _write_batch(self, batch) -> None:
+        raise NotImplementedError
+
+    def write(self, record: dict) -> None:
+        with self.metrics.timer("write_seconds"):
+            if not self.columns:
+                names = self.schema.names if self.schema is not None else list(record.keys())
+                self.columns = {name: [] for name in names}
+            for name, values in self.columns.items():
+                values.append(record.get(name))
+            self.rows += 1
+            self.count += 1
+            if self.rows >= self.buffer_size:
+                self.flush()
+        self.metrics.inc("records_written_total")
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self.schema is None:
+            batch = self.pa.RecordBatch.from_pydict(self.columns)
+            self.schema = batch.schema
+        else:
+            batch = self.pa.RecordBatch.from_pydict(self.columns, schema=self.schema)
+        if self.sink is None:
+            self.sink = self._open(self.schema)
+        self._write_batch(batch)
+        self.columns = {name: [] for name in self.columns}
+        self.rows = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self.sink is None and self.schema is not None:
+            # No records: still produce a valid, empty file
+            self.sink = self._open(self.schema)
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ParquetWriter(ColumnarWriter):
+    """
+    Writes a Parquet file, one row group per batch.
+    """
+
+    def _open(self, schema):
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.filename, schema)
+
+    def _write_batch(self, batch) -> None:
+        self.sink.write_batch(batch)
+
+
+class ArrowWriter(ColumnarWriter):
+    """
+    Writes an Arrow IPC file, one record batch per batch.
+    """
+
+    def _open(self, schema):
+        return self.pa.ipc.new_file(self.filename, schema)
+
+    def _write_batch(self, batch) -> None:
+        self.sink.write_batch(batch)
+
+
+STREAM_WRITERS = {
+    "json": JsonArrayWriter,
+    "jsonl": JsonLinesWriter,
+    "csv": CsvWriter,
+    "parquet": ParquetWriter,
+    "arrow": ArrowWriter,
+}
+
+def open_writer(format: str, filename: str, fieldnames: list = None, buffer_size: int = None, types: dict = None,
+                offset: int = None, count: int = 0, metrics=None):
+    """
+    Open an incremental writer for an output format.
+
+    Args:
+        format (str): One of STREAM_WRITERS.
+        filename (str): Output file path.
+        fieldnames (list): Declared columns, used by schema-based formats such as CSV.
+        buffer_size (int): Number of records held in memory between flushes, or per
+            batch for columnar formats. Defaults to the writer's own default.
+        types (dict): Column types, used by the columnar formats (parquet, arrow).
+        offset (int): Resume an interrupted output at this byte offset.
+        count (int): Number of records already written when resuming.
+        metrics (Metrics): Receives write timings and record counts.
+
+    Returns:
+        StreamWriter | ColumnarWriter: The writer, usable as a context manager.
+    """
+    if format not in STREAM_WRITERS:
+        raise ValueError(f"Unknown output format: {format}")
+    options = {"buffer_size": buffer_size} if buffer_size else {}
+    if metrics is not None:
+        options["metrics"] = metrics
+    if format in ("parquet", "arrow"):
+        if offset is not None:
+            raise ValueError(f"Resuming is not supported for the {format} format")
+        return STREAM_WRITERS[format](filename, types, **options)
+    if offset is not None:
+        options.update(offset=offset, count=count)
+    if format == "csv":
+        return CsvWriter(filename, fieldnames, **options)
+    return STREAM_WRITERS[format](filename, **options)
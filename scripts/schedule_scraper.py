@@ -1,20 +1,24 @@
-import schedule
-import time
-import subprocess
+from bit_scrapper.core.scheduler import Job, Scheduler
 
-def run_scraper():
-    subprocess.run([
-        "python", "-m", "bit_scrapper.cli.main",
-        "--config", "examples/sample_config.json",
-        "--url", "https://target_domain.com",
-        "--format", "json",
-        "--output", "output"
-    ])
-
-# Scheduling once a day, at 9 AM
-schedule.every().day.at("09:00").do(run_scraper)
+# Runs in-process: the scraper, its connections and its robots.txt policies stay warm
+# between runs. For several jobs use `python -m bit_scrapper.cli.daemon --jobs jobs.json`
+job = Job({
+    "name": "daily",
+    "config": "examples/sample_config.json",
+    "url": "https://target_domain.com",
+    "format": "json",
+    "output": "output",
+    # Only the records added, changed or deleted since the previous run
+    "incremental": True,
+    # Scheduling once a day, at 9 AM
+    "at": "09:00",
+})
+scheduler = Scheduler([job], workers=1)
 
 print("Bitscrapper scheduler started. Running at 9 AM daily.")
-while True:
-    schedule.run_pending()
-    time.sleep(60)
\ No newline at end of file
+try:
+    scheduler.serve_forever(poll=60)
+except KeyboardInterrupt:
+    pass
+finally:
+    scheduler.stop()
@@ -2,14 +2,17 @@
 import argparse
 from bit_scrapper.config.loader import load_config
 from bit_scrapper.core.scraper import BitScrapper
-from bit_scrapper.utils.writer import write_csv, write_json
+from bit_scrapper.core.frontier import Crawler, read_seeds
+from bit_scrapper.utils.writer import STREAM_WRITERS, open_writer
 
 def main():
     parser = argparse.ArgumentParser(description="BitScrapper CLI - Core Engine")
-    parser.add_argument("--url", type=str, help="The URL to scrape", required=True)
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--url", type=str, help="The URL to scrape")
+    sources.add_argument("--input-file", type=str, help="File of seed URLs, one per line ('-' for stdin)")
     parser.add_argument("--config", type=str, help="Path to the JSON configuration file", required=True)
     parser.add_argument("--output", type=str, default="output.json", help="Output file path")
-    parser.add_argument("--format", type=str, choices=["json", "csv"], default="json", help="Output format")
+    parser.add_argument("--format", type=str, choices=list(STREAM_WRITERS), default="json", help="Output format")
 
     args = parser.parse_args()
 
@@ -19,11 +22,16 @@ def main():
     # Init the scraper
     bitscrapper = BitScrapper(config)
 
-    # Execute the operation
-    results = bitscrapper.run(args.url)
-
-    if args.format == "json": write_json(results, args.output)
-    else: write_csv(results, args.output)
+    # Execute the operation, streaming records to the output as they are scraped
+    if args.input_file:
+        crawler = Crawler(bitscrapper, config.get("crawl"))
+        crawler.add_seeds(read_seeds(args.input_file))
+        records = crawler.iter_records()
+    else:
+        records = bitscrapper.iter_records(args.url)
+    with bitscrapper, open_writer(args.format, args.output, fieldnames=list(config["selectors"]), types=bitscrapper.plan.column_types()) as writer:
+        for record in records:
+            writer.write(record)
 
     print(f"Scraping completed. Output written to {args.output}")
 
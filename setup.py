@@ -1,10 +1,16 @@
 from setuptools import setup, find_packages
 
 with open('requirements.txt', encoding='utf-16') as f:
-    requirements = [line.strip() for line in f if line.strip()]
+    requirements = [line.strip() for line in f if line.strip() and not line.startswith('#')]
 
 setup(
     name='bit_scrapper',
     packages=find_packages(),
     install_requires=requirements,
+    # Optional backends, imported only when the config asks for them
+    extras_require={
+        'lxml': ['lxml'],
+        'html5lib': ['html5lib'],
+        'parquet': ['pyarrow'],
+    },
 )
\ No newline at end of file
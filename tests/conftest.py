@@ -0,0 +1,63 @@
+# Fixtures shared by the test modules
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class LocalServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server on a free localhost port that answers every GET with
+    `respond(request)`, counting the connections it accepts.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, respond):
+        super().__init__(("127.0.0.1", 0), PageHandler)
+        self.respond = respond
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so connection reuse can be observed
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, body = self.server.respond(self)
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """
+    Starts a LocalServer per call, `local_server(respond)`, where `respond` maps the
+    request handler (path, headers) to a (status, html) pair. Servers stop after the test.
+    """
+    servers = []
+
+    def start(respond) -> LocalServer:
+        server = LocalServer(respond)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.core.async_scraper import AsyncBitScrapper
+
+TOTAL_PAGES = 5
+requested = []
+
+
+def listing(request):
+    page = int(request.path.split("page=")[1]) if "page=" in request.path else 1
+    requested.append(page)
+    if page > TOTAL_PAGES:
+        return 404, ""
+    return 200, f"<html><body><h1>Page {page}</h1></body></html>"
+
+
+@pytest.fixture
+def server(local_server):
+    return local_server(listing).url
+
+
+def offset_config(base_url, max_pages):
+    return {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": True, "strategy": "offset", "base_url": f"{base_url}/list", "max_pages": max_pages},
+        "respect_robots": False,
+        "retry": {"max_attempts": 1},
+    }
+
+
+def test_arun_matches_run(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = offset_config(server, TOTAL_PAGES + 3)
+    expected = BitScrapper(dict(config)).run(f"{server}/list")
+    result = AsyncBitScrapper(dict(config), concurrency=4).run(f"{server}/list")
+    assert result == expected
+    assert [r["title"] for r in result] == [f"Page {n}" for n in range(1, TOTAL_PAGES + 1)]
+
+
+def test_concurrency_limits_are_respected(monkeypatch):
+    config = {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com/list", "max_pages": 12},
+        "respect_robots": False,
+    }
+    scraper = AsyncBitScrapper(config, concurrency=6, per_host=3)
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def slow_fetch(url):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        return "<h1>ok</h1>"
+
+    monkeypatch.setattr(scraper, "fetch_url", slow_fetch)
+    result = scraper.run("http://fake-url.com/list")
+    assert len(result) == 12
+    assert 1 < in_flight["peak"] <= 3
+
+
+def test_middleware_is_built_on_first_use_with_pools_for_per_host():
+    config = {"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}}
+    scraper = AsyncBitScrapper(config, per_host=32)
+    assert scraper._middleware is None
+    assert scraper.middleware.pool_maxsize == 32
+    assert scraper.middleware is scraper.middleware
+    scraper.close()
+
+
+def test_iter_records_streams_in_page_order(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scraper = AsyncBitScrapper(offset_config(server, TOTAL_PAGES + 3), concurrency=4)
+    titles = [record["title"] for record in scraper.iter_records(f"{server}/list")]
+    assert titles == [f"Page {n}" for n in range(1, TOTAL_PAGES + 1)]
+
+
+def test_offset_window_stops_shortly_after_the_end(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    requested.clear()
+    config = offset_config(server, 500)
+    config["pagination"]["window"] = 3
+    result = AsyncBitScrapper(config, concurrency=3).run(f"{server}/list")
+    assert len(result) == TOTAL_PAGES
+    # Pages past the end are only fetched within one window
+    assert max(requested) <= TOTAL_PAGES + 3
+    assert len(requested) <= TOTAL_PAGES + 3
+
+
+def test_fetches_still_running_at_the_end_finish_before_iteration_returns(monkeypatch):
+    config = {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com/list", "max_pages": 8},
+        "respect_robots": False,
+    }
+    scraper = AsyncBitScrapper(config, concurrency=4, per_host=4)
+    running = []
+
+    def fetch(url):
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        if page == 2:
+            return ""
+        running.append(page)
+        time.sleep(0.2 if page > 2 else 0)
+        running.remove(page)
+        return f"<h1>Page {page}</h1>"
+
+    monkeypatch.setattr(scraper, "fetch_url", fetch)
+    assert [record["title"] for record in scraper.iter_records("http://fake-url.com/list")] == ["Page 1"]
+    assert running == []
+
+
+def test_stop_on_empty_record(monkeypatch):
+    config = {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com/list",
+                       "max_pages": 50, "window": 4, "stop_on_empty_record": True},
+        "respect_robots": False,
+    }
+    scraper = AsyncBitScrapper(config, concurrency=4)
+
+    def fetch(url):
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        return f"<h1>Page {page}</h1>" if page <= 6 else "<p>No results</p>"
+
+    monkeypatch.setattr(scraper, "fetch_url", fetch)
+    assert [r["title"] for r in scraper.run("http://fake-url.com/list")] == [f"Page {n}" for n in range(1, 7)]
@@ -0,0 +1,144 @@
+import json
+import sys
+
+import pytest
+from bit_scrapper.cli import main as cli
+from bit_scrapper.core.checkpoint import Checkpoint, write_checkpointed
+from bit_scrapper.core.frontier import Crawler
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.utils.cache import ResponseCache
+from bit_scrapper.utils.writer import open_writer
+
+def test_checkpoint_replays_commits_and_ignores_torn_line(tmp_path):
+    path = str(tmp_path / "out.checkpoint")
+    checkpoint = Checkpoint(path)
+    checkpoint.mark_queued("https://a.com/", 0)
+    checkpoint.mark_done("https://a.com/")
+    checkpoint.commit(10, 1, {"url": "https://a.com/?page=2", "page": 2})
+    checkpoint.mark_done("https://a.com/x")
+    checkpoint.commit(20, 2)
+    with open(path, "a") as file:
+        file.write('{"offset": 30, "cou')
+
+    resumed = Checkpoint(path, resume=True)
+    assert resumed.resumed and not resumed.complete
+    assert (resumed.offset, resumed.count) == (20, 2)
+    assert resumed.done == {"https://a.com/", "https://a.com/x"}
+    assert resumed.queued == [("https://a.com/", 0)]
+    assert resumed.cursor is None
+
+def test_torn_line_is_cut_off_before_the_next_commit(tmp_path):
+    path = str(tmp_path / "out.checkpoint")
+    checkpoint = Checkpoint(path)
+    checkpoint.mark_done("https://a.com/u1")
+    checkpoint.commit(10, 1, {"url": "https://a.com/u2", "page": 2})
+    with open(path, "a") as file:
+        file.write('{"offset": 20, "cou')
+
+    # Crash, resume, commit twice, crash mid-commit again, resume again
+    resumed = Checkpoint(path, resume=True)
+    resumed.mark_done("https://a.com/u2")
+    resumed.commit(20, 2, {"url": "https://a.com/u3", "page": 3})
+    resumed.mark_done("https://a.com/u3")
+    resumed.commit(30, 3, {"url": "https://a.com/u4", "page": 4})
+    with open(path, "a") as file:
+        file.write('{"offset": 40')
+
+    again = Checkpoint(path, resume=True)
+    assert (again.offset, again.count) == (30, 3)
+    assert again.cursor == {"url": "https://a.com/u4", "page": 4}
+    assert again.done == {"https://a.com/u1", "https://a.com/u2", "https://a.com/u3"}
+    with open(path) as file:
+        assert [json.loads(line)["count"] for line in file] == [1, 2, 3]
+
+def test_resumed_writers_continue_after_last_commit(tmp_path):
+    records = [{"n": i} for i in range(5)]
+    for format in ("jsonl", "json", "csv"):
+        complete = str(tmp_path / f"complete.{format}")
+        with open_writer(format, complete, fieldnames=["n"]) as writer:
+            for record in records:
+                writer.write(record)
+
+        filename = str(tmp_path / f"out.{format}")
+        checkpoint = Checkpoint(f"{filename}.checkpoint")
+        writer = open_writer(format, filename, fieldnames=["n"], buffer_size=1)
+        for record in records[:3]:
+            writer.write(record)
+        checkpoint.commit(writer.offset, writer.count)
+        writer.write(records[3])  # Written after the last commit, then the run dies
+        writer.file.close()
+
+        checkpoint = Checkpoint(f"{filename}.checkpoint", resume=True)
+        with open_writer(format, filename, fieldnames=["n"], offset=checkpoint.offset, count=checkpoint.count) as writer:
+            write_checkpointed(records[3:], writer, checkpoint)
+        assert open(filename).read() == open(complete).read()
+        assert Checkpoint(f"{filename}.checkpoint", resume=True).complete
+
+def test_crawler_resumes_without_refetching_done_urls(tmp_path, monkeypatch):
+    site = {
+        "https://a.com/": '<h1>Home</h1><a class="item" href="/x">x</a><a class="item" href="/y">y</a>',
+        "https://a.com/x": '<h1>X</h1>',
+        "https://a.com/y": '<h1>Y</h1>',
+    }
+    config = {"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}}
+    path = str(tmp_path / "crawl.checkpoint")
+    filename = str(tmp_path / "out.jsonl")
+
+    scraper = BitScrapper(config)
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: site[url])
+    checkpoint = Checkpoint(path)
+    crawler = Crawler(scraper, {"max_depth": 1, "follow": "a.item"}, checkpoint)
+    crawler.add_seeds(["https://a.com/"])
+    writer = open_writer("jsonl", filename)
+    records = crawler.iter_records()
+    writer.write(next(records))
+    writer.flush()
+    checkpoint.commit(writer.offset, writer.count)
+    writer.write(next(records))  # Lost: not committed
+    writer.file.close()
+
+    fetched = []
+    scraper = BitScrapper(config)
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: fetched.append(url) or site[url])
+    checkpoint = Checkpoint(path, resume=True)
+    crawler = Crawler(scraper, {"max_depth": 1, "follow": "a.item"}, checkpoint)
+    assert crawler.add_seeds(["https://a.com/"]) == 0
+    with open_writer("jsonl", filename, offset=checkpoint.offset, count=checkpoint.count) as writer:
+        assert write_checkpointed(crawler.iter_records(), writer, checkpoint) == 3
+    assert sorted(fetched) == ["https://a.com/x", "https://a.com/y"]
+    with open(filename) as file:
+        assert sorted(json.loads(line)["title"] for line in file) == ["Home", "X", "Y"]
+
+def test_iter_records_sets_cursor_before_each_record(monkeypatch):
+    scraper = BitScrapper({
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"strategy": "offset", "base_url": "https://a.com/list", "param": "page", "max_pages": 3},
+    })
+    fetched = []
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: fetched.append(url) or f"<h1>{url}</h1>")
+    records = scraper.iter_records("https://a.com/list?page=2", start_page=2)
+    assert next(records)["title"] == "https://a.com/list?page=2"
+    assert scraper.cursor == {"url": "https://a.com/list?page=3", "page": 3}
+    assert [record["title"] for record in records] == ["https://a.com/list?page=3"]
+    assert fetched == ["https://a.com/list?page=2", "https://a.com/list?page=3"]
+
+
+@pytest.mark.parametrize("flags, kept", [([], False), (["--checkpoint"], True)])
+def test_cli_checkpoints_only_when_asked(tmp_path, monkeypatch, flags, kept):
+    config = {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": False},
+        "respect_robots": False,
+        "cache": {"dir": str(tmp_path / "cache"), "ttl": 3600},
+    }
+    cache = ResponseCache(config["cache"])
+    cache.put("http://shop.test/", "<h1>Shop</h1>", {"Content-Type": "text/html"})
+    cache.close()
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config))
+    output = tmp_path / "out"
+    monkeypatch.setattr(sys, "argv", ["bit_scrapper", "--config", str(config_path), "--url", "http://shop.test/",
+                                      "--format", "jsonl", "--output", str(output)] + flags)
+    cli.main()
+    assert (tmp_path / "out.jsonl").read_text() == '{"title": "Shop"}\n'
+    assert (tmp_path / "out.jsonl.checkpoint").exists() == kept
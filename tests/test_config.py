@@ -8,4 +8,35 @@ def test_valid_config_loads():
 
 def test_invalid_path():
     with pytest.raises(FileNotFoundError):
-        load_config("invalid/path/config.json")
\ No newline at end of file
+        load_config("invalid/path/config.json")
+
+def test_invalid_selector_fails_at_load(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{"selectors": {"title": {"type": "css", "value": "h1[["}}, "pagination": {"enabled": false}}')
+    with pytest.raises(ValueError):
+        load_config(str(path))
+
+def test_validation_is_cached_by_mtime_and_hash(tmp_path, monkeypatch):
+    from bit_scrapper.config import loader
+    path = tmp_path / "config.json"
+    path.write_text('{"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": false}}')
+    cache = str(tmp_path / "configs.json")
+    calls = []
+    validate = loader.validate_config
+    monkeypatch.setattr(loader, "validate_config", lambda config: calls.append(config) or validate(config))
+    load_config(str(path), cache)
+    loader._validated.clear()  # As a new process would, reading the cache from disk
+    assert load_config(str(path), cache)["selectors"]["title"]["value"] == "h1"
+    assert len(calls) == 1
+
+    path.write_text('{"selectors": {"title": {"type": "css", "value": "h1[["}}, "pagination": {"enabled": false}}')
+    with pytest.raises(ValueError):
+        load_config(str(path), cache)
+    assert len(calls) == 2
+
+def test_cli_import_skips_heavy_modules():
+    import subprocess
+    import sys
+    code = "import sys, bit_scrapper.cli.main; print(sorted({'requests', 'bs4', 'jsonschema'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,84 @@
+import socket
+import time
+from concurrent.futures import wait
+from unittest.mock import patch
+
+import pytest
+from bit_scrapper.core.connections import DNSCache
+from bit_scrapper.core.middleware import Middleware
+from bit_scrapper.utils.metrics import Metrics
+
+
+def echo(request):
+    return 200, f"<h1>{request.headers['Host']}{request.path}</h1>"
+
+
+@pytest.fixture
+def server(local_server):
+    return local_server(echo)
+
+
+def shop(server, metrics):
+    # shop.test only exists in the hosts map
+    middleware = Middleware({"dns": {"hosts": {"shop.test": "127.0.0.1"}}}, metrics)
+    return middleware, f"http://shop.test:{server.server_address[1]}"
+
+
+def test_dns_cache_keeps_answers_for_their_ttl():
+    metrics = Metrics()
+    dns = DNSCache({"ttl": 0.2, "hosts": {"Pinned.test": ["10.0.0.1", "10.0.0.2"]}}, metrics)
+    answer = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.7", 0))] * 2
+    with patch("socket.getaddrinfo", return_value=answer) as getaddrinfo:
+        assert dns.resolve("a.test") == ["192.0.2.7"]
+        assert dns.resolve("A.test.") == ["192.0.2.7"]
+        assert getaddrinfo.call_count == 1
+        time.sleep(0.25)
+        dns.resolve("a.test")
+        assert getaddrinfo.call_count == 2
+        assert dns.resolve("pinned.test") == ["10.0.0.1", "10.0.0.2"]
+        assert dns.resolve("127.0.0.1") == ["127.0.0.1"]
+        assert getaddrinfo.call_count == 2
+    assert metrics.summary()["counters"]["dns_lookups_total"] == {"result=hit": 1, "result=miss": 2, "result=override": 1}
+
+
+def test_fetches_resolve_through_the_cache_and_time_each_phase(server):
+    metrics = Metrics()
+    middleware, base_url = shop(server, metrics)
+    for page in range(3):
+        assert middleware.fetch_with_retries(f"{base_url}/{page}", {}) == f"<h1>shop.test:{server.server_address[1]}/{page}</h1>"
+    middleware.close()
+    histograms = metrics.summary()["histograms"]
+    assert histograms["dns_seconds"]["count"] == 1
+    assert histograms["connect_seconds"]["count"] == 1
+    assert histograms["ttfb_seconds"]["count"] == 3
+    assert server.connections == 1
+
+
+def test_prewarm_opens_the_connection_the_next_fetch_reuses(server):
+    metrics = Metrics()
+    middleware, base_url = shop(server, metrics)
+    warmed = []
+    futures = middleware.prewarm([f"{base_url}/1", f"{base_url}/2"], hook=warmed.append)
+    assert len(futures) == 1
+    wait(futures)
+    assert warmed == [f"{base_url}/1"]
+    assert server.connections == 1
+    # The pool already holds an idle connection, so a second warm-up opens nothing
+    wait(middleware.prewarm([f"{base_url}/3"]))
+    assert middleware.fetch_with_retries(f"{base_url}/1", {})
+    middleware.close()
+    summary = metrics.summary()
+    assert summary["counters"]["connections_prewarmed_total"] == 1
+    assert summary["histograms"]["connect_seconds"]["count"] == 1
+    assert server.connections == 1
+
+
+def test_prewarm_failures_are_only_counted():
+    metrics = Metrics()
+    middleware = Middleware({"dns": {"hosts": {"down.test": "127.0.0.1"}}}, metrics)
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+    wait(middleware.prewarm([f"http://down.test:{port}/"]))
+    middleware.close()
+    assert metrics.summary()["counters"]["prewarm_failures_total"] == 1
@@ -0,0 +1,53 @@
+from bit_scrapper.core.dedup import Deduplicator, FingerprintIndex, make_deduplicator, record_key
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.utils.metrics import Metrics
+
+records = [
+    {"title": "A", "price": "1"},
+    {"title": "B", "price": "2"},
+    {"price": "1", "title": "A"},
+    {"title": "A", "price": "3"},
+]
+
+def test_whole_record_key_ignores_field_order():
+    assert record_key(records[0]) == record_key(records[2])
+    assert record_key(records[0]) != record_key(records[3])
+
+def test_key_fields_choose_what_counts_as_a_duplicate():
+    with Deduplicator({"fields": ["title"]}) as dedup:
+        assert [r["price"] for r in dedup.filter(records)] == ["1", "2"]
+        assert dedup.stats == {"unique": 2, "duplicates": 2}
+
+def test_index_spills_to_disk_and_stays_exact():
+    index = FingerprintIndex(memory_mb=0.001)
+    assert index.max_entries < 20
+    assert all(index.add(n) for n in range(500))
+    assert index.spills > 0 and len(index.memory) < index.max_entries
+    assert not any(index.add(n) for n in range(500))
+    assert len(index) == 500
+    index.close()
+
+def test_index_with_path_persists_across_runs(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    with Deduplicator({"path": path}) as dedup:
+        assert len(list(dedup.filter(records))) == 3
+    with Deduplicator({"path": path}) as dedup:
+        assert list(dedup.filter(records + [{"title": "C"}])) == [{"title": "C"}]
+
+def test_duplicates_are_counted_in_metrics():
+    metrics = Metrics()
+    with Deduplicator({}, metrics) as dedup:
+        list(dedup.filter(records))
+    assert metrics.summary()["counters"]["records_deduplicated_total"] == 1
+
+def test_run_drops_duplicate_pages(monkeypatch):
+    assert make_deduplicator(None) is None
+    assert make_deduplicator({"enabled": False}) is None
+    scraper = BitScrapper({
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com/list", "max_pages": 4},
+        "dedup": {"fields": ["title"]},
+    })
+    # Overlapping pagination: pages 2 and 3 repeat the first listing
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: "<h1>Same</h1>" if url.endswith(("1", "2", "3")) else "<h1>Last</h1>")
+    assert scraper.run("http://fake-url.com/list?page=1") == [{"title": "Same"}, {"title": "Last"}]
@@ -0,0 +1,267 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from bit_scrapper.core.distributed import Coordinator, RedisQueue, SQLiteQueue, Worker
+from bit_scrapper.core.scraper import BitScrapper
+
+PAGES = 6
+
+
+def site(request):
+    # Slow enough that one worker cannot drain the queue before the others start
+    time.sleep(0.1)
+    if request.path.startswith("/list"):
+        page = int(request.path.split("page=")[1])
+        return 200, f'<h1>List {page}</h1><a class="item" href="/item/{page}">item</a>'
+    if request.path.startswith("/item/"):
+        return 200, f"<h1>Item {request.path.rsplit('/', 1)[1]}</h1>"
+    return 404, ""
+
+
+class FakeRedis:
+    """
+    Dict-backed stand-in for the redis.Redis commands RedisQueue uses. A transaction
+    holds one lock from its first read to EXEC, which is what WATCH guarantees a real
+    client; a pipeline's queued writes apply only when it executes.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.RLock()
+        self.lose_next_exec = False
+
+    def _get(self, key, kind):
+        return self.data.setdefault(key, kind())
+
+    def sadd(self, key, *members):
+        values = self._get(key, set)
+        size = len(values)
+        values.update(members)
+        return len(values) - size
+
+    def srem(self, key, *members):
+        values = self._get(key, set)
+        removed = values & set(members)
+        values -= removed
+        return len(removed)
+
+    def sismember(self, key, member):
+        return int(member in self._get(key, set))
+
+    def scard(self, key):
+        return len(self._get(key, set))
+
+    def hset(self, key, field, value):
+        self._get(key, dict)[field] = value
+
+    def hget(self, key, field):
+        return self._get(key, dict).get(field)
+
+    def hdel(self, key, *fields):
+        return sum(self._get(key, dict).pop(field, None) is not None for field in fields)
+
+    def hincrby(self, key, field, amount=1):
+        values = self._get(key, dict)
+        values[field] = int(values.get(field, 0)) + amount
+        return values[field]
+
+    def zadd(self, key, mapping):
+        self._get(key, dict).update(mapping)
+
+    def zrem(self, key, *members):
+        return sum(self._get(key, dict).pop(member, None) is not None for member in members)
+
+    def zscore(self, key, member):
+        return self._get(key, dict).get(member)
+
+    def zcard(self, key):
+        return len(self._get(key, dict))
+
+    @staticmethod
+    def _in_range(score, low, high):
+        def bound(value):
+            value = str(value)
+            return (True, float(value[1:])) if value.startswith("(") else (False, float(value))
+        low_open, low = bound(low)
+        high_open, high = bound(high)
+        return (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+
+    def zrangebyscore(self, key, low, high, start=None, num=None):
+        members = sorted((score, member) for member, score in self._get(key, dict).items() if self._in_range(score, low, high))
+        members = [member for _, member in members]
+        return members[start:start + num] if num is not None else members
+
+    def zcount(self, key, low, high):
+        return len(self.zrangebyscore(key, low, high))
+
+    def rpush(self, key, *values):
+        items = self._get(key, list)
+        items.extend(values)
+        return len(items)
+
+    def lrange(self, key, start, end):
+        return self._get(key, list)[start:end + 1]
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        with self.lock:
+            pipe = FakePipeline(self)
+            value = func(pipe)
+            result = pipe.execute()
+        return value if value_from_callable else result
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = None
+
+    def multi(self):
+        self.queued = []
+
+    def execute(self):
+        if self.client.lose_next_exec:
+            self.client.lose_next_exec = False
+            raise ConnectionError("Connection lost before EXEC")
+        return [command(*args, **kwargs) for command, args, kwargs in self.queued or ()]
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+        if self.queued is None:
+            return command
+        return lambda *args, **kwargs: self.queued.append((command, args, kwargs))
+
+
+@pytest.fixture
+def server(local_server):
+    return local_server(site).url
+
+
+def site_config(tmp_path):
+    return {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": False},
+        "respect_robots": False,
+        "retry": {"max_attempts": 1},
+        "cache": {"enabled": False, "dir": str(tmp_path / "cache")},
+        "crawl": {"max_depth": 1, "follow": "a.item", "url_field": "url"},
+    }
+
+
+def test_queue_deduplicates_and_hides_leased_urls(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3"))
+    assert queue.push([("http://a.com/1", 0), ("http://A.com/1#top", 0), ("http://a.com/2", 0)]) == 2
+    first = queue.lease("w1", 1)
+    second = queue.lease("w2", 5)
+    assert [lease.url for lease in first + second] == ["http://a.com/1", "http://a.com/2"]
+    assert queue.lease("w3", 5) == []
+    assert queue.pending() == 2
+
+
+def test_expired_lease_is_leased_again_and_completion_is_idempotent(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3"), visibility_timeout=0.05)
+    queue.push([("http://a.com/1", 0)])
+    crashed = queue.lease("w1")[0]
+    time.sleep(0.1)
+    retried = queue.lease("w2")[0]
+    assert retried.url == crashed.url and retried.attempts == 2
+    # The slow first worker finishes after all; only one record is kept
+    assert queue.complete(crashed, {"title": "one"}, [("http://a.com/2", 1)])
+    assert not queue.complete(retried, {"title": "one"}, [("http://a.com/2", 1)])
+    assert not queue.fail(retried)
+    assert list(queue.results()) == [{"title": "one"}]
+    assert queue.stats() == {"queued": 1, "leased": 0, "done": 1, "failed": 0}
+
+
+def test_failed_lease_is_requeued_until_max_attempts(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3"), max_attempts=2)
+    queue.push([("http://a.com/1", 0)])
+    assert queue.fail(queue.lease("w1")[0])
+    assert queue.fail(queue.lease("w1")[0])
+    assert queue.lease("w1") == []
+    assert queue.stats()["failed"] == 1
+    assert queue.pending() == 0
+
+
+def test_redis_lease_expires_back_into_the_queue_until_max_attempts():
+    queue = RedisQueue(FakeRedis(), visibility_timeout=0.05, max_attempts=2)
+    assert queue.push([("http://a.com/1", 0), ("http://A.com/1#top", 0), ("http://a.com/2", 1)]) == 2
+    crashed = queue.lease("w1")[0]
+    other = queue.lease("w2", 5)
+    assert [crashed.url] + [lease.url for lease in other] == ["http://a.com/1", "http://a.com/2"]
+    assert queue.lease("w3") == []
+    assert queue.stats() == {"queued": 0, "leased": 2, "done": 0, "failed": 0}
+    assert queue.complete(other[0], {"title": "two"}, [("http://a.com/1", 2), ("http://a.com/3", 2)])
+    time.sleep(0.1)
+    retried = {lease.url: lease for lease in queue.lease("w2", 5)}
+    assert {url: lease.attempts for url, lease in retried.items()} == {"http://a.com/1": 2, "http://a.com/3": 1}
+    assert not queue.fail(crashed)
+    assert queue.complete(retried["http://a.com/3"], None)
+    time.sleep(0.1)
+    # Leased max_attempts times without completing: given up, not leased a third time
+    assert queue.lease("w3", 5) == []
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 2, "failed": 1}
+    assert queue.pending() == 0
+    assert not queue.complete(other[0], {"title": "two"})
+    assert list(queue.results()) == [{"title": "two"}]
+
+
+def test_redis_operation_lost_before_exec_changes_nothing():
+    client = FakeRedis()
+    queue = RedisQueue(client)
+    queue.push([("http://a.com/1", 0)])
+    client.lose_next_exec = True
+    with pytest.raises(ConnectionError):
+        queue.lease("w1")
+    lease = queue.lease("w1")[0]
+    assert (lease.url, lease.attempts) == ("http://a.com/1", 1)
+    client.lose_next_exec = True
+    with pytest.raises(ConnectionError):
+        queue.complete(lease, {"title": "one"}, [("http://a.com/2", 1)])
+    assert queue.stats() == {"queued": 0, "leased": 1, "done": 0, "failed": 0}
+    assert queue.complete(lease, {"title": "one"}, [("http://a.com/2", 1)])
+    assert queue.stats() == {"queued": 1, "leased": 0, "done": 1, "failed": 0}
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_queue_keeps_the_page_of_next_page_links(tmp_path, backend):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3")) if backend == "sqlite" else RedisQueue(FakeRedis())
+    queue.push([("http://a.com/list?page=1", 0)])
+    first = queue.lease("w1")[0]
+    assert queue.complete(first, None, [("http://a.com/list?page=2", 0, 2)])
+    assert [(lease.url, lease.page) for lease in queue.lease("w1")] == [("http://a.com/list?page=2", 2)]
+    assert first.page == 1
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_worker_crawls_links_through_the_queue(server, tmp_path, backend):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3")) if backend == "sqlite" else RedisQueue(FakeRedis())
+    coordinator = Coordinator(queue)
+    assert coordinator.seed([f"{server}/list?page={page}" for page in range(1, PAGES + 1)]) == PAGES
+    config = site_config(tmp_path)
+    stats = Worker(BitScrapper(config), queue, config["crawl"]).run()
+    assert stats == {"completed": 2 * PAGES, "duplicates": 0, "failed": 0}
+    titles = sorted(record["title"] for record in coordinator.iter_results())
+    assert titles == sorted([f"List {n}" for n in range(1, PAGES + 1)] + [f"Item {n}" for n in range(1, PAGES + 1)])
+
+
+def test_local_worker_processes_share_one_queue(server, tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(site_config(tmp_path)))
+    seeds = tmp_path / "seeds.txt"
+    seeds.write_text("".join(f"{server}/list?page={page}\n" for page in range(1, PAGES + 1)))
+    output = tmp_path / "out"
+    subprocess.run([sys.executable, "-m", "bit_scrapper.cli.distributed", "coordinator", "--config", str(config_path),
+                    "--queue", str(tmp_path / "queue.sqlite3"), "--input-file", str(seeds), "--local-workers", "3",
+                    "--format", "jsonl", "--output", str(output)], check=True, capture_output=True, timeout=120)
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert len(records) == 2 * PAGES
+    assert len({record["url"] for record in records}) == 2 * PAGES
+    workers = SQLiteQueue(str(tmp_path / "queue.sqlite3")).connection.execute("SELECT DISTINCT worker FROM urls").fetchall()
+    assert len(workers) > 1
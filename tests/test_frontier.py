@@ -0,0 +1,76 @@
+from bit_scrapper.core.frontier import Crawler, Frontier, URLIndex, normalize_url, read_seeds
+from bit_scrapper.core.scraper import BitScrapper
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80/a?b=2&a=1#frag") == "http://example.com/a?a=1&b=2"
+    assert normalize_url("https://example.com") == "https://example.com/"
+    assert normalize_url("https://example.com:8443/x") == "https://example.com:8443/x"
+
+def test_url_index_dedups_and_persists(tmp_path):
+    path = str(tmp_path / "seen.idx")
+    index = URLIndex(path)
+    assert index.add("https://example.com/a?x=1&y=2")
+    assert not index.add("https://EXAMPLE.com/a?y=2&x=1#top")
+    index.save()
+    reloaded = URLIndex(path)
+    assert "https://example.com/a?x=1&y=2" in reloaded and len(reloaded) == 1
+
+def test_frontier_schedules_by_host_priority_then_round_robin():
+    frontier = Frontier(host_priority={"vip.com": 10})
+    for url in ["https://a.com/1", "https://a.com/2", "https://b.com/1", "https://vip.com/1", "https://a.com/1"]:
+        frontier.push(url)
+    order = [frontier.pop()[0] for _ in range(len(frontier))]
+    assert order == ["https://vip.com/1", "https://a.com/1", "https://b.com/1", "https://a.com/2"]
+    assert frontier.pop() is None
+
+def test_read_seeds(tmp_path):
+    path = tmp_path / "urls.csv"
+    path.write_text("# seeds\nhttps://a.com/1,extra\n\nhttps://b.com/2\n")
+    assert list(read_seeds(str(path))) == ["https://a.com/1", "https://b.com/2"]
+
+def test_crawler_follows_links_up_to_depth(monkeypatch):
+    site = {
+        "https://a.com/": '<h1>Home</h1><a class="item" href="/x">x</a><a class="item" href="https://other.com/">o</a>',
+        "https://a.com/x": '<h1>X</h1><a class="item" href="/y">y</a><a class="item" href="/">home</a>',
+        "https://a.com/y": '<h1>Y</h1>',
+        "https://b.com/": '<h1>B</h1>',
+    }
+    scraper = BitScrapper({"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}})
+    fetched = []
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: fetched.append(url) or site.get(url, ""))
+    crawler = Crawler(scraper, {"max_depth": 1, "follow": "a.item", "url_field": "url", "concurrency": 2})
+    assert crawler.add_seeds(["https://a.com/", "https://b.com/", "https://a.com/#dup"]) == 2
+    records = list(crawler.iter_records())
+    assert sorted(r["url"] for r in records) == ["https://a.com/", "https://a.com/x", "https://b.com/"]
+    assert "https://a.com/y" not in fetched and "https://other.com/" not in fetched
+
+def test_crawler_prewarms_the_next_hosts(monkeypatch):
+    frontier = Frontier()
+    for url in ["https://a.com/1", "https://a.com/2", "https://b.com/1", "https://c.com/1"]:
+        frontier.push(url)
+    assert frontier.peek(2) == ["https://a.com/1", "https://b.com/1"]
+    assert len(frontier) == 4
+
+    scraper = BitScrapper({"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}})
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: "<h1>Page</h1>")
+    warmed = []
+    monkeypatch.setattr(scraper, "prewarm", warmed.append)
+    crawler = Crawler(scraper, {"prewarm": 1})
+    crawler.add_seeds(["https://a.com/1", "https://a.com/2", "https://b.com/1", "https://c.com/1"])
+    assert len(list(crawler.iter_records())) == 4
+    # Each batch warms the first upcoming host that is not being fetched
+    assert warmed == [["https://b.com/1"], ["https://c.com/1"], ["https://a.com/2"], []]
+
+def test_crawler_stops_each_next_page_chain_at_max_pages(monkeypatch):
+    def page(url):
+        listing, number = url.rsplit("=", 1)
+        return f'<h1>{url}</h1><a class="next" href="{listing}={int(number) + 1}">next</a>'
+    scraper = BitScrapper({"selectors": {"title": {"type": "css", "value": "h1"}},
+                           "pagination": {"enabled": True, "strategy": "link", "next_selector": "a.next", "max_pages": 3}})
+    fetched = []
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: fetched.append(url) or page(url))
+    crawler = Crawler(scraper, {"concurrency": 2})
+    crawler.add_seeds(["https://a.com/list?page=1", "https://b.com/list?page=5"])
+    assert len(list(crawler.iter_records())) == 6
+    assert sorted(fetched) == [f"https://a.com/list?page={n}" for n in (1, 2, 3)] + \
+        [f"https://b.com/list?page={n}" for n in (5, 6, 7)]
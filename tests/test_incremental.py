@@ -0,0 +1,73 @@
+from bit_scrapper.core.incremental import ChangeDetector
+from bit_scrapper.core.scraper import BitScrapper
+
+config = {
+    "selectors": {"title": {"type": "css", "value": "h1"}},
+    "pagination": {"enabled": True, "strategy": "link", "next_selector": "a.next", "max_pages": 10},
+}
+
+def page(title, next_page=None, extra=""):
+    link = f'<a class="next" href="/list/{next_page}">next</a>' if next_page else ""
+    return f"<html><body><h1>{title}</h1>{extra}{link}</body></html>"
+
+def changes(site, index, monkeypatch):
+    scraper = BitScrapper(config)
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: site.get(url, ""))
+    detector = ChangeDetector(scraper, {"index": index})
+    try:
+        return [(delta["change"], delta["url"], delta["title"]) for delta in detector.iter_changes("https://a.com/list/1")], detector.stats
+    finally:
+        detector.close()
+
+def test_incremental_runs_emit_only_changes(tmp_path, monkeypatch):
+    index = str(tmp_path / "changes.sqlite3")
+    site = {
+        "https://a.com/list/1": page("One", 2),
+        "https://a.com/list/2": page("Two", 3),
+        "https://a.com/list/3": page("Three"),
+    }
+    delta, _ = changes(site, index, monkeypatch)
+    assert delta == [("added", "https://a.com/list/1", "One"), ("added", "https://a.com/list/2", "Two"), ("added", "https://a.com/list/3", "Three")]
+
+    delta, stats = changes(site, index, monkeypatch)
+    assert delta == []
+    assert stats["unchanged"] == 3 and stats["extracted"] == 0
+
+    site["https://a.com/list/1"] = page("One", 2, extra="<p>ad rotated</p>")
+    site["https://a.com/list/2"] = page("Two, updated")
+    delta, stats = changes(site, index, monkeypatch)
+    assert delta == [("changed", "https://a.com/list/2", "Two, updated"), ("deleted", "https://a.com/list/3", "Three")]
+    assert stats["extracted"] == 2
+
+def test_interrupted_incremental_run_keeps_previous_state(tmp_path, monkeypatch):
+    index = str(tmp_path / "changes.sqlite3")
+    site = {"https://a.com/list/1": page("One", 2), "https://a.com/list/2": page("Two")}
+    changes(site, index, monkeypatch)
+
+    site["https://a.com/list/1"] = page("One, updated", 2)
+    scraper = BitScrapper(config)
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: site.get(url, ""))
+    detector = ChangeDetector(scraper, {"index": index})
+    assert next(detector.iter_changes("https://a.com/list/1"))["change"] == "changed"
+    detector.close()
+
+    delta, _ = changes(site, index, monkeypatch)
+    assert delta == [("changed", "https://a.com/list/1", "One, updated")]
+
+def test_failed_fetch_reports_no_deletions(tmp_path, monkeypatch):
+    index = str(tmp_path / "changes.sqlite3")
+    site = {f"https://a.com/list/{n}": page(f"Page {n}", n + 1 if n < 5 else None) for n in range(1, 6)}
+    changes(site, index, monkeypatch)
+
+    site["https://a.com/list/2"] = page("Page 2, updated", 3)
+    flaky = dict(site)
+    del flaky["https://a.com/list/3"]
+    delta, _ = changes(flaky, index, monkeypatch)
+    assert delta == [("changed", "https://a.com/list/2", "Page 2, updated")]
+
+    delta, _ = changes(site, index, monkeypatch)
+    assert delta == []
+    del site["https://a.com/list/5"]
+    site["https://a.com/list/4"] = page("Page 4")
+    delta, _ = changes(site, index, monkeypatch)
+    assert delta == [("deleted", "https://a.com/list/5", "Page 5")]
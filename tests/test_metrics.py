@@ -0,0 +1,74 @@
+import json
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.utils.metrics import NULL_METRICS, Histogram, Metrics, make_metrics
+from bit_scrapper.utils.writer import open_writer
+
+html = "<html><body><h1>Title</h1></body></html>"
+config = {"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}, "respect_robots": False}
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = Histogram((0.1, 1.0, 10.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [5.0]:
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert summary["count"] == 100 and summary["max"] == 5.0
+    assert (summary["p50"], summary["p90"], summary["p99"]) == (0.1, 0.1, 1.0)
+
+def test_disabled_metrics_are_a_no_op():
+    assert make_metrics(None) is NULL_METRICS
+    assert make_metrics({"enabled": False}) is NULL_METRICS
+    with NULL_METRICS.timer("write_seconds"):
+        NULL_METRICS.inc("requests_total")
+    assert NULL_METRICS.summary()["counters"] == {}
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    metrics.inc("requests_total", status=200)
+    metrics.inc("requests_total", status=200)
+    metrics.inc("retries_total")
+    metrics.observe("parse_seconds", 0.002)
+    text = metrics.to_prometheus()
+    assert '# TYPE bitscrapper_requests_total counter\nbitscrapper_requests_total{status="200"} 2' in text
+    assert "bitscrapper_retries_total 1" in text
+    assert 'bitscrapper_parse_seconds_bucket{le="0.0025"} 1' in text
+    assert 'bitscrapper_parse_seconds_bucket{le="+Inf"} 1' in text
+    assert "bitscrapper_parse_seconds_count 1" in text
+
+def test_scraper_records_stage_metrics_and_exports(tmp_path):
+    summary_path = tmp_path / "metrics.json"
+    prometheus_path = tmp_path / "metrics.prom"
+    scraper = BitScrapper(dict(config, cache={"enabled": False}, retry={"backoff_factor": 0},
+                               metrics={"summary": str(summary_path), "prometheus": str(prometheus_path)}))
+    error = MagicMock(status_code=503, headers={}, content=b"", raise_for_status=MagicMock(side_effect=requests.HTTPError()))
+    ok = MagicMock(status_code=200, text=html, content=html.encode(), headers={})
+    with patch.object(scraper.middleware.session, "get", MagicMock(side_effect=[error, ok])):
+        records = scraper.run("http://fake-url.com")
+    with open_writer("jsonl", str(tmp_path / "out.jsonl"), metrics=scraper.metrics) as writer:
+        for record in records:
+            writer.write(record)
+    scraper.close()
+
+    summary = json.loads(summary_path.read_text())
+    counters, histograms = summary["counters"], summary["histograms"]
+    assert counters["requests_total"] == {"status=200": 1, "status=503": 1}
+    assert counters["retries_total"] == 1
+    assert counters["bytes_fetched_total"] == len(html)
+    assert counters["records_written_total"] == 1
+    for name in ("request_seconds", "fetch_seconds", "parse_seconds", "extract_seconds", "write_seconds"):
+        assert histograms[name]["count"] >= 1
+    assert "bitscrapper_bytes_fetched_total" in prometheus_path.read_text()
+
+def test_metrics_endpoint_serves_prometheus_text():
+    metrics = make_metrics({"port": 0})
+    try:
+        metrics.inc("cache_hits_total")
+        port = metrics.server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert "bitscrapper_cache_hits_total 1" in response.read().decode()
+    finally:
+        metrics.close()
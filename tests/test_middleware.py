@@ -1,7 +1,9 @@
+import io
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
-from bit_scrapper.core.middleware import Middleware
+from bit_scrapper.core.middleware import HostThrottle, Middleware, TokenBucket, parse_retry_after
+from bit_scrapper.core.scraper import BitScrapper
 
 @pytest.fixture
 def config():
@@ -51,7 +53,7 @@ def test_retry_on_timeout_and_5xx(config):
         MagicMock(status_code=200, raise_for_status=MagicMock(return_value=None), text="Success")
     ]
 
-    with patch("requests.get", mock_get):
+    with patch.object(middleware.session, "get", mock_get):
         content = middleware.fetch_with_retries("https://favqs.com/api", headers={})
         assert content == "Success"
         assert mock_get.call_count == 3
@@ -63,7 +65,7 @@ def test_max_retries_exceeded(config):
     mock_get = MagicMock()
     mock_get.side_effect = requests.exceptions.Timeout()
 
-    with patch("requests.get", mock_get):
+    with patch.object(middleware.session, "get", mock_get):
         content = middleware.fetch_with_retries("https://favqs.com/api", headers={})
         assert content == ""
         assert mock_get.call_count == 2
@@ -77,8 +79,132 @@ def test_no_retry_on_403_or_404(config):
     )
     mock_get = MagicMock(return_value=mock_response)
 
-    with patch("requests.get", mock_get):
+    with patch.object(middleware.session, "get", mock_get):
         content = middleware.fetch_with_retries("https://favqs.com/api", headers={})
         assert content == ""
         # Should NOT retry, only 1 call
         assert mock_get.call_count == 1
+
+def test_session_is_pooled_and_negotiates_compression(config):
+    config["http"] = {"pool_maxsize": 20, "timeout": 5}
+    middleware = Middleware(config)
+    adapter = middleware.session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == 20
+    assert "gzip" in middleware.session.headers["Accept-Encoding"]
+
+    mock_get = MagicMock(return_value=MagicMock(status_code=200, text="ok"))
+    with patch.object(middleware.session, "get", mock_get):
+        assert middleware.fetch_with_retries("https://example.com", headers={}) == "ok"
+        assert mock_get.call_args.kwargs["timeout"] == 5
+    middleware.close()
+
+def test_compression_can_be_disabled():
+    middleware = Middleware({"http": {"compression": False}})
+    assert middleware.session.headers["Accept-Encoding"] == "identity"
+
+def test_token_bucket_spaces_reservations_after_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.09 < waits[2] <= 0.1 and 0.19 < waits[3] <= 0.2
+
+def test_throttle_aimd_per_host():
+    throttle = HostThrottle({"rate": 4, "increase": 1, "decrease": 0.5, "latency_target": 0.5, "max_rate": 5})
+    throttle.record("https://a.com/1", 200, 0.1)
+    throttle.record("https://a.com/2", 200, 0.1)
+    assert throttle.hosts["a.com"]["bucket"].rate == 5
+    throttle.record("https://a.com/3", 429, 0.1)
+    assert throttle.hosts["a.com"]["bucket"].rate == 2.5
+    throttle.record("https://a.com/4", 200, 2.0)
+    assert throttle.hosts["a.com"]["bucket"].rate == 2.5
+    throttle.record("https://b.com/1", 503, 0.1)
+    assert throttle.hosts["b.com"]["bucket"].rate == 2
+
+def test_retry_after_pauses_host_even_when_unconfigured():
+    throttle = HostThrottle()
+    assert throttle.reserve("https://a.com/") == 0
+    throttle.record("https://a.com/", 429, 0.1, retry_after="2")
+    assert 1.9 < throttle.reserve("https://a.com/x") <= 2
+    assert throttle.reserve("https://b.com/") == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+def test_limit_caps_host_rate():
+    throttle = HostThrottle()
+    throttle.limit("https://a.com/", 0.5)
+    assert throttle.reserve("https://a.com/") == 0
+    assert 1.9 < throttle.reserve("https://a.com/") <= 2
+
+def test_fetch_applies_random_delay_and_throttle(config):
+    middleware = Middleware(config)
+    mock_get = MagicMock(return_value=MagicMock(status_code=200, text="ok", headers={}))
+    with patch.object(middleware.session, "get", mock_get), \
+            patch.object(middleware, "_apply_random_delay") as delay, \
+            patch.object(middleware.throttle, "acquire") as acquire:
+        middleware.fetch_with_retries("https://example.com", headers={})
+    delay.assert_called_once()
+    acquire.assert_called_once_with("https://example.com")
+
+
+class _Body(io.BytesIO):
+    # Remembers how much of the body was downloaded, even after it is closed
+    consumed = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed += len(data)
+        return data
+
+def _streamed(body: bytes, headers: dict = None, status: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.raw = _Body(body)
+    return response
+
+def test_disallowed_content_type_is_rejected_before_reading():
+    middleware = Middleware({"retry": {"backoff_factor": 0}})
+    response = _streamed(b"%PDF-1.7 ...", {"Content-Type": "application/pdf"})
+    mock_get = MagicMock(return_value=response)
+    with patch.object(middleware.session, "get", mock_get):
+        assert middleware.fetch_with_retries("https://example.com/file.pdf", headers={}) == ""
+    assert mock_get.call_count == 1
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert response.raw.consumed == 0
+
+def test_body_over_max_size_is_rejected():
+    middleware = Middleware({"http": {"max_body_size": 1000, "chunk_size": 100}})
+    declared = _streamed(b"x" * 2000, {"Content-Type": "text/html", "Content-Length": "2000"})
+    endless = _streamed(b"x" * 5000, {"Content-Type": "text/html"})
+    with patch.object(middleware.session, "get", MagicMock(side_effect=[declared, endless])):
+        assert middleware.fetch_with_retries("https://example.com/a", headers={}) == ""
+        assert middleware.fetch_with_retries("https://example.com/b", headers={}) == ""
+    assert declared.raw.consumed == 0
+    assert endless.raw.consumed < 2000
+
+def test_read_limit_stops_after_n_bytes():
+    middleware = Middleware({"http": {"read_limit": 50, "chunk_size": 16}})
+    page = b"<html><head><title>Top</title></head><body>" + b"filler " * 1000 + b"</body></html>"
+    response = _streamed(page, {"Content-Type": "text/html; charset=utf-8"})
+    with patch.object(middleware.session, "get", MagicMock(return_value=response)):
+        assert middleware.fetch_with_retries("https://example.com", headers={}) == page[:50].decode()
+    assert response.raw.consumed < len(page)
+
+def test_truncated_body_is_not_cached(tmp_path):
+    config = {"selectors": {"title": {"type": "css", "value": "title"}}, "pagination": {"enabled": False},
+              "respect_robots": False, "http": {"read_limit": 50, "chunk_size": 16}, "cache": {"dir": str(tmp_path)}}
+    page = b"<html><head><title>Top</title></head><body>" + b"filler " * 1000 + b"</body></html>"
+    headers = {"Content-Type": "text/html; charset=utf-8", "ETag": '"full"'}
+    mock_get = MagicMock(side_effect=[_streamed(page, headers), _streamed(page, headers)])
+    with BitScrapper(config) as scraper, patch.object(scraper.middleware.session, "get", mock_get):
+        assert scraper.fetch_url("https://example.com") == page[:50].decode()
+        assert scraper.cache.lookup("https://example.com") is None
+        assert scraper.fetch_url("https://example.com") == page[:50].decode()
+    # The cut page's ETag was never kept, so the second fetch was not conditional
+    assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
+
+def test_encoding_is_sniffed_from_meta_charset():
+    middleware = Middleware({})
+    page = '<meta charset="windows-1251"><h1>Привет</h1>'.encode("windows-1251")
+    with patch.object(middleware.session, "get", MagicMock(return_value=_streamed(page))):
+        assert "Привет" in middleware.fetch_with_retries("https://example.com", headers={})
@@ -0,0 +1,39 @@
+import bs4
+import bs4.builder
+import pytest
+from unittest.mock import patch
+from bit_scrapper.core.parser import Document, parse_html, resolve_backend
+from bit_scrapper.core.scraper import BitScrapper
+
+config = {
+    "selectors": {"title": {"type": "css", "value": "h1"}},
+    "pagination": {"enabled": True, "strategy": "link", "next_selector": "a.next", "max_pages": 2},
+}
+
+pages = {
+    "http://fake-url.com/1": '<h1>One</h1><a class="next" href="/2">next</a>',
+    "http://fake-url.com/2": "<h1>Two</h1>",
+}
+
+def test_resolve_backend_falls_back_when_missing():
+    with patch.object(bs4.builder.builder_registry, "lookup", return_value=None):
+        assert resolve_backend("lxml") == "html.parser"
+    assert resolve_backend(None) == "html.parser"
+
+def test_resolve_backend_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        resolve_backend("not-a-parser")
+
+def test_extract_data_accepts_parsed_document():
+    scraper = BitScrapper(config)
+    document = parse_html("<h1>Parsed</h1>")
+    assert isinstance(document, Document)
+    assert scraper.extract_data(document) == {"title": "Parsed"}
+
+def test_run_parses_each_page_once(monkeypatch):
+    scraper = BitScrapper(config)
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: pages[url])
+    with patch.object(bs4.BeautifulSoup, "__init__", autospec=True, side_effect=bs4.BeautifulSoup.__init__) as soup_class:
+        result = scraper.run("http://fake-url.com/1")
+    assert [r["title"] for r in result] == ["One", "Two"]
+    assert soup_class.call_count == 2
@@ -0,0 +1,32 @@
+from bit_scrapper.core.pipeline import ExtractionPipeline
+from bit_scrapper.core.scraper import BitScrapper
+from bit_scrapper.core.async_scraper import AsyncBitScrapper
+
+config = {
+    "selectors": {"title": {"type": "css", "value": "h1"}, "count": {"type": "css", "value": "b", "post": "int"}},
+    "pagination": {"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com/list", "max_pages": 20},
+    "respect_robots": False,
+}
+
+def page(n):
+    return f"<h1>Page {n}</h1><b>{n}</b>"
+
+def test_pipeline_keeps_page_order():
+    pipeline = ExtractionPipeline(config, workers=2, queue_size=3)
+    records = list(pipeline.map(page(n) for n in range(30)))
+    assert records == [{"title": f"Page {n}", "count": n} for n in range(30)]
+
+def test_unordered_pipeline_returns_every_record():
+    pipeline = ExtractionPipeline(config, workers=2, ordered=False)
+    records = list(pipeline.map(page(n) for n in range(30)))
+    assert sorted(r["count"] for r in records) == list(range(30))
+
+def test_scraper_pipeline_mode_matches_in_process_run(monkeypatch):
+    pages = {"http://fake-url.com/list": page(1)}
+    pages.update({f"http://fake-url.com/list?page={n}": page(n) for n in range(2, 8)})
+
+    expected = BitScrapper(config)
+    monkeypatch.setattr(expected, "fetch_url", lambda url: pages.get(url, ""))
+    for scraper in (BitScrapper(dict(config, pipeline={"workers": 2})), AsyncBitScrapper(dict(config, pipeline={"workers": 2}))):
+        monkeypatch.setattr(scraper, "fetch_url", lambda url: pages.get(url, ""))
+        assert scraper.run("http://fake-url.com/list") == expected.run("http://fake-url.com/list")
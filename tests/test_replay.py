@@ -0,0 +1,62 @@
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+import requests
+from bit_scrapper.cli import replay as replay_cli
+from bit_scrapper.core.replay import Replayer
+from bit_scrapper.utils.cache import ResponseCache
+
+PAGES = {f"http://shop.test/item/{n}": f"<h1>Item {n}</h1><span class='price'>{n}.99</span>" for n in range(1, 7)}
+
+
+def cached_config(tmp_path, backend):
+    config = {
+        "selectors": {"title": {"type": "css", "value": "h1"}},
+        "pagination": {"enabled": False},
+        "cache": {"dir": str(tmp_path / "cache"), "backend": backend},
+    }
+    cache = ResponseCache(config["cache"])
+    for url, body in PAGES.items():
+        cache.put(url, body, {"Content-Type": "text/html"})
+    cache.close()
+    # A field added after the crawl
+    config["selectors"]["price"] = {"type": "css", "value": ".price", "dtype": "float"}
+    return config
+
+
+@pytest.fixture(autouse=True)
+def no_network():
+    with patch.object(requests.Session, "request", side_effect=AssertionError("replay must not touch the network")):
+        yield
+
+
+@pytest.mark.parametrize("backend", ["files", "sqlite"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_extracts_new_selectors_from_cache(tmp_path, backend, workers):
+    with Replayer(cached_config(tmp_path, backend), workers=workers, url_field="url") as replayer:
+        records = replayer.run()
+    assert sorted((r["url"], r["title"], r["price"]) for r in records) == \
+        sorted((url, f"Item {n}", n + 0.99) for n, url in enumerate(PAGES, 1))
+    assert replayer.stats["pages"] == len(PAGES)
+
+
+def test_replay_subsets(tmp_path):
+    with Replayer(cached_config(tmp_path, "files"), workers=1, url_field="url") as replayer:
+        assert {r["url"] for r in replayer.run(match=r"/item/[12]$")} == {"http://shop.test/item/1", "http://shop.test/item/2"}
+        assert len(replayer.run(limit=4)) == 4
+        wanted = ["http://shop.test/item/5", "http://shop.test/missing"]
+        assert [r["title"] for r in replayer.run(urls=wanted)] == ["Item 5"]
+
+
+def test_replay_cli_streams_to_writer(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(cached_config(tmp_path, "sqlite")))
+    output = tmp_path / "replayed"
+    monkeypatch.setattr(sys, "argv", ["replay", "--config", str(config_path), "--format", "jsonl",
+                                      "--output", str(output), "--workers", "1", "--url-field", "url"])
+    replay_cli.main()
+    records = [json.loads(line) for line in (tmp_path / "replayed.jsonl").read_text().splitlines()]
+    assert len(records) == len(PAGES)
+    assert all(set(record) == {"title", "price", "url"} for record in records)
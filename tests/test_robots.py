@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+import requests
+from unittest.mock import MagicMock
+from bit_scrapper.core.robots import RobotsCache
+
+ROBOTS = {
+    "https://a.com/robots.txt": (200, "User-agent: *\nDisallow: /private\nCrawl-delay: 2\n"),
+    "https://b.com/robots.txt": (200, "User-agent: *\nDisallow: /\n"),
+    "https://c.com/robots.txt": (404, ""),
+    "https://d.com/robots.txt": (200, "User-agent: *\nRequest-rate: 1/5\n"),
+}
+
+def fake_middleware():
+    middleware = MagicMock()
+    middleware.get.side_effect = lambda url: MagicMock(status_code=ROBOTS[url][0], text=ROBOTS[url][1])
+    return middleware
+
+def test_policies_are_kept_per_host(tmp_path):
+    middleware = fake_middleware()
+    robots = RobotsCache(middleware, {"path": str(tmp_path / "robots.json")})
+    assert robots.can_fetch("https://a.com/page")
+    assert not robots.can_fetch("https://a.com/private/page")
+    assert not robots.can_fetch("https://b.com/page")
+    assert robots.can_fetch("https://c.com/anything")
+    assert robots.can_fetch("https://a.com/other")
+    assert middleware.get.call_count == 3
+
+def test_crawl_delay_and_request_rate(tmp_path):
+    robots = RobotsCache(fake_middleware(), {"path": None})
+    assert robots.delay_for("https://a.com/") == 2
+    assert robots.delay_for("https://d.com/") == 5
+    assert robots.delay_for("https://c.com/") is None
+
+def test_policies_persist_until_their_ttl(tmp_path):
+    path = str(tmp_path / "robots.json")
+    first = RobotsCache(fake_middleware(), {"path": path})
+    first.can_fetch("https://b.com/page")
+    first.save()
+
+    middleware = fake_middleware()
+    second = RobotsCache(middleware, {"path": path})
+    assert not second.can_fetch("https://b.com/page")
+    middleware.get.assert_not_called()
+
+    expired = RobotsCache(middleware, {"path": path, "ttl": 0})
+    expired.can_fetch("https://b.com/page")
+    assert middleware.get.call_count == 1
+
+def test_lru_bounds_hosts_and_failures_disallow(tmp_path):
+    middleware = fake_middleware()
+    robots = RobotsCache(middleware, {"path": None, "max_hosts": 2})
+    for host in ("a", "b", "c"):
+        robots.can_fetch(f"https://{host}.com/")
+    assert list(robots.policies) == ["https://b.com", "https://c.com"]
+
+    middleware.get.side_effect = requests.ConnectionError()
+    assert not robots.can_fetch("https://e.com/")
+
+def test_slow_host_does_not_block_the_others():
+    middleware = fake_middleware()
+    fetch = middleware.get.side_effect
+    started = threading.Event()
+    release = threading.Event()
+
+    def get(url):
+        if url.startswith("https://a.com"):
+            started.set()
+            release.wait(5)
+        return fetch(url)
+
+    middleware.get.side_effect = get
+    robots = RobotsCache(middleware, {"path": None})
+    slow = threading.Thread(target=robots.can_fetch, args=("https://a.com/page",))
+    slow.start()
+    started.wait(5)
+    assert not robots.can_fetch("https://b.com/page")
+    release.set()
+    slow.join()
+    assert robots.can_fetch("https://a.com/page")
+    assert middleware.get.call_count == 2
+
+def test_unavailable_robots_is_retried_and_never_persisted(tmp_path):
+    path = str(tmp_path / "robots.json")
+    middleware = fake_middleware()
+    middleware.get.side_effect = lambda url: MagicMock(status_code=503, text="")
+    robots = RobotsCache(middleware, {"path": path, "retry_ttl": 0.1})
+    assert not robots.can_fetch("https://a.com/page")
+    assert not robots.can_fetch("https://a.com/other")
+    assert middleware.get.call_count == 1
+    robots.save()
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file) == {}
+    assert not RobotsCache(middleware, {"path": path}).policies
+
+    time.sleep(0.15)
+    middleware.get.side_effect = fake_middleware().get.side_effect
+    assert robots.can_fetch("https://a.com/page")
+    assert middleware.get.call_count == 2
+    robots.save()
+    with open(path, encoding="utf-8") as file:
+        assert list(json.load(file)) == ["https://a.com"]
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    path = str(tmp_path / "robots.json")
+    caches = [RobotsCache(fake_middleware(), {"path": path}) for _ in range(8)]
+    for robots in caches:
+        robots.can_fetch("https://a.com/page")
+    threads = [threading.Thread(target=robots.save) for robots in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path, encoding="utf-8") as file:
+        assert list(json.load(file)) == ["https://a.com"]
+    assert [name for name in os.listdir(tmp_path)] == ["robots.json"]
@@ -0,0 +1,83 @@
+import json
+import threading
+
+import pytest
+
+from bit_scrapper.core.scheduler import Job, Scheduler
+from bit_scrapper.core.scraper import BitScrapper
+
+config = {"selectors": {"title": {"type": "css", "value": "h1"}}, "pagination": {"enabled": False}}
+
+def job_spec(name, tmp_path, **options):
+    return dict({"name": name, "config": config, "url": f"https://a.com/{name}", "format": "jsonl",
+                 "output": str(tmp_path / "out" / name), "every": 60}, **options)
+
+def test_jobs_run_concurrently_and_keep_their_scraper_warm(tmp_path, monkeypatch):
+    monkeypatch.setattr(BitScrapper, "fetch_url", lambda self, url: f"<h1>{url}</h1>")
+    status_file = str(tmp_path / "status.json")
+    scheduler = Scheduler([Job(job_spec("one", tmp_path)), Job(job_spec("two", tmp_path, incremental=True))], workers=2, status_file=status_file)
+    session = scheduler.jobs["one"].scraper.middleware.session
+    scheduler.run_all()
+    scheduler.run_all()
+    try:
+        status = scheduler.status()
+        assert status["one"]["runs"] == 2 and status["one"]["state"] == "idle" and status["one"]["last_error"] is None
+        assert status["one"]["last_records"] == 1
+        # The incremental job found nothing new on its second run
+        assert status["two"]["last_records"] == 0
+        assert scheduler.jobs["one"].scraper.middleware.session is session
+        with open(tmp_path / "out" / "one.jsonl") as file:
+            assert json.loads(file.read())["title"] == "https://a.com/one"
+        with open(status_file) as file:
+            assert json.load(file)["two"]["runs"] == 2
+    finally:
+        scheduler.stop()
+
+def test_busy_job_is_skipped_and_failures_are_reported(tmp_path, monkeypatch):
+    release = threading.Event()
+    def fetch(self, url):
+        if url.endswith("slow"):
+            release.wait(5)
+        if url.endswith("broken"):
+            raise RuntimeError("boom")
+        return "<h1>ok</h1>"
+    monkeypatch.setattr(BitScrapper, "fetch_url", fetch)
+    scheduler = Scheduler([Job(job_spec("slow", tmp_path)), Job(job_spec("broken", tmp_path))], workers=2)
+    try:
+        assert scheduler.submit("slow")
+        assert not scheduler.submit("slow")
+        release.set()
+        scheduler.run_all()
+        status = scheduler.status()
+        assert status["slow"]["runs"] >= 1 and status["slow"]["failures"] == 0
+        assert status["broken"]["failures"] == 1 and "boom" in status["broken"]["last_error"]
+    finally:
+        scheduler.stop()
+
+def test_job_needs_a_trigger(tmp_path):
+    spec = job_spec("never", tmp_path)
+    del spec["every"]
+    with pytest.raises(ValueError):
+        Job(spec)
+
+def test_failed_incremental_run_is_rolled_back(tmp_path, monkeypatch):
+    site = {"https://a.com/list/1": '<h1>One</h1><a class="next" href="/list/2">next</a>', "https://a.com/list/2": "<h1>Two</h1>"}
+    def fetch(self, url):
+        if site[url] is None:
+            raise RuntimeError("boom")
+        return site[url]
+    monkeypatch.setattr(BitScrapper, "fetch_url", fetch)
+    listing = dict(config, pagination={"enabled": True, "strategy": "link", "next_selector": "a.next", "max_pages": 5})
+    job = Job(job_spec("listing", tmp_path, config=listing, url="https://a.com/list/1", incremental=True))
+    try:
+        assert job.run() == 2
+        site["https://a.com/list/1"] = '<h1>One, updated</h1><a class="next" href="/list/2">next</a>'
+        site["https://a.com/list/2"] = None
+        with pytest.raises(RuntimeError):
+            job.run()
+        site["https://a.com/list/2"] = "<h1>Two</h1>"
+        # The retry still reports the change the failed run saw
+        assert job.run() == 1
+        assert job.run() == 0
+    finally:
+        job.close()
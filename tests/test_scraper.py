@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock, patch
+
 import pytest
 from bit_scrapper.core.scraper import BitScrapper
 
@@ -39,4 +41,28 @@ def test_scraper_extract_data(monkeypatch):
     monkeypatch.setattr(scraper, "fetch_url", lambda url: sample_html)
     result = scraper.run("http://fake-url.com")
     assert isinstance(result, list)
-    assert result[0]["title"] == "Test Title"
\ No newline at end of file
+    assert result[0]["title"] == "Test Title"
+
+def test_fetch_url_revalidates_stale_cache_entry(tmp_path):
+    config = dict(sample_config, respect_robots=False, cache={"dir": str(tmp_path), "ttl": 0})
+    scraper = BitScrapper(config)
+    first = MagicMock(status_code=200, text=sample_html, headers={"ETag": '"abc"'})
+    not_modified = MagicMock(status_code=304, text="", headers={})
+    mock_get = MagicMock(side_effect=[first, not_modified])
+
+    with patch.object(scraper.middleware.session, "get", mock_get):
+        assert scraper.fetch_url("http://fake-url.com") == sample_html
+        assert scraper.fetch_url("http://fake-url.com") == sample_html
+
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+    assert scraper.cache.stats["revalidated"] == 1
+
+def test_iter_records_is_lazy(monkeypatch):
+    config = dict(sample_config, pagination={"enabled": True, "strategy": "offset", "base_url": "http://fake-url.com", "max_pages": 3})
+    scraper = BitScrapper(config)
+    fetched = []
+    monkeypatch.setattr(scraper, "fetch_url", lambda url: fetched.append(url) or sample_html)
+    records = scraper.iter_records("http://fake-url.com")
+    assert next(records)["title"] == "Test Title"
+    assert len(fetched) == 1
+    assert len(list(records)) == 2
@@ -0,0 +1,56 @@
+import pytest
+from bit_scrapper.core.parser import parse_html
+from bit_scrapper.core.selectors import compile_selectors
+
+html = """
+<html><body>
+  <h1> Listing </h1>
+  <ul>
+    <li class="item"><a href="/a">Alpha</a><span class="price">1,200</span></li>
+    <li class="item"><a href="/b">Beta</a><span class="price">15</span></li>
+  </ul>
+  <script>var sku = "SKU-42";</script>
+</body></html>
+"""
+
+def test_css_attributes_multiple_and_post_processing():
+    plan = compile_selectors({
+        "title": {"type": "css", "value": "h1", "post": "lower"},
+        "links": {"type": "css", "value": "li.item a", "attr": "href", "multiple": True},
+        "prices": {"type": "css", "value": "span.price", "multiple": True, "post": ["int"]},
+        "missing": {"type": "css", "value": "h2"},
+    })
+    assert plan.apply(parse_html(html)) == {
+        "title": "listing",
+        "links": ["/a", "/b"],
+        "prices": [1200, 15],
+        "missing": None,
+    }
+
+def test_xpath_rules():
+    pytest.importorskip("lxml")
+    plan = compile_selectors({
+        "title": {"type": "xpath", "value": "//h1"},
+        "names": {"type": "xpath", "value": "//li/a/text()", "multiple": True},
+        "link": {"type": "xpath", "value": "//li/a", "attr": "href"},
+        "count": {"type": "xpath", "value": "count(//li)"},
+    })
+    assert plan.apply(parse_html(html)) == {"title": "Listing", "names": ["Alpha", "Beta"], "link": "/a", "count": 2.0}
+
+def test_regex_rules_use_first_group():
+    plan = compile_selectors({
+        "sku": {"type": "regex", "value": r'sku = "([^"]+)"'},
+        "names": {"type": "regex", "value": r"<a [^>]*>(\w+)</a>", "multiple": True, "post": "upper"},
+    })
+    assert plan.apply(parse_html(html)) == {"sku": "SKU-42", "names": ["ALPHA", "BETA"]}
+
+@pytest.mark.parametrize("rule", [
+    {"type": "css", "value": "li[["},
+    {"type": "regex", "value": "(unclosed"},
+    {"type": "unknown", "value": "x"},
+    {"type": "css", "value": "h1", "post": ["nope"]},
+    {"type": "css"},
+])
+def test_invalid_rules_fail_at_compile_time(rule):
+    with pytest.raises(ValueError):
+        compile_selectors({"field": rule})
@@ -1,5 +1,11 @@
+import json
 import os
-from bit_scrapper.utils.writer import write_csv, write_json
+import time
+
+import pytest
+from bit_scrapper.core.selectors import compile_selectors
+from bit_scrapper.utils.cache import ResponseCache
+from bit_scrapper.utils.writer import open_writer, write_csv, write_json
 
 data = [{"a": 1, "b": 2}]
 
@@ -11,4 +17,116 @@ def test_write_json_creates_file(tmp_path):
 def test_save_csv_creates_file(tmp_path):
     file = tmp_path / "data.csv"
     write_csv(data, str(file))
-    assert file.exists()
\ No newline at end of file
+    assert file.exists()
+
+def test_cache_stores_validators_and_builds_conditional_headers(tmp_path):
+    cache = ResponseCache({"dir": str(tmp_path), "ttl": 60})
+    cache.put("https://example.com/a", "<h1>A</h1>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT", "X-Other": "dropped"})
+    entry = ResponseCache({"dir": str(tmp_path), "ttl": 60}).lookup("https://example.com/a")
+    assert entry.body == "<h1>A</h1>"
+    assert "X-Other" not in entry.headers
+    assert cache.conditional_headers(entry) == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+def test_cache_ttl_per_domain(tmp_path):
+    cache = ResponseCache({"dir": str(tmp_path), "ttl": 0, "domain_ttls": {"example.com": 3600}})
+    fresh = cache.put("https://www.example.com/a", "a")
+    stale = cache.put("https://other.org/a", "b")
+    assert cache.is_fresh(fresh)
+    assert not cache.is_fresh(stale)
+    cache.lookup("https://www.example.com/a")
+    cache.lookup("https://other.org/a")
+    cache.lookup("https://missing.org/")
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+
+def test_cache_revalidation_counts_as_hit(tmp_path):
+    cache = ResponseCache({"dir": str(tmp_path)})
+    cache.put("https://example.com/a", "body", {"ETag": '"v1"'})
+    entry = cache.lookup("https://example.com/a")
+    before = entry.stored_at
+    time.sleep(0.01)
+    cache.revalidated(entry, {"ETag": '"v2"'})
+    assert entry.stored_at > before and entry.headers["ETag"] == '"v2"'
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 0 and cache.stats["revalidated"] == 1
+
+def test_cache_evicts_least_recently_used_beyond_budget(tmp_path):
+    cache = ResponseCache({"dir": str(tmp_path), "ttl": 60, "max_bytes": 25, "memory_entries": 1})
+    cache.put("https://example.com/1", "x" * 10)
+    cache.put("https://example.com/2", "x" * 10)
+    cache.get("https://example.com/1")
+    cache.put("https://example.com/3", "x" * 10)
+    assert cache.stats["evictions"] == 1
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/1").body == "x" * 10
+    assert len(list(tmp_path.glob("*.html"))) == 2
+
+def test_sqlite_cache_store_round_trip_and_eviction(tmp_path):
+    config = {"dir": str(tmp_path), "backend": "sqlite", "ttl": 60, "memory_entries": 0}
+    cache = ResponseCache(config)
+    cache.put("https://example.com/a", "<p>" + "a" * 1000 + "</p>", {"ETag": '"a"'})
+    cache.close()
+
+    reopened = ResponseCache(config)
+    entry = reopened.lookup("https://example.com/a")
+    assert entry.body == "<p>" + "a" * 1000 + "</p>" and entry.headers == {"ETag": '"a"'}
+    assert reopened.store.total_size < 1000
+    assert list(tmp_path.iterdir())[0].name.startswith("cache.sqlite3")
+
+    reopened.max_bytes = reopened.store.total_size
+    reopened.put("https://example.com/b", "b" * 500)
+    assert reopened.stats["evictions"] == 1
+    assert reopened.get("https://example.com/a") is None
+
+records = [{"a": 1, "b": "x"}, {"a": 2, "b": "y"}, {"a": 3, "b": "z"}]
+
+def test_stream_writers_flush_incrementally(tmp_path):
+    file = tmp_path / "data.jsonl"
+    writer = open_writer("jsonl", str(file), buffer_size=2)
+    for record in records:
+        writer.write(record)
+    # Two records flushed, the third still buffered
+    assert len(file.read_text().splitlines()) == 2
+    writer.close()
+    assert [json.loads(line) for line in file.read_text().splitlines()] == records
+
+def test_json_array_writer_matches_write_json(tmp_path):
+    streamed, batch = tmp_path / "streamed.json", tmp_path / "batch.json"
+    with open_writer("json", str(streamed), buffer_size=1) as writer:
+        for record in records:
+            writer.write(record)
+    write_json(records, str(batch))
+    assert streamed.read_text() == batch.read_text()
+
+def test_csv_writer_uses_declared_schema(tmp_path):
+    file = tmp_path / "data.csv"
+    with open_writer("csv", str(file), fieldnames=["b", "a"]) as writer:
+        writer.write({"a": 1, "b": "x", "extra": True})
+    assert file.read_text().splitlines() == ["b,a", "x,1"]
+
+def test_columnar_writers_batch_with_declared_types(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    types = compile_selectors({
+        "name": {"type": "css", "value": "h1"},
+        "price": {"type": "css", "value": "span", "post": ["float"]},
+        "tags": {"type": "css", "value": "li", "multiple": True},
+        "stock": {"type": "css", "value": "b", "dtype": "int"},
+    }).column_types()
+    assert types == {"name": "string", "price": "float", "tags": "list<string>", "stock": "int"}
+    rows = [{"name": f"n{i}", "price": i / 2, "tags": ["a"], "stock": None if i % 2 else i} for i in range(5)]
+
+    parquet_file = tmp_path / "data.parquet"
+    with open_writer("parquet", str(parquet_file), types=types, buffer_size=2) as writer:
+        for row in rows:
+            writer.write(row)
+    parquet = pq.ParquetFile(str(parquet_file))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().to_pylist() == rows
+    assert parquet.schema_arrow.field("stock").type == pa.int64()
+
+    arrow_file = tmp_path / "data.arrow"
+    with open_writer("arrow", str(arrow_file), types=types, buffer_size=2) as writer:
+        for row in rows:
+            writer.write(row)
+    with pa.ipc.open_file(str(arrow_file)) as reader:
+        assert reader.num_record_batches == 3
+        assert reader.read_all().to_pylist() == rows